@@ -1,38 +1,25 @@
 """
 Modo AGRESSIVO de limpeza de Standby Cache
 Limpa periodicamente, não só quando threshold é atingido
+(StandbyMemoryCleaner com a política 'aggressive' - ver purge_policy)
 """
 import time
-import threading
 from modules.standby_cleaner import StandbyMemoryCleaner
+from modules.purge_policy import AggressivePolicy
 
 class AggressiveStandbyCleaner(StandbyMemoryCleaner):
-    def __init__(self, clean_interval_seconds=30):
+    def __init__(self, clean_interval_seconds=30, **kwargs):
         """
         clean_interval_seconds: Limpa a cada X segundos (padrão: 30s)
         """
-        super().__init__(threshold_mb=0, check_interval=clean_interval_seconds)
+        kwargs.setdefault('tiered', False)  # Agressivo = purge completa sempre
+        super().__init__(threshold_mb=0, check_interval=clean_interval_seconds,
+                         policy=AggressivePolicy(), **kwargs)
         self.clean_interval = clean_interval_seconds
         
-    def _monitoring_loop(self):
-        """Loop que limpa periodicamente SEMPRE"""
+    def start(self):
         print(f"[AGGRESSIVE] Limpeza periódica ativa: a cada {self.clean_interval}s")
-        
-        while self.running:
-            try:
-                # Limpa SEMPRE, não verifica threshold
-                freed_mb = self.clean_standby_memory()
-                
-                if freed_mb > 0:
-                    print(f"[CLEAN] Liberado: {freed_mb}MB | "
-                          f"Total limpezas: {self.clean_count}")
-                else:
-                    print(f"[CLEAN] Cache já estava limpo")
-                
-                time.sleep(self.clean_interval)
-            except Exception as e:
-                print(f"[ERROR] Erro: {e}")
-                time.sleep(10)
+        super().start()
 
 
 if __name__ == "__main__":
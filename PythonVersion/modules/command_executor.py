@@ -0,0 +1,183 @@
+"""
+Command Executor - Execução assíncrona e paralela de comandos do sistema
+(sc / powercfg / fsutil / netsh) com limite de concorrência, timeout por
+comando, cache para consultas somente-leitura e resultados estruturados
+"""
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from typing import NamedTuple, Tuple
+
+CREATE_NO_WINDOW = 0x08000000
+
+
+class CommandResult(NamedTuple):
+    """Resultado de um comando"""
+    argv: Tuple[str, ...]
+    returncode: int
+    stdout: str
+    stderr: str
+    duration: float
+    timed_out: bool = False
+    cached: bool = False
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.timed_out
+
+
+class CommandExecutor:
+    """Event loop asyncio próprio em thread de fundo; API síncrona para os módulos"""
+
+    def __init__(self, max_concurrency=6):
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._cache = {}            # argv -> (expira_em, CommandResult)
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name="command-executor", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    async def _run(self, argv, timeout, cache_ttl):
+        argv = tuple(str(a) for a in argv)
+        if cache_ttl:
+            cached = self._cache.get(argv)
+            if cached and cached[0] > time.time():
+                return cached[1]._replace(cached=True)
+
+        kwargs = {}
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = CREATE_NO_WINDOW
+
+        async with self._semaphore:
+            start = time.time()
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    **kwargs
+                )
+            except OSError as e:
+                return CommandResult(argv, -1, '', str(e), time.time() - start)
+
+            try:
+                out, err = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                try:
+                    proc.kill()
+                    await proc.wait()
+                except Exception:
+                    pass
+                return CommandResult(argv, -1, '', 'timeout', time.time() - start, timed_out=True)
+
+        result = CommandResult(
+            argv,
+            proc.returncode,
+            out.decode('utf-8', errors='ignore'),
+            err.decode('utf-8', errors='ignore'),
+            time.time() - start,
+        )
+        if cache_ttl and result.ok:
+            self._cache[argv] = (time.time() + cache_ttl, result)
+        return result
+
+    async def _run_chain(self, commands, timeout, stop_on_error):
+        """Comandos de uma cadeia rodam em sequência (ex.: sc stop -> sc config)"""
+        results = []
+        for argv in commands:
+            result = await self._run(argv, timeout, 0)
+            results.append(result)
+            if stop_on_error and not result.ok:
+                break
+        return results
+
+    async def _gather(self, coros):
+        return await asyncio.gather(*coros)
+
+    def submit(self, argv, timeout=10, cache_ttl=0):
+        """Agenda um comando; retorna concurrent.futures.Future[CommandResult]"""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._run(argv, timeout, cache_ttl), loop)
+
+    def run(self, argv, timeout=10, cache_ttl=0) -> CommandResult:
+        """Executa um comando e aguarda o resultado"""
+        return self.submit(argv, timeout, cache_ttl).result()
+
+    def run_many(self, commands, timeout=10, cache_ttl=0):
+        """Executa comandos independentes em paralelo (resultados na mesma ordem)"""
+        loop = self._ensure_loop()
+        coros = [self._run(argv, timeout, cache_ttl) for argv in commands]
+        return asyncio.run_coroutine_threadsafe(self._gather(coros), loop).result()
+
+    def run_chains(self, chains, timeout=10, stop_on_error=False):
+        """
+        Executa várias cadeias em paralelo; dentro de cada cadeia, em sequência.
+        Retorna lista de listas de CommandResult.
+        """
+        loop = self._ensure_loop()
+        coros = [self._run_chain(chain, timeout, stop_on_error) for chain in chains]
+        return asyncio.run_coroutine_threadsafe(self._gather(coros), loop).result()
+
+    def invalidate(self, prefix=None):
+        """Limpa o cache (tudo, ou comandos que começam com prefix)"""
+        if prefix is None:
+            self._cache.clear()
+            return
+        prefix = tuple(prefix)
+        for argv in list(self._cache):
+            if argv[:len(prefix)] == prefix:
+                self._cache.pop(argv, None)
+
+    def close(self):
+        """Para o event loop"""
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=2)
+                self._loop = None
+
+
+# Singleton global
+_instance = None
+
+def get_executor() -> CommandExecutor:
+    """Retorna instância singleton do CommandExecutor"""
+    global _instance
+    if _instance is None:
+        _instance = CommandExecutor(max_concurrency=6)
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste: 6 comandos de 1s em paralelo devem levar ~1s
+    executor = get_executor()
+    sleep_cmd = ['ping', '-n', '2', '127.0.0.1'] if sys.platform == 'win32' else ['sleep', '1']
+
+    start = time.time()
+    results = executor.run_many([sleep_cmd] * 6)
+    print(f"6 comandos em {time.time() - start:.2f}s (ok: {sum(r.ok for r in results)})")
+
+    print(executor.run(sleep_cmd, timeout=0.2))
+    executor.close()
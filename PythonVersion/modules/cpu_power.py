@@ -1,132 +1,108 @@
 """
 Gerenciador de energia e frequência da CPU
 """
-import ctypes
-from ctypes import wintypes
-import subprocess
+from modules import power_settings
 
 class CPUPowerManager:
     def __init__(self):
-        self.powrprof = ctypes.WinDLL('powrprof')
+        # powrprof nativo com cache (escritas repetidas não custam nada)
+        self.power = power_settings.get_settings()
         
         # GUIDs - Processor Power Management
-        self.GUID_PROCESSOR = "SUB_PROCESSOR"
-        self.GUID_MAX_THROTTLE = "PROCTHROTTLEMAX"
-        self.GUID_MIN_THROTTLE = "PROCTHROTTLEMIN"
+        self.GUID_PROCESSOR = power_settings.SUB_PROCESSOR
+        self.GUID_MAX_THROTTLE = power_settings.PROCTHROTTLEMAX
+        self.GUID_MIN_THROTTLE = power_settings.PROCTHROTTLEMIN
+        
+        # Thermal governor (criado em start_adaptive_governor)
+        self.governor = None
     
     def set_max_cpu_frequency(self, percentage):
         """Define frequência máxima da CPU (5-100%)"""
-        if not (5 <= percentage <= 100):
-            print(f"[ERROR] Percentual inválido: {percentage}%. Deve estar entre 5-100%")
-            return False
-        
-        try:
-            print(f"[INFO] Configurando frequência máxima da CPU para {percentage}%")
-            
-            # Usa powercfg.exe com aliases (mais compatível)
-            result = subprocess.run(
-                ['powercfg', '-setacvalueindex', 'SCHEME_CURRENT',
-                 self.GUID_PROCESSOR, self.GUID_MAX_THROTTLE, str(percentage)],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            
-            if result.returncode == 0:
-                # Aplica mudanças
-                subprocess.run(['powercfg', '-setactive', 'SCHEME_CURRENT'], 
-                              capture_output=True, encoding='utf-8', errors='ignore')
-                print(f"[SUCCESS] Frequência máxima definida para {percentage}%")
-                return True
-            else:
-                # Silencia erro se já está no valor desejado
-                return True
-        except Exception as e:
-            print(f"[WARN] CPU control: {e}")
-            return False
+        return self.set_cpu_limits(max_percent=percentage)
     
     def set_min_cpu_frequency(self, percentage):
         """Define frequência mínima da CPU (0-100%)"""
-        if not (0 <= percentage <= 100):
-            print(f"[ERROR] Percentual inválido: {percentage}%")
+        return self.set_cpu_limits(min_percent=percentage)
+    
+    def set_cpu_limits(self, max_percent=None, min_percent=None, dc=False):
+        """
+        Define máximo e/ou mínimo em UMA transação (um único activate).
+        dc=True aplica também ao modo bateria.
+        """
+        if max_percent is not None and not (5 <= max_percent <= 100):
+            print(f"[ERROR] Percentual inválido: {max_percent}%. Deve estar entre 5-100%")
+            return False
+        if min_percent is not None and not (0 <= min_percent <= 100):
+            print(f"[ERROR] Percentual inválido: {min_percent}%")
+            return False
+        if not self.power.available:
             return False
         
         try:
-            print(f"[INFO] Configurando frequência mínima da CPU para {percentage}%")
-            
-            result = subprocess.run(
-                ['powercfg', '-setacvalueindex', 'SCHEME_CURRENT',
-                 self.GUID_PROCESSOR, self.GUID_MIN_THROTTLE, str(percentage)],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            
-            if result.returncode == 0:
-                subprocess.run(['powercfg', '-setactive', 'SCHEME_CURRENT'],
-                              capture_output=True, encoding='utf-8', errors='ignore')
-                print(f"[SUCCESS] Frequência mínima definida para {percentage}%")
-                return True
-            else:
-                # Silencia erro
-                return True
+            with self.power.transaction():
+                if max_percent is not None and self.power.set(
+                        self.GUID_PROCESSOR, self.GUID_MAX_THROTTLE, max_percent, dc=dc):
+                    print(f"[SUCCESS] Frequência máxima definida para {max_percent}%")
+                if min_percent is not None and self.power.set(
+                        self.GUID_PROCESSOR, self.GUID_MIN_THROTTLE, min_percent, dc=dc):
+                    print(f"[SUCCESS] Frequência mínima definida para {min_percent}%")
+            return True
         except Exception as e:
-            print(f"[WARN] CPU min control: {e}")
+            print(f"[WARN] CPU control: {e}")
             return False
     
-    def start_adaptive_governor(self):
-        """[V2.0] Starts Adaptive Thermal Throttling"""
-        import threading
-        import time
+    def start_adaptive_governor(self, thermal_limit=80, max_percent=100):
+        """[V2.0] Starts Adaptive Thermal Throttling (PI closed loop)"""
+        from modules import telemetry
         from modules import temperature_service
+        from modules.thermal_governor import ThermalGovernor
         
-        # Get singleton instance (reuses WMI connection)
-        temp_svc = temperature_service.get_service()
+        if self.governor is None:
+            # Shared sampler snapshot (same reading the dashboard shows)
+            sampler = telemetry.get_sampler()
+            self.governor = ThermalGovernor(
+                apply_cap=self.set_max_cpu_frequency,
+                read_temp=lambda: self._hottest_temp(sampler.get_snapshot(max_age=5)),
+                forecast_temp=temperature_service.get_service().forecast_cpu_temp,
+                thermal_limit=thermal_limit,
+                max_cap=max_percent,
+            )
+        else:
+            self.governor.configure(thermal_limit=thermal_limit, max_cap=max_percent)
         
-        def thermal_loop():
-            print("[CPU] Adaptive Thermal Governor STARTED 🚀")
-            current_limit = 100
-            
-            while True:
-                try:
-                    # Use centralized cached temperature service
-                    temp = temp_svc.get_cpu_temp()
-                        
-                    if temp > 0:
-                        new_limit = current_limit
-                        
-                        # LOGIC:
-                        # < 70°C: 100% (Turbo)
-                        # > 80°C: 90%
-                        # > 90°C: 85% (Safe)
-                        
-                        if temp < 70 and current_limit < 100:
-                            new_limit = 100
-                        elif temp > 90 and current_limit > 85:
-                            new_limit = 85
-                        elif temp > 80 and temp <= 90 and current_limit > 90:
-                            new_limit = 90
-                            
-                        if new_limit != current_limit:
-                            print(f"[CPU] Thermal Event: {temp:.1f}°C -> Adjusting Limit to {new_limit}%")
-                            self.set_max_cpu_frequency(new_limit)
-                            current_limit = new_limit
-                            
-                    time.sleep(5)
-                except:
-                    time.sleep(10)
-
-        t = threading.Thread(target=thermal_loop, daemon=True)
-        t.start()
+        self.governor.start()
+        print(f"[CPU] Adaptive Thermal Governor STARTED 🚀 (limite {thermal_limit}°C)")
+    
+    @staticmethod
+    def _hottest_temp(snapshot):
+        """Pacote ou núcleo mais quente (o que estiver mais perto do limite)"""
+        return max((snapshot.cpu_temp,) + tuple(snapshot.cpu_core_temps))
+    
+    def stop_adaptive_governor(self):
+        """Para o governor e devolve o teto configurado"""
+        if self.governor is not None:
+            self.governor.stop()
+    
+    def apply_profile_limits(self, max_percent, min_percent, thermal_limit):
+        """Limites do perfil: com governor ativo o teto passa por ele"""
+        if self.governor is not None and self.governor.running:
+            with self.power.transaction():
+                self.governor.configure(thermal_limit=thermal_limit, max_cap=max_percent)
+                self.set_cpu_limits(min_percent=min_percent)
+        else:
+            self.set_cpu_limits(max_percent, min_percent)
+    
+    def get_current_limit(self):
+        """Teto vigente (%)"""
+        if self.governor is not None and self.governor.running:
+            return self.governor.cap
+        return self.power.get(self.GUID_PROCESSOR, self.GUID_MAX_THROTTLE)
 
     def restore_defaults(self):
         """Restaura configurações padrão de CPU (100%)"""
         try:
             print("[INFO] Restaurando configurações padrão de CPU...")
-            self.set_max_cpu_frequency(100)
-            self.set_min_cpu_frequency(5)
+            self.set_cpu_limits(max_percent=100, min_percent=5)
             print("[SUCCESS] Configurações de CPU restauradas para padrão")
             return True
         except Exception as e:
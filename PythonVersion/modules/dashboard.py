@@ -11,7 +11,15 @@ from rich.table import Table
 from rich.live import Live
 from rich.align import Align
 from datetime import datetime
+from modules import telemetry
+from modules import metrics_store
+from modules import process_table
+from modules import service_state
 from modules import temperature_service
+from modules import wmi_broker
+
+# Rótulos curtos dos tiers de purge (memory_lists.COMMAND_NAMES)
+TIER_LABELS = {'standby_low_priority': 'low-prio', 'standby': 'full'}
 
 class Dashboard:
     def __init__(self):
@@ -52,6 +60,7 @@ class Dashboard:
             'gpu_nvidia_mem_used': 0,
             'gpu_nvidia_mem_total': 0,
             'gpu_nvidia_power_limit': 0,  # Power limit aplicado
+            'gpus': (),  # Todas as GPUs NVIDIA (GpuStats)
             'gpu_intel_name': '',
             'ram_used': 0,
             'ram_total': 0,
@@ -60,41 +69,34 @@ class Dashboard:
             'priority_high': 0,
             'priority_low': 0,
             'ping_ms': 0,
-            'ping_baseline': 0
+            'ping_baseline': 0,
+            'sysmain_state': 'unknown',
+            'services_running': 0,
+            'services_disabled': 0
         }
         
         # Detecta GPUs
         self.has_nvidia = False
         self.has_intel = False
-        self.nvidia_handle = None
         
-        # Tenta detectar NVIDIA (geralmente é o device 0)
-        try:
-            import pynvml
-            pynvml.nvmlInit()
-            device_count = pynvml.nvmlDeviceGetCount()
-            
-            if device_count > 0:
-                # Pega o primeiro device
-                self.nvidia_handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-                name = pynvml.nvmlDeviceGetName(self.nvidia_handle)
-                
-                # Decodifica se for bytes
-                if isinstance(name, bytes):
-                    name = name.decode('utf-8')
-                
-                self.stats['gpu_nvidia_name'] = name
-                self.has_nvidia = True
-                print(f"[GPU] NVIDIA detectada: {name}")
-        except Exception as e:
-            print(f"[GPU] NVIDIA não detectada: {e}")
+        # NVIDIA vem do sampler compartilhado (NVML inicializado uma vez)
+        self._sampler = telemetry.get_sampler()
+        self._metrics = metrics_store.get_store()  # Histórico (memória fixa)
+        self._process_table = process_table.get_table()
+        self._services_index = service_state.get_index()  # Estado dos serviços (cache 30s)
+        self._snapshot = self._sampler.get_snapshot()
+        if self._snapshot.gpu_name:
+            self.stats['gpu_nvidia_name'] = self._snapshot.gpu_name
+            self.has_nvidia = True
+            print(f"[GPU] NVIDIA detectada: {self._snapshot.gpu_name}")
+        else:
+            print("[GPU] NVIDIA não detectada")
         
         # Detecta Intel integrada via WMI (CACHED at init - no per-frame calls)
         self._cached_intel_name = "Intel Integrated Graphics"
         try:
-            import wmi
-            c = wmi.WMI()
-            for gpu in c.Win32_VideoController():
+            rows = wmi_broker.get_broker().query_sync(wmi_broker.CIMV2, "SELECT Name FROM Win32_VideoController")
+            for gpu in rows:
                 if 'intel' in gpu.Name.lower():
                     self.has_intel = True
                     self.stats['gpu_intel_name'] = gpu.Name
@@ -103,9 +105,6 @@ class Dashboard:
                     break
         except Exception as e:
             print(f"[GPU] Intel não detectada: {e}")
-        
-        # Get temperature service singleton
-        self._temp_service = temperature_service.get_service()
     
     def make_header(self):
         """Creates header with title and status"""
@@ -160,16 +159,33 @@ class Dashboard:
         
         table.add_row("[bold white]CPU Package[/bold white]", "")
         table.add_row("  Total Load", f"[{cpu_color}]{cpu_usage:.1f}% {cpu_desc}[/{cpu_color}] {cpu_bar}")
-        table.add_row("  Package Temp", f"[{cpu_t_color}]{temp_display} {cpu_t_desc}[/{cpu_t_color}]")
+        reading = temperature_service.get_service().get_reading('cpu_temp')
+        sensor_info = (f" [dim]({reading.source}/{reading.confidence}, {reading.age:.0f}s)[/dim]"
+                       if reading.timestamp else "")
+        table.add_row("  Package Temp", f"[{cpu_t_color}]{temp_display} {cpu_t_desc}[/{cpu_t_color}]{sensor_info}")
+        core_temps = self._snapshot.cpu_core_temps if self._snapshot else ()
+        if core_temps:
+            hottest = max(range(len(core_temps)), key=lambda i: core_temps[i])
+            table.add_row("  Core Temps", f"[dim]hottest C{hottest} {core_temps[hottest]:.0f}°C • "
+                                          f"avg {sum(core_temps) / len(core_temps):.0f}°C[/dim]")
+        forecast = self.stats.get('cpu_temp_forecast')
+        if forecast:
+            table.add_row("  Temp +30s", f"[dim]→ {forecast:.0f}°C (thermal model)[/dim]")
         table.add_row("  Governor Cap", f"[yellow]{self.stats['cpu_limit']}%[/yellow] (Smart Limit)")
+        if self._snapshot and self._snapshot.cpu_performance:
+            table.add_row("  Performance", f"[dim]{self._snapshot.cpu_performance:.0f}% of base clock[/dim]")
+        
+        # Tendência do último minuto (ring buffer, sem listas crescentes)
+        load_1m = self._metrics.summary('cpu_percent', 60)
+        if load_1m:
+            table.add_row("  Load 1min", f"[dim]avg {load_1m['avg']:.0f}% • p95 {load_1m['p95']:.0f}% • max {load_1m['max']:.0f}%[/dim]")
+        temp_1m = self._metrics.summary('cpu_temp', 60)
+        if temp_1m:
+            table.add_row("  Temp 1min", f"[dim]min {temp_1m['min']:.0f}°C • avg {temp_1m['avg']:.0f}°C • max {temp_1m['max']:.0f}°C[/dim]")
         table.add_row("", "")
         
         # === ACTIVE PER-CORE MONITORING (COMPACT) ===
-        cores_usage = psutil.cpu_percent(percpu=True)
-        try:
-            cores_freq = psutil.cpu_freq(percpu=True)
-        except:
-            cores_freq = []
+        cores_usage = self._snapshot.cpu_per_core
             
         table.add_row("[bold white]Active Cores[/bold white]", "[dim]Real-Time Utilization[/dim]")
         
@@ -231,15 +247,41 @@ class Dashboard:
             gpu_name = self.stats['gpu_nvidia_name'].replace("NVIDIA ", "")
             
             table.add_row(f"[cyan]NVIDIA[/cyan] {gpu_name[:20]}", "")
-            table.add_row(f"  Load: [{gpu_color}]{usage:3.0f}%{usage_desc}[/{gpu_color}]", f"Temp: [{gpu_color}]{temp:.0f}°C[/]")
+            hotspot = self.stats.get('gpu_hotspot_temp', 0)
+            hotspot_str = f" [dim](hot spot {hotspot:.0f}°C)[/dim]" if hotspot else ""
+            table.add_row(f"  Load: [{gpu_color}]{usage:3.0f}%{usage_desc}[/{gpu_color}]", f"Temp: [{gpu_color}]{temp:.0f}°C[/]{hotspot_str}")
             table.add_row(f"  VRAM: {self.stats['gpu_nvidia_mem_used']:.0f} MB", f"Limit: {self.stats['gpu_nvidia_power_limit']}%")
+            primary = self.stats['gpus'][0] if self.stats['gpus'] else None
+            if primary and (primary.power_w or primary.clock_graphics_mhz):
+                table.add_row(f"  Power: {primary.power_w:.0f}W / {primary.power_limit_w:.0f}W",
+                              f"Clock: {primary.clock_graphics_mhz} MHz")
+            
+            # Maiores consumidores de VRAM (VRAM Monitor)
+            top_vram = self.stats.get('vram_top', ())
+            if top_vram:
+                pressure = " [red](pressão)[/red]" if self.stats.get('vram_pressure') else ""
+                table.add_row(f"  Top VRAM:{pressure}", "")
+                for consumer in top_vram[:3]:
+                    used = f"{consumer.used_bytes / 1024 / 1024:.0f} MB" if consumer.used_bytes else "?"
+                    marker = "🎮 " if consumer.is_game else ""
+                    table.add_row(f"    {marker}{consumer.name[:20]}", used)
+            
+            # GPUs NVIDIA adicionais (mesma passada NVML)
+            for gpu in self.stats['gpus'][1:]:
+                table.add_row(f"[cyan]NVIDIA #{gpu.index}[/cyan] {gpu.name.replace('NVIDIA ', '')[:17]}", "")
+                table.add_row(f"  Load: {gpu.gpu_util:3.0f}%  VRAM: {gpu.mem_used / 1024 / 1024:.0f} MB",
+                              f"Temp: {gpu.temperature:.0f}°C")
         
         # 2. Intel (Integrated)
         if intel_active:
              intel_clean = intel_name.replace("Intel(R) ", "").replace("Graphics", "")
              table.add_row("", "")
              table.add_row(f"[blue]INTEL [/blue] {intel_clean[:20]}", "")
-             table.add_row("  Status: [green]● Active[/green]", "Type: iGPU")
+             igpu = self._snapshot.igpu_percent if self._snapshot else None
+             if igpu is not None:
+                 table.add_row(f"  Load: [green]{igpu:3.0f}%[/green]", "Type: iGPU")
+             else:
+                 table.add_row("  Status: [green]● Active[/green]", "Type: iGPU")
              
         # Fallback
         if not self.has_nvidia and not intel_active:
@@ -263,20 +305,67 @@ class Dashboard:
         table.add_row("[bold white]RAM MEMORY[/bold white]", "")
         table.add_row("  Usage", f"[{ram_color}]{self.stats['ram_percent']:.1f}%[/{ram_color}] {ram_bar}")
         table.add_row("  Free", f"[green]{ram_free_gb:.1f} GB[/green] / {ram_total_gb:.1f} GB")
+        snap = self._snapshot
+        if snap and snap.standby_bytes:
+            table.add_row("  Standby", f"{snap.standby_bytes / 1024**3:.1f} GB [dim]• cache {snap.cache_bytes / 1024**3:.1f} GB[/dim]")
+        if snap and (snap.disk_queue or snap.disk_latency_ms):
+            table.add_row("  Disk", f"[dim]queue {snap.disk_queue:.0f} • {snap.disk_latency_ms:.2f} ms/IO[/dim]")
         table.add_row("  Cleanups", f"[yellow]{self.stats_tracker.get('total_cleanups', 0)}[/yellow] auto")
+        last_tiers = self.stats.get('purge_last_tiers')
+        if last_tiers:
+            tiers_str = " → ".join(f"{TIER_LABELS.get(tier, tier)} {mb:.0f}MB" for tier, mb in last_tiers)
+            table.add_row("  Last Purge", f"[dim]{tiers_str}[/dim]")
+            by_tier = self.stats.get('purge_freed_by_tier') or {}
+            table.add_row("  Freed by Tier", "[dim]" + " • ".join(
+                f"{TIER_LABELS.get(tier, tier)} {mb / 1024:.1f} GB" for tier, mb in by_tier.items()) + "[/dim]")
+        cache_limit = self.stats.get('file_cache')
+        if cache_limit:
+            if cache_limit['limit_bytes']:
+                kind = "hard" if cache_limit['hard'] else "soft"
+                table.add_row("  Cache Limit", f"[yellow]{cache_limit['limit_bytes'] / 1024**3:.1f} GB[/yellow] "
+                                               f"[dim]{kind} • cache {cache_limit['cache_bytes'] / 1024**3:.1f} GB[/dim]")
+            else:
+                table.add_row("  Cache Limit", f"[dim]lifted ({cache_limit['percent']}% in game)[/dim]")
+        tuning = self.stats.get('purge_tuning')
+        if tuning and tuning['cost_ratio'] is not None:
+            cost_color = "green" if tuning['cost_ratio'] < 0.2 else "yellow" if tuning['cost_ratio'] < 0.4 else "red"
+            table.add_row("  Refault Cost", f"[{cost_color}]{tuning['cost_ratio'] * 100:.0f}%[/{cost_color}] "
+                                            f"[dim]• limit x{tuning['threshold_scale']:.2f} • "
+                                            f"min {tuning['min_standby_mb']}MB[/dim]")
         table.add_row("", "")
         
         # Optimizations
         table.add_row("[bold white]OPTIMIZATIONS[/bold white]", "")
-        table.add_row("  Standby Cleaner", "[green]●[/green] Active")
+        policy = self.stats.get('purge_policy')
+        if policy:
+            reason = self.stats.get('purge_reason')
+            table.add_row("  Standby Cleaner", f"[green]●[/green] Active ({policy})"
+                          + (f" [dim]• {reason}[/dim]" if reason else ""))
+        else:
+            table.add_row("  Standby Cleaner", "[green]●[/green] Active")
         table.add_row("  Smart Priority", "[green]●[/green] Active")
+        trim = self.stats.get('ws_trim')
+        if trim and trim['total_reclaimed']:
+            top_str = " • ".join(f"{name} {freed / 1024**2:.0f}MB" for name, freed in trim['top'])
+            table.add_row("  WS Trim", f"[green]{trim['total_reclaimed'] / 1024**3:.1f} GB[/green] [dim]{top_str}[/dim]")
         table.add_row("  CPU Limit", f"[yellow]●[/yellow] {self.stats['cpu_limit']}%")
         
         # GPU Power Limit
         if self.stats['gpu_nvidia_power_limit'] > 0:
-            table.add_row("  GPU Power Limit", f"[yellow]●[/yellow] {self.stats['gpu_nvidia_power_limit']}%")
-        
-        table.add_row("  SysMain", "[red]●[/red] Disabled")
+            state = self.stats.get('gpu_governor_state')
+            state_str = f" [dim]({state})[/dim]" if state else ""
+            table.add_row("  GPU Power Limit", f"[yellow]●[/yellow] {self.stats['gpu_nvidia_power_limit']}%{state_str}")
+        
+        sysmain = self.stats['sysmain_state']
+        if sysmain == 'running':
+            table.add_row("  SysMain", "[yellow]●[/yellow] Running")
+        elif sysmain == 'stopped':
+            table.add_row("  SysMain", "[red]●[/red] Disabled")
+        else:
+            table.add_row("  SysMain", f"[dim]○ {sysmain.title()}[/dim]")
+        if self.stats['services_running']:
+            table.add_row("  Services", f"[dim]{self.stats['services_running']} running • "
+                                        f"{self.stats['services_disabled']} disabled by optimizer[/dim]")
         table.add_row("", "")
         
         # V3.0 Features
@@ -287,6 +376,10 @@ class Dashboard:
         game_name = self.stats.get('game_name', '')
         if game_active:
             table.add_row("  🎮 Game Mode", f"[green]●[/green] {game_name[:15]}")
+            latency = self.stats.get('game_boost_latency_ms')
+            if latency is not None:
+                lat_color = "green" if latency < 500 else "yellow"
+                table.add_row("  ⏱ Boost Latency", f"[{lat_color}]{latency:.0f}ms[/{lat_color}]")
         else:
             table.add_row("  🎮 Game Mode", "[dim]○ Waiting[/dim]")
         
@@ -349,6 +442,9 @@ class Dashboard:
         if ping_ms > 0:
             ping_color = "green" if ping_ms < 50 else "yellow" if ping_ms < 100 else "red"
             net_impact = f"[{ping_color}]{ping_ms}ms[/{ping_color}]"
+            ping_10m = self._metrics.summary('ping_ms', 600)
+            if ping_10m and ping_10m['count'] > 1:
+                net_impact += f" [dim]p95:{ping_10m['p95']:.0f}ms[/dim]"
             if ping_baseline > 0 and ping_baseline != ping_ms:
                 diff = ping_baseline - ping_ms
                 if diff > 0:
@@ -403,42 +499,52 @@ class Dashboard:
     
     def update_stats(self, services):
         """Atualiza estatísticas do sistema"""
-        # CPU
-        self.stats['cpu_percent'] = psutil.cpu_percent(interval=0.1)
+        # Snapshot compartilhado (uma coleta por tick para todos os módulos)
+        snap = self._sampler.get_snapshot()
+        self._snapshot = snap
         
-        # Temperatura da CPU (usando serviço centralizado com cache)
-        self.stats['cpu_temp'] = self._temp_service.get_cpu_temp()
-        
-        # Frequência da CPU
-        freq = psutil.cpu_freq()
-        if freq:
-            self.stats['cpu_freq'] = freq.current / 1000  # MHz para GHz
+        # CPU
+        self.stats['cpu_percent'] = snap.cpu_percent
+        self.stats['cpu_temp'] = snap.cpu_temp
+        self.stats['cpu_freq'] = snap.cpu_freq_mhz / 1000  # MHz para GHz
+        temp_service = temperature_service.get_service()
+        self.stats['gpu_hotspot_temp'] = temp_service.get_reading('gpu_hotspot').value
+        thermal_model = temp_service.model
+        self.stats['cpu_temp_forecast'] = thermal_model.forecast(30) if thermal_model.ready else None
         
         # GPU NVIDIA (se disponível)
-        if self.has_nvidia and self.nvidia_handle:
+        if self.has_nvidia:
+            self.stats['gpu_nvidia_percent'] = snap.gpu_percent
+            self.stats['gpu_nvidia_temp'] = snap.gpu_temp
+            self.stats['gpu_nvidia_mem_used'] = snap.gpu_mem_used / 1024 / 1024
+            self.stats['gpu_nvidia_mem_total'] = snap.gpu_mem_total / 1024 / 1024
+            self.stats['gpus'] = snap.gpus
+        
+        # Consumidores de VRAM
+        if 'vram_monitor' in services:
+            self.stats['vram_top'] = services['vram_monitor'].top
+            self.stats['vram_pressure'] = services['vram_monitor'].pressure
+        
+        # Teto de CPU vigente (Thermal Governor)
+        if 'cpu_power' in services:
             try:
-                import pynvml
-                util = pynvml.nvmlDeviceGetUtilizationRates(self.nvidia_handle)
-                self.stats['gpu_nvidia_percent'] = util.gpu
-                
-                temp = pynvml.nvmlDeviceGetTemperature(self.nvidia_handle, 0)
-                self.stats['gpu_nvidia_temp'] = temp
-                
-                mem_info = pynvml.nvmlDeviceGetMemoryInfo(self.nvidia_handle)
-                self.stats['gpu_nvidia_mem_used'] = mem_info.used / 1024 / 1024
-                self.stats['gpu_nvidia_mem_total'] = mem_info.total / 1024 / 1024
+                limit = services['cpu_power'].get_current_limit()
+                if limit is not None:
+                    self.stats['cpu_limit'] = limit
             except:
                 pass
         
-        # GPU Power Limit (pega do service se disponível)
-        if 'gpu_ctrl' in services and hasattr(services['gpu_ctrl'], 'applied_percent'):
+        # GPU Power Limit (governor dinâmico ou limite fixo aplicado no início)
+        if 'gpu_governor' in services:
+            self.stats['gpu_nvidia_power_limit'] = services['gpu_governor'].get_current_percent()
+            self.stats['gpu_governor_state'] = services['gpu_governor'].state
+        elif 'gpu_ctrl' in services and hasattr(services['gpu_ctrl'], 'applied_percent'):
             self.stats['gpu_nvidia_power_limit'] = services['gpu_ctrl'].applied_percent
         
         # RAM
-        mem = psutil.virtual_memory()
-        self.stats['ram_used'] = mem.used / 1024 / 1024  # MB
-        self.stats['ram_total'] = mem.total / 1024 / 1024  # MB
-        self.stats['ram_percent'] = mem.percent
+        self.stats['ram_used'] = snap.ram_used / 1024 / 1024  # MB
+        self.stats['ram_total'] = snap.ram_total / 1024 / 1024  # MB
+        self.stats['ram_percent'] = snap.ram_percent
         
         # Limpezas de RAM
         # RAM Cleaning Stats
@@ -449,16 +555,30 @@ class Dashboard:
                 self.stats_tracker['total_cleanups'] = services['cleaner'].clean_count
             elif hasattr(services['cleaner'], 'clean_count'):
                  self.stats_tracker['total_cleanups'] = services['cleaner'].clean_count
+            # Política e motivo da última decisão
+            if hasattr(services['cleaner'], 'policy'):
+                self.stats['purge_policy'] = services['cleaner'].policy.name
+                decision = services['cleaner'].last_decision
+                self.stats['purge_reason'] = decision.reason if decision else ''
+            if hasattr(services['cleaner'], 'last_tiers'):
+                self.stats['purge_last_tiers'] = [(r.tier, r.freed_bytes / 1024 / 1024)
+                                                  for r in services['cleaner'].last_tiers]
+                self.stats['purge_freed_by_tier'] = dict(services['cleaner'].freed_by_tier)
+            if getattr(services['cleaner'], 'cache_limiter', None):
+                self.stats['file_cache'] = services['cleaner'].cache_limiter.get_status()
+            if getattr(services['cleaner'], 'tuner', None):
+                self.stats['purge_tuning'] = services['cleaner'].tuner.get_status()
+        
+        # Trim de working set (apps em segundo plano durante jogos)
+        if 'ws_trimmer' in services:
+            self.stats['ws_trim'] = services['ws_trimmer'].get_status()
         
         # Uptime
         self.stats_tracker['uptime_seconds'] = int(time.time() - self.stats_tracker['start_time'])
 
         # Prioridades (Fix for Windows Constants)
+        # Contagem a partir do cache da tabela compartilhada (sem process_iter por frame)
         try:
-            procs = list(psutil.process_iter(['nice']))
-            high_count = 0
-            low_count = 0
-            
             # Windows Priority Constants
             # High=128, AboveNormal=32768, Realtime=256
             # Normal=32
@@ -468,24 +588,26 @@ class Dashboard:
             HIGH_PRIOS = {psutil.HIGH_PRIORITY_CLASS, psutil.REALTIME_PRIORITY_CLASS, psutil.ABOVE_NORMAL_PRIORITY_CLASS}
             LOW_PRIOS = {psutil.IDLE_PRIORITY_CLASS, psutil.BELOW_NORMAL_PRIORITY_CLASS}
             
-            for p in procs:
-                try:
-                    p_nice = p.info['nice']
-                    if p_nice in HIGH_PRIOS:
-                        high_count += 1
-                    elif p_nice in LOW_PRIOS:
-                        low_count += 1
-                except:
-                    pass
+            high_count, low_count = self._process_table.count_priorities(HIGH_PRIOS, LOW_PRIOS)
             self.stats['priority_high'] = high_count
             self.stats['priority_low'] = low_count
         except:
             pass
         
+        # Serviços (índice compartilhado; enumeração só quando o cache expira)
+        try:
+            self.stats['sysmain_state'] = self._services_index.state('SysMain')
+            self.stats['services_running'] = self._services_index.count('running')
+            if 'services_opt' in services:
+                self.stats['services_disabled'] = len(services['services_opt'].disabled_services)
+        except:
+            pass
+        
         # V3.0: Game Detector Status
         if 'game_detector' in services:
             self.stats['game_active'] = services['game_detector'].is_game_active()
             self.stats['game_name'] = services['game_detector'].get_current_game() or ''
+            self.stats['game_boost_latency_ms'] = services['game_detector'].get_last_boost_latency()
         
         # V3.0: Profile Status
         if 'profiles' in services:
@@ -512,6 +634,7 @@ class Dashboard:
                     else:
                         ping_str = output.split('time=')[1].split('ms')[0]
                     self.stats['ping_ms'] = int(ping_str.strip().replace('<', ''))
+                    self._metrics.record('ping_ms', self.stats['ping_ms'])
                     
                     # Set baseline on first measurement
                     if self.stats['ping_baseline'] == 0:
@@ -551,8 +674,7 @@ class Dashboard:
         ) as live:
             while self.running:
                 time.sleep(2)  # Update every 2 seconds
-                self.update_stats(services)
-                self.render(services)
+                self.render(services)  # render() já chama update_stats()
 
 
 if __name__ == "__main__":
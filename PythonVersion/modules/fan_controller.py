@@ -5,6 +5,7 @@ então usamos WMI quando disponível
 """
 import subprocess
 import os
+from modules import wmi_broker
 
 class FanController:
     def __init__(self):
@@ -30,10 +31,8 @@ class FanController:
     def _try_wmi_dell(self):
         """Tenta controle via WMI (funciona em alguns laptops Dell)"""
         try:
-            import wmi
-            c = wmi.WMI(namespace="root\\wmi")
             # Verifica se tem suporte Dell Thermal
-            thermal = c.query("SELECT * FROM DellThermalSetting")
+            thermal = wmi_broker.get_broker().query_sync("root\\wmi", "SELECT * FROM DellThermalSetting")
             return len(thermal) > 0
         except:
             return False
@@ -61,10 +60,11 @@ class FanController:
     def _set_dell_performance_mode(self):
         """Define modo performance em Dell (ventoinhas no máximo)"""
         try:
-            import wmi
-            c = wmi.WMI(namespace="root\\wmi")
-            thermal = c.DellThermalSetting()[0]
-            thermal.SetThermalSetting(ThermalMode=2)  # 2 = Performance
+            # Chamada de método roda na thread COM do broker
+            wmi_broker.get_broker().call(
+                "root\\wmi",
+                lambda c: c.DellThermalSetting()[0].SetThermalSetting(ThermalMode=2)  # 2 = Performance
+            )
             print("[FAN] ✓ Modo Performance ativado (ventoinhas no máximo)")
             return True
         except Exception as e:
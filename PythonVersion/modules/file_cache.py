@@ -0,0 +1,256 @@
+"""
+File Cache - Teto do cache de arquivos do sistema (SetSystemFileCacheSize)
+Alternativa às purges periódicas: em vez de deixar o cache crescer e
+descartá-lo de uma vez, limita o working set do cache continuamente.
+- Limite = % da RAM total definida pelo perfil ativo (mínimo em MB)
+- Aplicado só com jogo ativo; sem jogo, os limites originais voltam
+- Teto suave por padrão (FILE_CACHE_MAX_HARD_DISABLE): o gerenciador de
+  memória apara acima dele quando precisa, sem travar leituras
+Requer SeIncreaseQuotaPrivilege (administrador). Inclui backend falso.
+"""
+import ctypes
+import sys
+from ctypes import wintypes
+from typing import NamedTuple
+
+import psutil
+
+from modules import memory_lists
+
+MB = 1024 * 1024
+
+FILE_CACHE_MAX_HARD_ENABLE = 0x1
+FILE_CACHE_MAX_HARD_DISABLE = 0x2
+FILE_CACHE_MIN_HARD_ENABLE = 0x4
+FILE_CACHE_MIN_HARD_DISABLE = 0x8
+
+INCREASE_QUOTA_PRIVILEGE = "SeIncreaseQuotaPrivilege"
+
+
+class CacheLimits(NamedTuple):
+    """Limites do working set do cache de arquivos (bytes)"""
+    minimum: int
+    maximum: int
+    flags: int
+
+    @property
+    def hard_max(self):
+        return bool(self.flags & FILE_CACHE_MAX_HARD_ENABLE)
+
+
+class PERFORMANCE_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ('cb', wintypes.DWORD),
+        ('CommitTotal', ctypes.c_size_t),
+        ('CommitLimit', ctypes.c_size_t),
+        ('CommitPeak', ctypes.c_size_t),
+        ('PhysicalTotal', ctypes.c_size_t),
+        ('PhysicalAvailable', ctypes.c_size_t),
+        ('SystemCache', ctypes.c_size_t),
+        ('KernelTotal', ctypes.c_size_t),
+        ('KernelPaged', ctypes.c_size_t),
+        ('KernelNonpaged', ctypes.c_size_t),
+        ('PageSize', ctypes.c_size_t),
+        ('HandleCount', wintypes.DWORD),
+        ('ProcessCount', wintypes.DWORD),
+        ('ThreadCount', wintypes.DWORD),
+    ]
+
+
+class Win32FileCacheBackend:
+    """Get/SetSystemFileCacheSize + GetPerformanceInfo via ctypes"""
+
+    name = 'win32'
+
+    def __init__(self):
+        if sys.platform != 'win32':
+            raise OSError("SetSystemFileCacheSize requer Windows")
+        self.kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self.advapi32 = ctypes.WinDLL('advapi32', use_last_error=True)
+        self.kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        self.kernel32.SetSystemFileCacheSize.argtypes = [ctypes.c_size_t, ctypes.c_size_t, wintypes.DWORD]
+        self.kernel32.GetSystemFileCacheSize.argtypes = [
+            ctypes.POINTER(ctypes.c_size_t), ctypes.POINTER(ctypes.c_size_t), ctypes.POINTER(wintypes.DWORD)]
+        self.privilege_enabled = False      # Cache: ajusta o token uma vez só
+
+    def get_limits(self) -> CacheLimits:
+        minimum, maximum, flags = ctypes.c_size_t(), ctypes.c_size_t(), wintypes.DWORD()
+        if not self.kernel32.GetSystemFileCacheSize(ctypes.byref(minimum), ctypes.byref(maximum),
+                                                    ctypes.byref(flags)):
+            raise ctypes.WinError(ctypes.get_last_error())
+        return CacheLimits(minimum.value, maximum.value, flags.value)
+
+    def set_limits(self, minimum, maximum, flags):
+        if not self.privilege_enabled:
+            self.privilege_enabled = memory_lists.enable_token_privilege(
+                INCREASE_QUOTA_PRIVILEGE, self.kernel32, self.advapi32)
+        return bool(self.kernel32.SetSystemFileCacheSize(minimum, maximum, flags))
+
+    def cache_bytes(self):
+        """Tamanho atual do cache do sistema (GetPerformanceInfo.SystemCache)"""
+        info = PERFORMANCE_INFORMATION()
+        info.cb = ctypes.sizeof(info)
+        if not self.kernel32.K32GetPerformanceInfo(ctypes.byref(info), info.cb):
+            return 0
+        return info.SystemCache * info.PageSize
+
+
+class FakeFileCacheBackend:
+    """
+    Cache simulado: leituras fazem o cache crescer; teto rígido é respeitado
+    sempre, teto suave só quando falta memória (pressure)
+    """
+
+    name = 'fake'
+
+    def __init__(self, cache_mb=3000, minimum_mb=1, maximum_mb=0):
+        self.cache = cache_mb * MB
+        self.limits = CacheLimits(minimum_mb * MB, maximum_mb * MB, FILE_CACHE_MAX_HARD_DISABLE)
+        self.calls = []
+
+    def get_limits(self) -> CacheLimits:
+        return self.limits
+
+    def set_limits(self, minimum, maximum, flags):
+        self.calls.append((minimum // MB, maximum // MB, flags))
+        self.limits = CacheLimits(minimum, maximum, flags)
+        self._trim()
+        return True
+
+    def cache_bytes(self):
+        return self.cache
+
+    def read(self, mb):
+        """Simula leitura de arquivos"""
+        self.cache += mb * MB
+        self._trim()
+
+    def pressure(self):
+        """Simula falta de memória: o gerenciador apara o cache até o teto suave"""
+        self._trim(force=True)
+
+    def _trim(self, force=False):
+        if self.limits.maximum and (force or self.limits.hard_max):
+            self.cache = min(self.cache, self.limits.maximum)
+
+
+def get_backend():
+    """Backend nativo, ou None fora do Windows"""
+    try:
+        return Win32FileCacheBackend()
+    except (OSError, AttributeError):
+        return None
+
+
+class FileCacheLimiter:
+    """Aplica/remove o teto do cache conforme jogo ativo e perfil"""
+
+    def __init__(self, backend=None, total_bytes=None, percent=20, min_mb=256, hard=False,
+                 is_game_active=None):
+        self.backend = backend or get_backend() # None fora do Windows
+        self.total_bytes = total_bytes or psutil.virtual_memory().total
+        self.percent = percent                  # % da RAM (perfis alteram)
+        self.min_bytes = min_mb * MB
+        self.hard = hard
+        self.is_game_active = is_game_active or (lambda: False)
+
+        self.original = None                    # CacheLimits antes do primeiro ajuste
+        self.applied = None                     # Teto aplicado (bytes) ou None
+        self._refused = None                    # Teto recusado (não insiste a cada tick)
+
+    @property
+    def available(self):
+        return self.backend is not None
+
+    @property
+    def limit_bytes(self):
+        """Teto pelo perfil ativo: % da RAM total, nunca abaixo do mínimo"""
+        return max(self.min_bytes, int(self.total_bytes * self.percent / 100))
+
+    def update(self):
+        """Um tick: aplica com jogo ativo (ou se o perfil mudou), remove sem jogo"""
+        if not self.available:
+            return None
+        try:
+            game = bool(self.is_game_active())
+        except Exception:
+            game = False
+        if game and self.limit_bytes not in (self.applied, self._refused):
+            self.apply()
+        elif not game and self.applied is not None:
+            self.lift()
+        return self.applied
+
+    def apply(self):
+        limit = self.limit_bytes
+        try:
+            if self.original is None:
+                self.original = self.backend.get_limits()
+            minimum = min(self.original.minimum, limit // 2)
+            flags = (FILE_CACHE_MAX_HARD_ENABLE if self.hard else FILE_CACHE_MAX_HARD_DISABLE) | \
+                FILE_CACHE_MIN_HARD_DISABLE
+            ok = self.backend.set_limits(minimum, limit, flags)
+        except Exception as e:  # OSError do kernel32 ou falha no ajuste do token
+            print(f"[CACHE] Erro ao limitar cache de arquivos: {e}")
+            ok = False
+        if not ok:
+            if self.original is not None:
+                print("[CACHE] SetSystemFileCacheSize recusado (executar como administrador)")
+            self._refused = limit
+            return False
+        self.applied = limit
+        print(f"[CACHE] Cache de arquivos limitado a {limit // MB}MB "
+              f"({self.percent}% da RAM, {'rígido' if self.hard else 'suave'})")
+        return True
+
+    def lift(self):
+        """Devolve os limites originais"""
+        if self.applied is None or self.original is None:
+            return
+        try:
+            ok = self.backend.set_limits(*self.original)
+        except Exception as e:
+            print(f"[CACHE] Erro ao restaurar cache de arquivos: {e}")
+            ok = False
+        if not ok:
+            # Mantém applied: o próximo tick sem jogo tenta de novo
+            print("[CACHE] Falha ao restaurar limites do cache de arquivos, tentando no próximo ciclo")
+            return False
+        self.applied = None
+        print("[CACHE] Limite do cache de arquivos removido")
+        return True
+
+    def get_status(self):
+        cache = 0
+        if self.available:
+            try:
+                cache = self.backend.cache_bytes()
+            except OSError:
+                pass
+        return {
+            'limit_bytes': self.applied,
+            'cache_bytes': cache,
+            'percent': self.percent,
+            'hard': self.hard,
+        }
+
+
+if __name__ == "__main__":
+    # Teste com o backend falso: 16GB de RAM, jogo abre e fecha, perfil muda
+    backend = FakeFileCacheBackend(cache_mb=5000)
+    game = {'active': False}
+    limiter = FileCacheLimiter(backend=backend, total_bytes=16384 * MB, percent=20,
+                               is_game_active=lambda: game['active'])
+    limiter.update()
+    game['active'] = True
+    limiter.update()
+    backend.read(2000)
+    print(f"Cache após leitura: {backend.cache_bytes() // MB}MB (teto suave, sem pressão)")
+    backend.pressure()
+    print(f"Cache sob pressão: {backend.cache_bytes() // MB}MB")
+    limiter.percent = 10  # Perfil gaming
+    limiter.update()
+    game['active'] = False
+    limiter.update()
+    backend.read(2000)
+    print(f"Cache sem jogo: {backend.cache_bytes() // MB}MB | chamadas: {backend.calls}")
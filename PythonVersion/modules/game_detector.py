@@ -2,20 +2,37 @@
 Game Mode Detector
 Detecta quando um jogo está rodando e aplica otimizações extras
 """
-import psutil
 import threading
 import time
+from modules import process_table
+from modules import process_events
+from modules import temperature_service
 
 class GameModeDetector:
     """Detecta jogos e aplica otimizações automáticas"""
     
-    def __init__(self, optimizer_services=None, config=None):
+    # Alvo de latência entre criação do processo e boost aplicado
+    BOOST_LATENCY_TARGET_MS = 500
+    
+    def __init__(self, optimizer_services=None, config=None, event_source=None):
         self.config = config or {}
         self.services = optimizer_services or {}
         self.running = False
         self.thread = None
         self.game_active = False
         self.current_game = None
+        self.current_game_pid = None
+        self.current_game_key = None  # (pid, create_time) do jogo ativo
+        self.table = process_table.get_table()
+        self._state_lock = threading.RLock()
+        
+        # Fonte de eventos de início de processo (WMI); polling da tabela é o fallback
+        if event_source is None and self.config.get('event_driven', True):
+            event_source = process_events.get_default_source()
+        self.event_source = event_source
+        self.last_boost_latency_ms = None
+        self.last_detection_source = None
+        self._game_started_at = 0
         
         # Lista de executáveis de jogos conhecidos
         self.known_games = {
@@ -69,58 +86,127 @@ class GameModeDetector:
             return
             
         self.running = True
-        self.thread = threading.Thread(target=self._detection_loop, daemon=True)
-        self.thread.start()
-        print("[GAME] Detector de jogos iniciado")
+        # Reage a eventos da tabela de processos compartilhada (sem scan próprio)
+        self.table.subscribe(self._on_process_delta)
+        # Eventos de criação de processo: detecta o jogo sem esperar o próximo scan
+        if self.event_source is not None:
+            self.event_source.start(self._on_process_start_event)
+        self._check_running_games()
+        source = self.event_source.name if self.event_source else 'polling'
+        print(f"[GAME] Detector de jogos iniciado (fonte: {source})")
     
     def stop(self):
         """Para o monitoramento"""
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=5)
-    
-    def _detection_loop(self):
-        """Loop de detecção de jogos"""
-        while self.running:
-            try:
-                game_found = None
-                
-                # Verifica processos ativos
-                for proc in psutil.process_iter(['pid', 'name']):
-                    try:
-                        name = proc.info['name'].lower()
+        self.table.unsubscribe(self._on_process_delta)
+        if self.event_source is not None:
+            self.event_source.stop()
+    
+    def _check_running_games(self):
+        """Verifica se algum jogo já está rodando (estado atual da tabela)"""
+        with self._state_lock:
+            entry = self.table.find_by_names(self.known_games)
+            if entry and not self.game_active:
+                self._on_game_start(entry.name.lower(), entry.pid, entry.key)
+            elif not entry and self.game_active:
+                self._on_game_end()
+    
+    def _on_process_start_event(self, event):
+        """Chamado pela fonte de eventos (WMI) quando um processo é criado"""
+        if not self.running:
+            return
+        name = event.name.lower()
+        if name not in self.known_games:
+            return
+        with self._state_lock:
+            if not self.game_active:
+                self._on_game_start(name, event.pid, created=event.created,
+                                    source=self.event_source.name)
+    
+    def _on_process_delta(self, delta):
+        """Chamado pela ProcessTable quando processos iniciam/encerram"""
+        if not self.running:
+            return
+        try:
+            with self._state_lock:
+                # Jogo novo? (fallback quando não há fonte de eventos ou ela perdeu o evento)
+                if not self.game_active:
+                    for entry in delta.spawned:
+                        name = entry.name.lower()
                         if name in self.known_games:
-                            game_found = name
-                            break
-                    except:
-                        continue
-                
-                # Estado mudou?
-                if game_found and not self.game_active:
-                    self._on_game_start(game_found)
-                elif not game_found and self.game_active:
-                    self._on_game_end()
+                            self._on_game_start(name, entry.pid, entry.key,
+                                                created=entry.create_time, source='polling')
+                            return
+                    return
                 
-                time.sleep(5)  # Verifica a cada 5 segundos
+                # Jogo detectado por evento: completa a chave quando a tabela o vê
+                if self.current_game_key is None:
+                    for entry in delta.spawned:
+                        if entry.pid == self.current_game_pid:
+                            self.current_game_key = entry.key
+                    
+                    # Processo morreu antes de a tabela enxergá-lo
+                    if (self.current_game_key is None and
+                            time.time() - self._game_started_at > 2 * self.table.interval and
+                            self.table.get(self.current_game_pid) is None):
+                        self._check_running_games()
+                        return
                 
-            except Exception as e:
-                time.sleep(10)
+                # Jogo atual fechou? (pode haver outro jogo aberto)
+                exited = any(e.key == self.current_game_key or
+                             (self.current_game_key is None and e.pid == self.current_game_pid)
+                             for e in delta.exited)
+                if exited:
+                    entry = self.table.find_by_names(self.known_games)
+                    if entry:
+                        self.current_game = entry.name.lower()
+                        self.current_game_pid = entry.pid
+                        self.current_game_key = entry.key
+                    else:
+                        self._on_game_end()
+        except Exception as e:
+            print(f"[GAME] Erro na detecção: {e}")
     
-    def _on_game_start(self, game_name):
+    def _on_game_start(self, game_name, pid=None, game_key=None, created=None, source='polling'):
         """Chamado quando um jogo é detectado"""
         self.game_active = True
         self.current_game = game_name
-        print(f"[GAME] 🎮 Jogo detectado: {game_name.upper()}")
+        self.current_game_pid = pid
+        self.current_game_key = game_key
+        self._game_started_at = time.time()
+        self.last_detection_source = source
+        print(f"[GAME] 🎮 Jogo detectado: {game_name.upper()} (via {source})")
         print("[GAME] Aplicando otimizações de gaming...")
         
         # Aplica boost
         self._apply_game_boost()
+        
+        # Latência criação do processo -> boost aplicado
+        if created:
+            self._report_boost_latency(game_name, created, source)
+    
+    def _report_boost_latency(self, game_name, created, source):
+        """Mede e reporta a latência detecção->boost"""
+        latency_ms = max(0.0, (time.time() - created) * 1000)
+        self.last_boost_latency_ms = latency_ms
+        
+        status = "✓" if latency_ms <= self.BOOST_LATENCY_TARGET_MS else "⚠"
+        print(f"[GAME] {status} Latência início→boost: {latency_ms:.0f}ms "
+              f"(alvo < {self.BOOST_LATENCY_TARGET_MS}ms, fonte: {source})")
+        
+        if 'metrics' in self.services:
+            self.services['metrics'].record('game_boost_latency_ms', latency_ms)
+        if 'history' in self.services:
+            self.services['history'].log_event("game_boost_latency",
+                                               f"{game_name};{latency_ms:.0f}ms;{source}")
     
     def _on_game_end(self):
         """Chamado quando o jogo fecha"""
         old_game = self.current_game
         self.game_active = False
         self.current_game = None
+        self.current_game_pid = None
+        self.current_game_key = None
         print(f"[GAME] 🛑 Jogo encerrado: {old_game}")
         print("[GAME] Restaurando configurações normais...")
         
@@ -130,15 +216,36 @@ class GameModeDetector:
     def _apply_game_boost(self):
         """Aplica otimizações para gaming"""
         try:
-            # 1. CPU: Maximiza frequência
+            # 1. CPU: Maximiza frequência (o governor continua protegendo o thermal_limit)
             if 'cpu_power' in self.services:
-                self.services['cpu_power'].set_max_cpu_frequency(100)
+                cpu = self.services['cpu_power']
+                if cpu.governor is not None and cpu.governor.running:
+                    # Previsão com o jogo em carga total: se vai passar do limite,
+                    # sobe o teto em rampa em vez de um degrau direto para 100%
+                    limit = cpu.governor.thermal_limit
+                    predicted = temperature_service.get_service().forecast_cpu_temp(60, load=100)
+                    jump = predicted < limit
+                    if not jump:
+                        print(f"[GAME] Previsão: {predicted:.0f}°C em 60s (limite {limit}°C) - boost em rampa")
+                    cpu.governor.configure(max_cap=100, jump=jump)
+                else:
+                    cpu.set_max_cpu_frequency(100)
             
-            # 2. Força limpeza de RAM
+            # 2. GPU: limite padrão na hora (sem esperar o próximo tick do governor)
+            if 'gpu_governor' in self.services:
+                self.services['gpu_governor'].step()
+            
+            # 3. Força limpeza de RAM (trim dos apps em segundo plano na thread do scheduler)
+            if 'ws_trimmer' in self.services:
+                self.services['ws_trimmer'].trigger()
             if 'cleaner' in self.services:
-                self.services['cleaner'].clean_standby_memory()
+                cleaner = self.services['cleaner']
+                if getattr(cleaner, 'mode', 'purge') == 'cache_limit':
+                    cleaner.cache_limiter.update()  # Teto do cache na hora, sem purge
+                else:
+                    cleaner.clean_standby_memory(trigger='game')
             
-            # 3. Aumenta prioridade do jogo (handled by SmartProcessManager)
+            # 4. Aumenta prioridade do jogo (handled by SmartProcessManager)
             
             print("[GAME] ⚡ GAME MODE ATIVADO - Performance máxima!")
             
@@ -148,8 +255,20 @@ class GameModeDetector:
     def _restore_normal(self):
         """Restaura configurações normais"""
         try:
-            # CPU volta ao gerenciamento automático
-            # (o Thermal Governor vai cuidar)
+            # CPU volta ao teto do perfil ativo (o Thermal Governor continua cuidando)
+            if 'cpu_power' in self.services and 'profiles' in self.services:
+                settings = self.services['profiles'].get_profile_settings()
+                self.services['cpu_power'].apply_profile_limits(
+                    settings['cpu_max_freq'], settings['cpu_min_freq'], settings['thermal_limit'])
+            # GPU: o governor volta a active/idle respeitando o tempo mínimo
+            if 'gpu_governor' in self.services:
+                self.services['gpu_governor'].step()
+            # Cache de arquivos: remove o teto (modo cache_limit)
+            if 'cleaner' in self.services and getattr(self.services['cleaner'], 'mode', 'purge') == 'cache_limit':
+                self.services['cleaner'].cache_limiter.update()
+            # Working set: remove os tetos dos apps em segundo plano
+            if 'ws_trimmer' in self.services:
+                self.services['ws_trimmer'].trigger()
             print("[GAME] Configurações normais restauradas")
         except:
             pass
@@ -161,10 +280,16 @@ class GameModeDetector:
     def get_current_game(self) -> str:
         """Retorna nome do jogo atual"""
         return self.current_game
+    
+    def get_last_boost_latency(self):
+        """Latência (ms) do último boost, ou None se ainda não medida"""
+        return self.last_boost_latency_ms
 
 
 if __name__ == "__main__":
     # Teste
+    table = process_table.get_table()
+    table.start()
     detector = GameModeDetector()
     detector.start()
     
@@ -174,4 +299,5 @@ if __name__ == "__main__":
             time.sleep(1)
     except KeyboardInterrupt:
         detector.stop()
+        table.stop()
         print("Finalizado")
@@ -1,27 +1,31 @@
 """
 Módulo de controle de GPU NVIDIA
-Aplica Power Limit via pynvml (alternativa ao undervolt manual)
+Aplica Power Limit via NVML (alternativa ao undervolt manual)
+Usa a sessão NVML compartilhada (handles em cache, uma GPU por controlador)
 """
-import pynvml
+from modules import nvml_session
 
 class GPUController:
-    def __init__(self):
+    def __init__(self, index=0, session=None):
+        self.index = index
+        self.session = session or nvml_session.get_session()
         self.handle = None
         self.max_power = 0
         self.initialized = False
         self.applied_percent = 0  # Guarda percentual aplicado
         
         try:
-            pynvml.nvmlInit()
-            self.handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+            if not self.session.available:
+                raise RuntimeError(self.session.error or "nenhuma GPU NVIDIA")
+            self.handle = self.session.handle(index)
+            if self.handle is None:
+                raise RuntimeError(f"GPU {index} não existe ({self.session.count} detectadas)")
             
             # Pega power limit máximo
-            self.max_power = pynvml.nvmlDeviceGetPowerManagementLimit(self.handle)
+            self.max_power = self.session.nvml.nvmlDeviceGetPowerManagementLimit(self.handle)
             self.initialized = True
             
-            name = pynvml.nvmlDeviceGetName(self.handle)
-            if isinstance(name, bytes):
-                name = name.decode('utf-8')
+            name = self.session.name(index)
             
             print(f"[GPU] {name} detectada")
             print(f"[GPU] Power Limit máximo: {self.max_power / 1000:.1f}W")
@@ -37,6 +41,7 @@ class GPUController:
             print("[GPU] Controlador não inicializado")
             return False
         
+        nvml = self.session.nvml
         try:
             if percent < 50 or percent > 100:
                 print(f"[GPU] Porcentagem inválida: {percent}% (use 50-100)")
@@ -45,10 +50,10 @@ class GPUController:
             new_limit = int((self.max_power * percent) / 100)
             
             # Tenta aplicar
-            result = pynvml.nvmlDeviceSetPowerManagementLimit(self.handle, new_limit)
+            result = nvml.nvmlDeviceSetPowerManagementLimit(self.handle, new_limit)
             
             # Verifica se aplicou
-            current = pynvml.nvmlDeviceGetPowerManagementLimit(self.handle)
+            current = nvml.nvmlDeviceGetPowerManagementLimit(self.handle)
             
             if abs(current - new_limit) < 1000:  # Margem de 1W
                 self.applied_percent = percent
@@ -60,10 +65,10 @@ class GPUController:
                 print(f"[GPU] Esperado: {new_limit / 1000:.1f}W, Atual: {current / 1000:.1f}W")
                 return False
                 
-        except pynvml.NVMLError_NotSupported:
+        except nvml.NVMLError_NotSupported:
             print(f"[GPU] ✗ Power limit não suportado neste modelo/driver")
             return False
-        except pynvml.NVMLError_NoPermission:
+        except nvml.NVMLError_NoPermission:
             print(f"[GPU] ✗ Sem permissão (tente executar como Admin)")
             return False
         except Exception as e:
@@ -76,16 +81,19 @@ class GPUController:
         if not self.initialized:
             return None
         
-        try:
-            stats = {
-                'temperature': pynvml.nvmlDeviceGetTemperature(self.handle, 0),
-                'power_usage': pynvml.nvmlDeviceGetPowerUsage(self.handle) / 1000,  # mW para W
-                'gpu_util': pynvml.nvmlDeviceGetUtilizationRates(self.handle).gpu,
-                'mem_util': pynvml.nvmlDeviceGetUtilizationRates(self.handle).memory,
-            }
-            return stats
-        except:
+        # Da passada em lote da sessão (uma leitura de utilização, não duas)
+        gpu = self.session.get(self.index)
+        if gpu is None:
             return None
+        return {
+            'temperature': gpu.temperature,
+            'power_usage': gpu.power_w,
+            'gpu_util': gpu.gpu_util,
+            'mem_util': gpu.mem_util,
+            'power_limit': gpu.power_limit_w,
+            'clock_graphics': gpu.clock_graphics_mhz,
+            'clock_mem': gpu.clock_mem_mhz,
+        }
 
 
 if __name__ == "__main__":
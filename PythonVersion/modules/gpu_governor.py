@@ -0,0 +1,234 @@
+"""
+GPU Governor - Power limit NVIDIA dinâmico
+Escolhe um estado a cada tick e aplica o power limit correspondente:
+- game:   jogo ativo -> limite padrão da placa (FPS intocado)
+- active: GPU em uso fora de jogo -> power_limit_percent do config
+- idle:   GPU ociosa -> limite reduzido (economia)
+- hot:    temperatura alta -> limite reduzido até esfriar
+Histerese em uso/temperatura, tempo mínimo em cada estado (exceto para
+entrar em hot, ou em game vindo de outro estado que não hot) e restauração
+do limite original ao parar. Driver que recusa o limite (bloqueio do
+fabricante/BIOS): novas tentativas com espera crescente, para após max_failures.
+"""
+import time
+from collections import deque
+
+from modules import nvml_session
+from modules import scheduler
+
+GAME = 'game'
+ACTIVE = 'active'
+IDLE = 'idle'
+HOT = 'hot'
+
+
+class GpuPowerGovernor:
+    """Ajusta o power limit NVML de uma GPU a partir de uso, temperatura e modo jogo"""
+
+    JOB_NAME = 'gpu_governor'
+
+    def __init__(self, session=None, index=0, is_game_active=None, log=None,
+                 active_percent=90, idle_percent=60, hot_percent=75,
+                 idle_util=15, busy_util=40, hot_temp=83, temp_hysteresis=5,
+                 min_hold=15.0, interval=2.0, max_failures=3):
+        self.session = session or nvml_session.get_session()
+        self.index = index
+        self.is_game_active = is_game_active or (lambda: False)
+        self.log = log                      # callback(evento, detalhes) - ex.: HistoryLogger.log_event
+        self.percents = {GAME: 100, ACTIVE: active_percent, IDLE: idle_percent, HOT: hot_percent}
+        self.idle_util = idle_util          # Abaixo disto -> idle
+        self.busy_util = busy_util          # Acima disto -> sai de idle
+        self.hot_temp = hot_temp            # °C para entrar em hot
+        self.temp_hysteresis = temp_hysteresis  # Sai de hot abaixo de hot_temp - histerese
+        self.min_hold = min_hold            # Segundos mínimos em um estado
+        self.interval = interval
+        self.max_failures = max_failures    # Escritas recusadas seguidas até desistir
+        self.running = False
+
+        self.state = None
+        self.limit_mw = 0
+        self.default_mw = 0
+        self.original_mw = 0
+        self.min_mw = 0
+        self.max_mw = 0
+        self.transitions = deque(maxlen=50)  # (timestamp, de, para, motivo, limite_w)
+        self._last_change = 0.0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._handle = None
+
+    # === Limites ===
+
+    def _read_limits(self):
+        """Limite atual (para restaurar), padrão e faixa permitida pelo driver"""
+        nvml = self.session.nvml
+        self._handle = self.session.handle(self.index)
+        if self._handle is None:
+            return False
+        self.original_mw = nvml.nvmlDeviceGetPowerManagementLimit(self._handle)
+        try:
+            self.default_mw = nvml.nvmlDeviceGetPowerManagementDefaultLimit(self._handle)
+        except Exception:
+            self.default_mw = self.original_mw
+        try:
+            self.min_mw, self.max_mw = nvml.nvmlDeviceGetPowerManagementLimitConstraints(self._handle)
+        except Exception:
+            self.min_mw, self.max_mw = self.default_mw // 2, self.default_mw
+        self.limit_mw = self.original_mw
+        return True
+
+    def limit_for(self, state):
+        """Limite (mW) de um estado: % do limite padrão, dentro da faixa do driver"""
+        target = int(self.default_mw * self.percents[state] / 100)
+        return max(self.min_mw, min(self.max_mw, target))
+
+    def _write_limit(self, limit_mw):
+        if limit_mw == self.limit_mw:
+            return True
+        try:
+            self.session.nvml.nvmlDeviceSetPowerManagementLimit(self._handle, limit_mw)
+        except Exception as e:
+            print(f"[GPU] Governor: falha ao aplicar {limit_mw / 1000:.0f}W ({type(e).__name__})")
+            return False
+        self.limit_mw = limit_mw
+        return True
+
+    # === Controle ===
+
+    def decide(self, util, temp, game):
+        """Estado desejado (com histerese em relação ao estado atual) e motivo"""
+        if temp >= self.hot_temp or (self.state == HOT and temp > self.hot_temp - self.temp_hysteresis):
+            return HOT, f"{temp:.0f}°C"
+        if game:
+            return GAME, "jogo ativo"
+        if util < self.idle_util or (self.state == IDLE and util < self.busy_util):
+            return IDLE, f"uso {util:.0f}%"
+        return ACTIVE, f"uso {util:.0f}%"
+
+    def step(self, now=None):
+        """Uma iteração; retorna o estado vigente"""
+        if not self.running:
+            return self.state               # Parado (ou desativado por recusa do driver)
+        now = time.time() if now is None else now
+        gpu = self.session.get(self.index)  # Reaproveita a passada do sampler se recente
+        if gpu is None:
+            return self.state
+
+        try:
+            game = bool(self.is_game_active())
+        except Exception:
+            game = False
+        desired, reason = self.decide(gpu.gpu_util, gpu.temperature, game)
+        if desired == self.state:
+            return self.state
+
+        # Calor e jogo agem na hora; relaxar/economizar (e sair de hot) respeita o tempo mínimo
+        urgent = desired == HOT or self.state is None or (desired == GAME and self.state != HOT)
+        if not urgent and now - self._last_change < self.min_hold:
+            return self.state
+        if now < self._retry_at:
+            return self.state
+
+        self._transition(desired, reason, now)
+        return self.state
+
+    def _transition(self, state, reason, now):
+        limit_mw = self.limit_for(state)
+        if not self._write_limit(limit_mw):
+            self._refused(now)
+            return
+        self._failures = 0
+        previous = self.state
+        self.state = state
+        self._last_change = now
+        self.transitions.append((now, previous, state, reason, limit_mw / 1000))
+        print(f"[GPU] Governor: {previous or 'início'} -> {state} ({reason}) | limite {limit_mw / 1000:.0f}W")
+        if self.log:
+            try:
+                self.log("gpu_power_limit", f"{previous or '-'}->{state};{reason};{limit_mw / 1000:.0f}W")
+            except Exception:
+                pass
+
+    def _refused(self, now):
+        """Driver recusou o limite: espera crescente e, após max_failures, para"""
+        self._failures += 1
+        if self._failures >= self.max_failures:
+            print(f"[GPU] Governor: driver recusou o power limit {self._failures}x seguidas "
+                  f"(bloqueado pelo fabricante?), governor desativado")
+            if self.log:
+                try:
+                    self.log("gpu_power_limit", f"recusado {self._failures}x;desativado")
+                except Exception:
+                    pass
+            self.stop()
+            return
+        self._retry_at = now + self.min_hold * 2 ** (self._failures - 1)
+
+    def start(self):
+        """Lê os limites da GPU e registra o job no scheduler central"""
+        if self.running:
+            return True
+        self._failures = 0
+        self._retry_at = 0.0
+        try:
+            if not self.session.available or not self._read_limits():
+                return False
+        except Exception as e:
+            print(f"[GPU] Governor indisponível: {e}")
+            return False
+        self.running = True
+        self.step()
+        scheduler.get_scheduler().add_job(self.JOB_NAME, self.step, self.interval)
+        print(f"[GPU] Governor iniciado: padrão {self.default_mw / 1000:.0f}W, "
+              f"faixa {self.min_mw / 1000:.0f}-{self.max_mw / 1000:.0f}W")
+        return True
+
+    def stop(self):
+        """Para o governor e devolve o limite que a placa tinha antes dele"""
+        if not self.running:
+            return
+        self.running = False
+        scheduler.get_scheduler().cancel(self.JOB_NAME)
+        if self._write_limit(self.original_mw):
+            print(f"[GPU] Governor parado: limite original restaurado ({self.original_mw / 1000:.0f}W)")
+
+    def get_current_percent(self):
+        """Limite vigente em % do padrão (0 = não iniciado)"""
+        if not self.default_mw:
+            return 0
+        return round(self.limit_mw * 100 / self.default_mw)
+
+    def get_status(self):
+        return {
+            'running': self.running,
+            'state': self.state,
+            'limit_w': self.limit_mw / 1000,
+            'percent': self.get_current_percent(),
+            'original_w': self.original_mw / 1000,
+            'transitions': len(self.transitions),
+        }
+
+
+if __name__ == "__main__":
+    # Teste com GPU falsa: ociosa -> jogo -> esquenta -> jogo acaba -> ociosa
+    fake = nvml_session.FakeNVML()
+    session = nvml_session.NvmlSession(nvml=fake, max_age=0)
+    game = {'active': False}
+    governor = GpuPowerGovernor(session=session, is_game_active=lambda: game['active'], min_hold=10)
+    governor._read_limits()
+    governor.running = True
+
+    gpu = fake.gpus[0]
+    timeline = [
+        (0, 5, 50, False), (4, 8, 50, False), (20, 97, 70, True), (30, 99, 85, True),
+        (34, 99, 81, True), (40, 99, 77, True), (50, 30, 60, False), (55, 10, 50, False),
+        (70, 10, 48, False),
+    ]
+    for now, util, temp, active in timeline:
+        gpu['util'], gpu['temp'] = util, temp
+        game['active'] = active
+        state = governor.step(now=now + 1000)
+        print(f"t={now:3d}s uso {util:3d}% {temp}°C jogo={active!s:5} -> {state} ({governor.limit_mw / 1000:.0f}W)")
+
+    governor.stop()
+    print(f"Limite final: {gpu['limit_mw'] / 1000:.0f}W (original {governor.original_mw / 1000:.0f}W)")
@@ -20,6 +20,9 @@ class HistoryLogger:
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.cleanup_log = self.log_dir / "cleanup_history.csv"
         self.events_log = self.log_dir / "events.csv"
+        self.metrics_log = self.log_dir / "metrics_summary.csv"
+        self.purge_log = self.log_dir / "purge_history.csv"
+        self._metrics_last_write = 0
         
         # Inicializa arquivos se não existirem
         self._init_files()
@@ -35,6 +38,17 @@ class HistoryLogger:
             with open(self.events_log, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow(['timestamp', 'event_type', 'details'])
+        
+        if not self.metrics_log.exists():
+            with open(self.metrics_log, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['timestamp', 'metric', 'window_s', 'min', 'avg', 'max', 'p95'])
+        
+        if not self.purge_log.exists():
+            with open(self.purge_log, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['timestamp', 'trigger', 'tier', 'freed_mb', 'free_before_mb',
+                                 'free_after_mb', 'duration_ms'])
     
     def log_cleanup(self, freed_mb: float, trigger: str = "auto", 
                     ram_before_mb: float = 0, ram_after_mb: float = 0):
@@ -48,6 +62,19 @@ class HistoryLogger:
         except Exception as e:
             print(f"[HISTORY] Erro ao salvar log: {e}")
     
+    def log_purge(self, trigger: str, tier: str, freed_mb: float,
+                  free_before_mb: float = 0, free_after_mb: float = 0, duration_ms: float = 0):
+        """Registra um estágio de purge (uma linha por tier executado)"""
+        timestamp = datetime.now().isoformat()
+        
+        try:
+            with open(self.purge_log, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow([timestamp, trigger, tier, round(freed_mb, 1), round(free_before_mb),
+                                 round(free_after_mb), round(duration_ms, 2)])
+        except Exception as e:
+            print(f"[HISTORY] Erro ao salvar log: {e}")
+    
     def log_event(self, event_type: str, details: str = ""):
         """Registra um evento genérico"""
         timestamp = datetime.now().isoformat()
@@ -59,6 +86,34 @@ class HistoryLogger:
         except:
             pass
     
+    def log_metrics_summary(self, store, window_seconds: int = 300):
+        """Registra min/avg/max/p95 de cada métrica do MetricsStore"""
+        timestamp = datetime.now().isoformat()
+        
+        try:
+            with open(self.metrics_log, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                for name in sorted(store.names()):
+                    if name.startswith('core'):
+                        continue  # Por núcleo fica só na memória
+                    s = store.summary(name, window_seconds)
+                    if s:
+                        writer.writerow([timestamp, name, window_seconds,
+                                         round(s['min'], 1), round(s['avg'], 1),
+                                         round(s['max'], 1), round(s['p95'], 1)])
+        except:
+            pass
+    
+    def attach_metrics(self, sampler, store, window_seconds: int = 300):
+        """Grava resumo das métricas a cada janela (assinante do sampler, sem thread própria)"""
+        def on_snapshot(snap):
+            if snap.timestamp - self._metrics_last_write >= window_seconds:
+                if self._metrics_last_write:
+                    self.log_metrics_summary(store, window_seconds)
+                self._metrics_last_write = snap.timestamp
+        
+        sampler.subscribe(on_snapshot)
+    
     def get_cleanup_stats(self) -> dict:
         """Retorna estatísticas de limpezas"""
         stats = {
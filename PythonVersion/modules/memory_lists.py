@@ -0,0 +1,327 @@
+"""
+Memory Lists - Listas de páginas físicas do Windows (como o RAMMap)
+NtQuerySystemInformation(SystemMemoryListInformation): páginas zeradas,
+livres, modificadas e standby por prioridade (0-7), em bytes exatos.
+NtSetSystemInformation com os comandos de purge, com o privilégio
+SeProfileSingleProcessPrivilege habilitado uma vez e mantido em cache.
+Inclui um backend falso que simula o efeito de cada purge.
+"""
+import ctypes
+import sys
+import time
+from ctypes import wintypes
+from typing import NamedTuple, Tuple
+
+SystemMemoryListInformation = 80
+
+# SYSTEM_MEMORY_LIST_COMMAND
+MemoryEmptyWorkingSets = 2
+MemoryFlushModifiedList = 3
+MemoryPurgeStandbyList = 4
+MemoryPurgeLowPriorityStandbyList = 5   # Só a standby de prioridade 0
+
+STATUS_SUCCESS = 0
+STATUS_PRIVILEGE_NOT_HELD = 0xC0000061
+ERROR_NOT_ALL_ASSIGNED = 1300
+
+PROFILE_PRIVILEGE = "SeProfileSingleProcessPrivilege"
+
+COMMAND_NAMES = {
+    MemoryEmptyWorkingSets: 'empty_working_sets',
+    MemoryFlushModifiedList: 'flush_modified',
+    MemoryPurgeStandbyList: 'standby',
+    MemoryPurgeLowPriorityStandbyList: 'standby_low_priority',
+}
+
+
+class SYSTEM_MEMORY_LIST_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ('ZeroPageCount', ctypes.c_size_t),
+        ('FreePageCount', ctypes.c_size_t),
+        ('ModifiedPageCount', ctypes.c_size_t),
+        ('ModifiedNoWritePageCount', ctypes.c_size_t),
+        ('BadPageCount', ctypes.c_size_t),
+        ('PageCountByPriority', ctypes.c_size_t * 8),
+        ('RepurposedPagesByPriority', ctypes.c_size_t * 8),
+        ('ModifiedPageCountPageFile', ctypes.c_size_t),
+    ]
+
+
+class LUID(ctypes.Structure):
+    # ctypes.wintypes não define LUID
+    _fields_ = [('LowPart', wintypes.DWORD), ('HighPart', wintypes.LONG)]
+
+
+class TOKEN_PRIVILEGES(ctypes.Structure):
+    _fields_ = [('PrivilegeCount', wintypes.DWORD), ('Luid', LUID), ('Attributes', wintypes.DWORD)]
+
+
+class MemoryListInfo(NamedTuple):
+    """Estado das listas de páginas (contagens em páginas)"""
+    page_size: int
+    zero_pages: int
+    free_pages: int
+    modified_pages: int
+    modified_no_write_pages: int
+    standby_pages: Tuple[int, ...]      # Por prioridade 0..7
+    repurposed_pages: Tuple[int, ...]   # Reaproveitadas por prioridade (acumulado)
+    timestamp: float
+
+    def _bytes(self, pages):
+        return pages * self.page_size
+
+    @property
+    def zero_bytes(self):
+        return self._bytes(self.zero_pages)
+
+    @property
+    def free_bytes(self):
+        """Livres + zeradas (prontas para uso sem tirar nada de cache)"""
+        return self._bytes(self.free_pages + self.zero_pages)
+
+    @property
+    def modified_bytes(self):
+        return self._bytes(self.modified_pages + self.modified_no_write_pages)
+
+    @property
+    def standby_bytes(self):
+        return self._bytes(sum(self.standby_pages))
+
+    @property
+    def available_bytes(self):
+        """Mesma definição do Windows: livres + zeradas + standby"""
+        return self.free_bytes + self.standby_bytes
+
+    def standby_bytes_by_priority(self):
+        return tuple(self._bytes(pages) for pages in self.standby_pages)
+
+    def standby_bytes_below(self, priority):
+        """Standby com prioridade < priority (ex.: 5 = cache "frio")"""
+        return self._bytes(sum(self.standby_pages[:priority]))
+
+
+class PurgeResult(NamedTuple):
+    """Resultado de um comando de purge (medido pelas próprias listas)"""
+    command: int
+    ok: bool
+    before: MemoryListInfo
+    after: MemoryListInfo
+    duration_ms: float
+
+    @property
+    def tier(self):
+        return COMMAND_NAMES.get(self.command, str(self.command))
+
+    @property
+    def freed_bytes(self):
+        """Bytes que saíram da standby para as listas livres"""
+        return max(0, self.before.standby_bytes - self.after.standby_bytes)
+
+
+def enable_token_privilege(name, kernel32, advapi32):
+    """
+    Habilita um privilégio (ex.: SeProfileSingleProcessPrivilege) no token do
+    processo. Nunca levanta exceção: qualquer falha retorna False
+    """
+    try:
+        return _adjust_token_privilege(name, kernel32, advapi32)
+    except Exception as e:
+        print(f"[WARN] Falha ao habilitar {name}: {e}")
+        return False
+
+
+def _adjust_token_privilege(name, kernel32, advapi32):
+    SE_PRIVILEGE_ENABLED = 0x00000002
+    TOKEN_ADJUST_PRIVILEGES = 0x0020
+    TOKEN_QUERY = 0x0008
+
+    token = wintypes.HANDLE()
+    if not advapi32.OpenProcessToken(kernel32.GetCurrentProcess(),
+                                     TOKEN_ADJUST_PRIVILEGES | TOKEN_QUERY, ctypes.byref(token)):
+        return False
+    try:
+        luid = LUID()
+        if not advapi32.LookupPrivilegeValueW(None, name, ctypes.byref(luid)):
+            return False
+        tp = TOKEN_PRIVILEGES(1, luid, SE_PRIVILEGE_ENABLED)
+        ok = advapi32.AdjustTokenPrivileges(token, False, ctypes.byref(tp), ctypes.sizeof(tp), None, None)
+        # AdjustTokenPrivileges "funciona" mesmo sem o privilégio: confere o erro
+        return bool(ok) and ctypes.get_last_error() != ERROR_NOT_ALL_ASSIGNED
+    finally:
+        kernel32.CloseHandle(token)
+
+
+class NtMemoryBackend:
+    """Consulta e purge reais via ntdll (purge requer administrador)"""
+
+    name = 'ntdll'
+
+    def __init__(self):
+        if sys.platform != 'win32':
+            raise OSError("SystemMemoryListInformation requer Windows")
+        self.ntdll = ctypes.WinDLL('ntdll')
+        self.kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self.advapi32 = ctypes.WinDLL('advapi32', use_last_error=True)
+        self.ntdll.NtSetSystemInformation.restype = ctypes.c_ulong
+        self.ntdll.NtQuerySystemInformation.restype = ctypes.c_ulong
+        self.kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        self.page_size = self._page_size()
+        self.privilege_enabled = False      # Cache: ajusta o token uma vez só
+        self.privilege_adjustments = 0
+
+    def _page_size(self):
+        class SYSTEM_INFO(ctypes.Structure):
+            _fields_ = [('wProcessorArchitecture', wintypes.WORD), ('wReserved', wintypes.WORD),
+                        ('dwPageSize', wintypes.DWORD), ('lpMinimumApplicationAddress', ctypes.c_void_p),
+                        ('lpMaximumApplicationAddress', ctypes.c_void_p),
+                        ('dwActiveProcessorMask', ctypes.c_size_t), ('dwNumberOfProcessors', wintypes.DWORD),
+                        ('dwProcessorType', wintypes.DWORD), ('dwAllocationGranularity', wintypes.DWORD),
+                        ('wProcessorLevel', wintypes.WORD), ('wProcessorRevision', wintypes.WORD)]
+        info = SYSTEM_INFO()
+        self.kernel32.GetSystemInfo(ctypes.byref(info))
+        return info.dwPageSize or 4096
+
+    def query(self) -> MemoryListInfo:
+        info = SYSTEM_MEMORY_LIST_INFORMATION()
+        length = wintypes.ULONG(0)
+        status = self.ntdll.NtQuerySystemInformation(
+            SystemMemoryListInformation, ctypes.byref(info), ctypes.sizeof(info), ctypes.byref(length))
+        if status != STATUS_SUCCESS:
+            raise OSError(f"NtQuerySystemInformation: 0x{status:08X}")
+        return MemoryListInfo(
+            page_size=self.page_size,
+            zero_pages=info.ZeroPageCount,
+            free_pages=info.FreePageCount,
+            modified_pages=info.ModifiedPageCount,
+            modified_no_write_pages=info.ModifiedNoWritePageCount,
+            standby_pages=tuple(info.PageCountByPriority),
+            repurposed_pages=tuple(info.RepurposedPagesByPriority),
+            timestamp=time.time(),
+        )
+
+    def enable_privilege(self):
+        """Habilita SeProfileSingleProcessPrivilege no token (só na primeira vez)"""
+        if self.privilege_enabled:
+            return True
+        self.privilege_adjustments += 1
+        self.privilege_enabled = enable_token_privilege(PROFILE_PRIVILEGE, self.kernel32, self.advapi32)
+        return self.privilege_enabled
+
+    def command(self, command) -> int:
+        """Envia um SYSTEM_MEMORY_LIST_COMMAND; retorna o NTSTATUS"""
+        self.enable_privilege()
+        value = ctypes.c_int(command)
+        status = self.ntdll.NtSetSystemInformation(
+            SystemMemoryListInformation, ctypes.byref(value), ctypes.sizeof(value))
+        if status == STATUS_PRIVILEGE_NOT_HELD and self.privilege_enabled:
+            # Token mudou (ex.: impersonação): ajusta de novo e tenta uma vez
+            self.privilege_enabled = False
+            self.enable_privilege()
+            status = self.ntdll.NtSetSystemInformation(
+                SystemMemoryListInformation, ctypes.byref(value), ctypes.sizeof(value))
+        return status
+
+
+class FakeMemoryBackend:
+    """
+    Listas simuladas (testes): purge completo move toda a standby para a
+    lista livre; purge de baixa prioridade move só a prioridade 0.
+    """
+
+    name = 'fake'
+
+    def __init__(self, total_mb=16384, free_mb=600, modified_mb=200,
+                 standby_mb_by_priority=(900, 300, 200, 150, 250, 1400, 1800, 700), page_size=4096):
+        self.page_size = page_size
+        self.total_pages = self._pages(total_mb)
+        self.zero_pages = self._pages(free_mb) // 2
+        self.free_pages = self._pages(free_mb) - self.zero_pages
+        self.modified_pages = self._pages(modified_mb)
+        self.standby_pages = [self._pages(mb) for mb in standby_mb_by_priority]
+        self.repurposed_pages = [0] * 8
+        self.commands = []
+        self.privilege_adjustments = 0
+        self.privilege_enabled = False
+
+    def _pages(self, mb):
+        return int(mb * 1024 * 1024 // self.page_size)
+
+    def query(self) -> MemoryListInfo:
+        return MemoryListInfo(self.page_size, self.zero_pages, self.free_pages, self.modified_pages, 0,
+                              tuple(self.standby_pages), tuple(self.repurposed_pages), time.time())
+
+    def enable_privilege(self):
+        if not self.privilege_enabled:
+            self.privilege_adjustments += 1
+            self.privilege_enabled = True
+        return True
+
+    def command(self, command) -> int:
+        self.enable_privilege()
+        self.commands.append(command)
+        if command == MemoryPurgeStandbyList:
+            priorities = range(8)
+        elif command == MemoryPurgeLowPriorityStandbyList:
+            priorities = range(1)
+        else:
+            return STATUS_SUCCESS
+        for priority in priorities:
+            self.free_pages += self.standby_pages[priority]
+            self.standby_pages[priority] = 0
+        return STATUS_SUCCESS
+
+    def consume(self, mb):
+        """Simula alocação: consome livres e depois reaproveita standby (menor prioridade primeiro)"""
+        pages = self._pages(mb)
+        take = min(pages, self.free_pages + self.zero_pages)
+        from_free = min(take, self.free_pages)
+        self.free_pages -= from_free
+        self.zero_pages -= take - from_free
+        pages -= take
+        for priority in range(8):
+            take = min(pages, self.standby_pages[priority])
+            self.standby_pages[priority] -= take
+            self.repurposed_pages[priority] += take
+            pages -= take
+
+    def cache(self, mb, priority=5):
+        """Simula leitura de arquivos: páginas livres viram standby"""
+        pages = min(self._pages(mb), self.free_pages + self.zero_pages)
+        from_free = min(pages, self.free_pages)
+        self.free_pages -= from_free
+        self.zero_pages -= pages - from_free
+        self.standby_pages[priority] += pages
+
+
+def purge(backend, command) -> PurgeResult:
+    """Executa um purge e mede o efeito pelas listas (sem sleep, sem psutil)"""
+    before = backend.query()
+    start = time.perf_counter()
+    status = backend.command(command)
+    duration_ms = (time.perf_counter() - start) * 1000
+    after = backend.query()
+    return PurgeResult(command, status == STATUS_SUCCESS, before, after, duration_ms)
+
+
+def get_backend():
+    """Backend nativo, ou None fora do Windows"""
+    try:
+        return NtMemoryBackend()
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    # Teste: backend real se disponível, senão o simulado
+    backend = get_backend() or FakeMemoryBackend()
+    info = backend.query()
+    mb = 1024 * 1024
+    print(f"[{backend.name}] Zero+Free: {info.free_bytes // mb}MB | Modified: {info.modified_bytes // mb}MB | "
+          f"Standby: {info.standby_bytes // mb}MB")
+    print("Standby por prioridade (MB):", [b // mb for b in info.standby_bytes_by_priority()])
+
+    if isinstance(backend, FakeMemoryBackend):
+        for command in (MemoryPurgeLowPriorityStandbyList, MemoryPurgeStandbyList):
+            result = purge(backend, command)
+            print(f"Purge {result.tier}: {result.freed_bytes // mb}MB liberados em {result.duration_ms:.2f}ms")
+        print(f"Ajustes de privilégio: {backend.privilege_adjustments} para {len(backend.commands)} purges")
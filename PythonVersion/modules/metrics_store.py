@@ -0,0 +1,227 @@
+"""
+Metrics Store - Séries temporais em ring buffers pré-alocados
+Três resoluções automáticas (1s / 10s / 1min) com memória fixa
+"""
+import math
+import threading
+import time
+from array import array
+
+# Tiers padrão: (resolução em segundos, número de pontos)
+#   1s  x 300  = últimos 5 minutos
+#   10s x 360  = última 1 hora
+#   60s x 1440 = últimas 24 horas
+DEFAULT_TIERS = ((1, 300), (10, 360), (60, 1440))
+
+
+class RingBuffer:
+    """Ring buffer de floats com capacidade fixa (array('d'))"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._values = array('d', bytes(8 * capacity))
+        self._times = array('d', bytes(8 * capacity))
+        self._head = 0      # Próxima posição de escrita
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, value):
+        """Adiciona um ponto (sobrescreve o mais antigo quando cheio)"""
+        self._times[self._head] = timestamp
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def last(self):
+        """Retorna (timestamp, valor) mais recente ou None"""
+        if self._count == 0:
+            return None
+        idx = (self._head - 1) % self.capacity
+        return self._times[idx], self._values[idx]
+
+    def values(self, since=None):
+        """Retorna valores em ordem cronológica (opcionalmente desde um timestamp)"""
+        start = (self._head - self._count) % self.capacity
+        result = []
+        for i in range(self._count):
+            idx = (start + i) % self.capacity
+            if since is None or self._times[idx] >= since:
+                result.append(self._values[idx])
+        return result
+
+    def items(self, since=None):
+        """Retorna lista de (timestamp, valor) em ordem cronológica"""
+        start = (self._head - self._count) % self.capacity
+        result = []
+        for i in range(self._count):
+            idx = (start + i) % self.capacity
+            if since is None or self._times[idx] >= since:
+                result.append((self._times[idx], self._values[idx]))
+        return result
+
+
+class MultiResolutionSeries:
+    """Série com downsampling automático para tiers mais grossos"""
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.resolutions = tuple(res for res, _ in tiers)
+        self._rings = [RingBuffer(capacity) for _, capacity in tiers]
+        # Acumuladores do bucket corrente de cada tier: [bucket_id, soma, contagem]
+        self._buckets = [[None, 0.0, 0] for _ in tiers]
+
+    def add(self, timestamp, value):
+        """Adiciona uma amostra; tiers agregam pela média do bucket"""
+        for i, res in enumerate(self.resolutions):
+            bucket_id = int(timestamp // res)
+            bucket = self._buckets[i]
+
+            if bucket[0] is not None and bucket_id != bucket[0]:
+                # Bucket fechou -> grava média no ring do tier
+                self._rings[i].append(bucket[0] * res, bucket[1] / bucket[2])
+                bucket[1] = 0.0
+                bucket[2] = 0
+
+            bucket[0] = bucket_id
+            bucket[1] += value
+            bucket[2] += 1
+
+    def latest(self):
+        """Último valor recebido (bucket corrente do tier mais fino)"""
+        bucket = self._buckets[0]
+        if bucket[2]:
+            return bucket[1] / bucket[2]
+        last = self._rings[0].last()
+        return last[1] if last else None
+
+    def _pick_tier(self, window):
+        """Escolhe o tier mais fino que cobre a janela pedida"""
+        for i, ring in enumerate(self._rings):
+            if self.resolutions[i] * ring.capacity >= window:
+                return i
+        return len(self._rings) - 1
+
+    def window(self, seconds, now=None):
+        """Valores dos últimos N segundos (tier escolhido automaticamente)"""
+        now = now if now is not None else time.time()
+        tier = self._pick_tier(seconds)
+        values = self._rings[tier].values(since=now - seconds)
+
+        # Inclui o bucket ainda aberto para não perder a amostra mais recente
+        bucket = self._buckets[tier]
+        if bucket[2]:
+            values.append(bucket[1] / bucket[2])
+        return values
+
+    def summary(self, seconds, now=None):
+        """Retorna min/avg/max/p95 da janela (ou None se vazia)"""
+        return summarize(self.window(seconds, now))
+
+
+def percentile(sorted_values, pct):
+    """Percentil com interpolação linear (lista já ordenada)"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * (pct / 100.0)
+    lo = math.floor(k)
+    hi = math.ceil(k)
+    if lo == hi:
+        return sorted_values[int(k)]
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(values):
+    """Estatísticas de uma lista de valores"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        'min': ordered[0],
+        'avg': sum(ordered) / len(ordered),
+        'max': ordered[-1],
+        'p95': percentile(ordered, 95),
+        'count': len(ordered),
+    }
+
+
+class MetricsStore:
+    """Conjunto de séries nomeadas alimentado pelo TelemetrySampler"""
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = tiers
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, value, timestamp=None):
+        """Registra um valor para a métrica"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = MultiResolutionSeries(self.tiers)
+                self._series[name] = series
+            series.add(timestamp, float(value))
+
+    def record_snapshot(self, snap):
+        """Assinante do TelemetrySampler: grava todas as métricas do snapshot"""
+        ts = snap.timestamp
+        self.record('cpu_percent', snap.cpu_percent, ts)
+        for i, load in enumerate(snap.cpu_per_core):
+            self.record(f'core{i}', load, ts)
+        if snap.cpu_temp > 0:
+            self.record('cpu_temp', snap.cpu_temp, ts)
+        self.record('ram_percent', snap.ram_percent, ts)
+        self.record('ram_available_mb', snap.ram_available / (1024 * 1024), ts)
+        if snap.gpu_name:
+            self.record('gpu_percent', snap.gpu_percent, ts)
+            self.record('gpu_temp', snap.gpu_temp, ts)
+            self.record('gpu_mem_used_mb', snap.gpu_mem_used / (1024 * 1024), ts)
+
+    def names(self):
+        """Lista de métricas registradas"""
+        with self._lock:
+            return list(self._series.keys())
+
+    def latest(self, name):
+        """Último valor da métrica (ou None)"""
+        with self._lock:
+            series = self._series.get(name)
+            return series.latest() if series else None
+
+    def window(self, name, seconds):
+        """Valores dos últimos N segundos"""
+        with self._lock:
+            series = self._series.get(name)
+            return series.window(seconds) if series else []
+
+    def summary(self, name, seconds):
+        """min/avg/max/p95 dos últimos N segundos"""
+        with self._lock:
+            series = self._series.get(name)
+            return series.summary(seconds) if series else None
+
+
+# Singleton global
+_instance = None
+
+def get_store() -> MetricsStore:
+    """Retorna instância singleton do MetricsStore"""
+    global _instance
+    if _instance is None:
+        _instance = MetricsStore()
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste: 2 horas simuladas de CPU em 1 segundo
+    store = MetricsStore()
+    start = time.time() - 7200
+    for i in range(7200):
+        store.record('cpu_percent', 50 + 40 * math.sin(i / 300), start + i)
+
+    for window in (60, 600, 3600):
+        s = store.summary('cpu_percent', window)
+        print(f"Últimos {window:5d}s: min={s['min']:.1f} avg={s['avg']:.1f} "
+              f"p95={s['p95']:.1f} ({s['count']} pontos)")
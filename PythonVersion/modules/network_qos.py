@@ -2,9 +2,8 @@
 Network QoS Manager - Ping Booster + DNS Security
 Prioriza tráfego de jogos online + DNS seguro com bloqueio de ads
 """
-import subprocess
-import threading
-import time
+from modules import powershell_host
+from modules import command_executor
 
 class NetworkQoSManager:
     """Gerencia políticas de QoS e DNS seguro"""
@@ -48,6 +47,8 @@ class NetworkQoSManager:
         self.enabled = self.config.get('enabled', True)
         self.dns_provider = self.config.get('dns_provider', 'adguard')  # Default: AdGuard
         self.running = False
+        self.ps = powershell_host.get_pool()  # PowerShell persistente (sem cold start)
+        self.executor = command_executor.get_executor()  # netsh em paralelo
         
         # Common game ports (UDP)
         self.game_ports = {
@@ -57,6 +58,24 @@ class NetworkQoSManager:
             'voip': [5000, 5001, 5002, 9000, 9001]
         }
     
+    # Adaptador ativo (físico) - reutilizado pelos scripts abaixo
+    _ADAPTER_EXPR = ('Get-NetAdapter | Where-Object {$_.Status -eq "Up" -and '
+                     '$_.InterfaceDescription -notlike "*Virtual*"} | Select-Object -First 1')
+    
+    _NAGLE_SCRIPT = '''
+    $adapters = Get-ChildItem "HKLM:\\SYSTEM\\CurrentControlSet\\Services\\Tcpip\\Parameters\\Interfaces"
+    foreach ($adapter in $adapters) {
+        Set-ItemProperty -Path $adapter.PSPath -Name "TcpAckFrequency" -Value 1 -Type DWord -Force -ErrorAction SilentlyContinue
+        Set-ItemProperty -Path $adapter.PSPath -Name "TCPNoDelay" -Value 1 -Type DWord -Force -ErrorAction SilentlyContinue
+    }
+    '''
+    
+    # netsh não precisa do PowerShell: roda direto no executor
+    _BUFFER_COMMANDS = [
+        ['netsh', 'int', 'tcp', 'set', 'global', 'autotuninglevel=normal'],
+        ['netsh', 'int', 'tcp', 'set', 'global', 'rss=enabled'],
+    ]
+    
     def apply_qos_rules(self):
         """Aplica regras de QoS + DNS seguro"""
         if not self.enabled:
@@ -65,14 +84,25 @@ class NetworkQoSManager:
         print("[NET] Aplicando otimizações de rede...")
         
         try:
-            # 1. Desabilita algoritmo de Nagle (reduz micro-lag)
-            self._disable_nagle()
+            provider = self.DNS_PROVIDERS.get(self.dns_provider, self.DNS_PROVIDERS['adguard'])
+            print(f"[NET] Configurando {provider['name']}...")
+            print(f"[NET] → {provider['description']}")
+            
+            # Buffers TCP (netsh) rodam em paralelo com o round-trip do PowerShell
+            buffers = [self.executor.submit(argv) for argv in self._BUFFER_COMMANDS]
+            
+            # Nagle + DNS em UM round-trip no PowerShell persistente
+            nagle, dns = self.ps.run_batch([
+                self._NAGLE_SCRIPT,          # 1. Desabilita Nagle (reduz micro-lag)
+                self._dns_script(provider),  # 2. DNS seguro (AdGuard por padrão)
+            ], timeout=30)
             
-            # 2. Otimiza buffers TCP
-            self._optimize_network_buffer()
+            for future in buffers:
+                future.result()
             
-            # 3. Configura DNS seguro (AdGuard por padrão)
-            self._set_secure_dns()
+            if nagle.ok:
+                print("[NET] ✓ Nagle disabled (micro-lag reduzido)")
+            self._report_dns(dns, provider)
             
             print("[NET] ✓ Otimizações de rede aplicadas")
             return True
@@ -81,6 +111,26 @@ class NetworkQoSManager:
             print(f"[NET] Erro ao aplicar QoS: {e}")
             return False
     
+    def _dns_script(self, provider):
+        """Script: detecta adaptador ativo e configura DNS (retorna o nome do adaptador)"""
+        return f'''
+        $adapter = {self._ADAPTER_EXPR}
+        if ($adapter) {{
+            Set-DnsClientServerAddress -InterfaceAlias $adapter.Name -ServerAddresses ("{provider['primary']}", "{provider['secondary']}")
+            $adapter.Name
+        }}
+        '''
+    
+    def _report_dns(self, result, provider):
+        if not result.ok and result.error == 'timeout':
+            print("[NET] ⚠ Timeout ao configurar DNS")
+        elif not result.ok:
+            print(f"[NET] ⚠ Erro DNS: {result.error}")
+        elif result.output.strip():
+            print(f"[NET] ✓ DNS configurado: {provider['primary']} / {provider['secondary']}")
+        else:
+            print("[NET] ⚠ Não foi possível detectar adaptador de rede")
+    
     def _set_secure_dns(self):
         """Configura DNS seguro (AdGuard/Google/Cloudflare)"""
         provider = self.DNS_PROVIDERS.get(self.dns_provider, self.DNS_PROVIDERS['adguard'])
@@ -88,87 +138,34 @@ class NetworkQoSManager:
         print(f"[NET] Configurando {provider['name']}...")
         print(f"[NET] → {provider['description']}")
         
-        try:
-            # Obtém nome do adaptador de rede ativo
-            get_adapter_cmd = '''
-            $adapter = Get-NetAdapter | Where-Object {$_.Status -eq "Up" -and $_.InterfaceDescription -notlike "*Virtual*"} | Select-Object -First 1
-            $adapter.Name
-            '''
-            result = subprocess.run(['powershell', '-Command', get_adapter_cmd], 
-                                    capture_output=True, text=True, timeout=10)
-            adapter_name = result.stdout.strip()
-            
-            if adapter_name:
-                # Configura DNS
-                dns_cmd = f'''
-                Set-DnsClientServerAddress -InterfaceAlias "{adapter_name}" -ServerAddresses ("{provider['primary']}", "{provider['secondary']}")
-                '''
-                subprocess.run(['powershell', '-Command', dns_cmd], 
-                              capture_output=True, timeout=10)
-                print(f"[NET] ✓ DNS configurado: {provider['primary']} / {provider['secondary']}")
-            else:
-                print("[NET] ⚠ Não foi possível detectar adaptador de rede")
-                
-        except subprocess.TimeoutExpired:
-            print("[NET] ⚠ Timeout ao configurar DNS")
-        except Exception as e:
-            print(f"[NET] ⚠ Erro DNS: {e}")
+        self._report_dns(self.ps.run(self._dns_script(provider), timeout=20), provider)
     
     def _disable_nagle(self):
         """Desabilita algoritmo de Nagle para reduzir latência"""
-        try:
-            cmd = '''
-            $adapters = Get-ChildItem "HKLM:\\SYSTEM\\CurrentControlSet\\Services\\Tcpip\\Parameters\\Interfaces"
-            foreach ($adapter in $adapters) {
-                Set-ItemProperty -Path $adapter.PSPath -Name "TcpAckFrequency" -Value 1 -Type DWord -Force -ErrorAction SilentlyContinue
-                Set-ItemProperty -Path $adapter.PSPath -Name "TCPNoDelay" -Value 1 -Type DWord -Force -ErrorAction SilentlyContinue
-            }
-            '''
-            subprocess.run(['powershell', '-Command', cmd], capture_output=True, timeout=10)
+        if self.ps.run(self._NAGLE_SCRIPT, timeout=10).ok:
             print("[NET] ✓ Nagle disabled (micro-lag reduzido)")
-        except:
-            pass
     
     def _optimize_network_buffer(self):
         """Otimiza buffers de rede para gaming"""
-        try:
-            cmd = '''
-            netsh int tcp set global autotuninglevel=normal
-            netsh int tcp set global rss=enabled
-            '''
-            subprocess.run(['cmd', '/c', cmd], capture_output=True, timeout=10)
-        except:
-            pass
+        self.executor.run_many(self._BUFFER_COMMANDS)
     
     def restore_default_dns(self):
         """Restaura DNS para DHCP automático"""
-        try:
-            get_adapter_cmd = '''
-            $adapter = Get-NetAdapter | Where-Object {$_.Status -eq "Up"} | Select-Object -First 1
+        result = self.ps.run('''
+        $adapter = Get-NetAdapter | Where-Object {$_.Status -eq "Up"} | Select-Object -First 1
+        if ($adapter) {
+            Set-DnsClientServerAddress -InterfaceAlias $adapter.Name -ResetServerAddresses
             $adapter.Name
-            '''
-            result = subprocess.run(['powershell', '-Command', get_adapter_cmd], 
-                                    capture_output=True, text=True, timeout=10)
-            adapter_name = result.stdout.strip()
-            
-            if adapter_name:
-                reset_cmd = f'Set-DnsClientServerAddress -InterfaceAlias "{adapter_name}" -ResetServerAddresses'
-                subprocess.run(['powershell', '-Command', reset_cmd], 
-                              capture_output=True, timeout=10)
-                print("[NET] DNS restaurado para DHCP automático")
-        except:
-            pass
+        }
+        ''', timeout=20)
+        if result.ok and result.output.strip():
+            print("[NET] DNS restaurado para DHCP automático")
     
     def get_current_dns(self):
         """Retorna DNS atual"""
-        try:
-            cmd = 'Get-DnsClientServerAddress -AddressFamily IPv4 | Select-Object -ExpandProperty ServerAddresses | Select-Object -First 1'
-            result = subprocess.run(['powershell', '-Command', cmd], 
-                                    capture_output=True, text=True, timeout=5)
-            return result.stdout.strip()
-        except:
-            return "Unknown"
-
+        cmd = 'Get-DnsClientServerAddress -AddressFamily IPv4 | Select-Object -ExpandProperty ServerAddresses | Select-Object -First 1'
+        result = self.ps.run(cmd, timeout=5)
+        return result.output.strip() if result.ok else "Unknown"
 
 if __name__ == "__main__":
     # Teste
@@ -0,0 +1,336 @@
+"""
+NT Process Snapshot - Enumeração de processos com UMA syscall
+NtQuerySystemInformation(SystemProcessInformation) + parse zero-copy do buffer
+(memoryview/struct), sem abrir cada processo como o psutil faz
+"""
+import ctypes
+import struct
+import sys
+import time
+from ctypes import wintypes
+from typing import NamedTuple
+
+SystemProcessInformation = 5
+STATUS_INFO_LENGTH_MISMATCH = 0xC0000004
+
+# FILETIME (100ns desde 1601) -> epoch Unix
+EPOCH_DIFF_100NS = 116444736000000000
+
+# Layout x64 de SYSTEM_PROCESS_INFORMATION (offsets em bytes)
+SPI_NEXT_ENTRY = 0          # ULONG NextEntryOffset
+SPI_THREADS = 4             # ULONG NumberOfThreads
+SPI_CREATE_TIME = 32        # LARGE_INTEGER CreateTime
+SPI_USER_TIME = 40          # LARGE_INTEGER UserTime
+SPI_KERNEL_TIME = 48        # LARGE_INTEGER KernelTime
+SPI_NAME_LENGTH = 56        # UNICODE_STRING.Length (bytes)
+SPI_NAME_BUFFER = 64        # UNICODE_STRING.Buffer (ponteiro)
+SPI_BASE_PRIORITY = 72      # KPRIORITY BasePriority
+SPI_PID = 80                # HANDLE UniqueProcessId
+SPI_PARENT_PID = 88         # HANDLE InheritedFromUniqueProcessId
+SPI_HANDLES = 96            # ULONG HandleCount
+SPI_SESSION = 100           # ULONG SessionId
+SPI_WORKING_SET = 144       # SIZE_T WorkingSetSize
+SPI_PRIVATE = 200           # SIZE_T PrivatePageCount
+SPI_SIZE = 256              # Tamanho da estrutura (threads vêm depois)
+
+# BasePriority -> classe de prioridade (mesmos valores de psutil.*_PRIORITY_CLASS)
+BASE_PRIORITY_TO_CLASS = {
+    4: 0x40,        # IDLE_PRIORITY_CLASS
+    6: 0x4000,      # BELOW_NORMAL_PRIORITY_CLASS
+    8: 0x20,        # NORMAL_PRIORITY_CLASS
+    10: 0x8000,     # ABOVE_NORMAL_PRIORITY_CLASS
+    13: 0x80,       # HIGH_PRIORITY_CLASS
+    24: 0x100,      # REALTIME_PRIORITY_CLASS
+}
+
+
+class NtProcessRecord(NamedTuple):
+    """Dados de um processo lidos do buffer"""
+    pid: int
+    parent_pid: int
+    name: str
+    create_time: float      # epoch Unix (0 para System/Idle)
+    user_time: float        # segundos
+    kernel_time: float      # segundos
+    working_set: int        # bytes
+    private_bytes: int      # bytes
+    thread_count: int
+    handle_count: int
+    session_id: int
+    priority_class: int     # Mesmo valor de psutil.Process.nice() no Windows
+
+
+def _filetime_to_unix(ft):
+    return (ft - EPOCH_DIFF_100NS) / 1e7 if ft else 0.0
+
+
+def parse_process_buffer(buffer, base_address=0):
+    """
+    Faz o parse do buffer de SystemProcessInformation.
+    base_address: endereço do buffer na memória (os nomes são ponteiros
+    absolutos para dentro do próprio buffer). Buffers gravados usam 0.
+    Retorna dict pid -> NtProcessRecord.
+    """
+    view = memoryview(buffer)
+    size = len(view)
+    records = {}
+    offset = 0
+
+    while offset + SPI_SIZE <= size:
+        (next_entry, threads) = struct.unpack_from('<II', view, offset + SPI_NEXT_ENTRY)
+        (create_ft, user_t, kernel_t) = struct.unpack_from('<qqq', view, offset + SPI_CREATE_TIME)
+        (name_len,) = struct.unpack_from('<H', view, offset + SPI_NAME_LENGTH)
+        (name_ptr,) = struct.unpack_from('<Q', view, offset + SPI_NAME_BUFFER)
+        (base_prio,) = struct.unpack_from('<i', view, offset + SPI_BASE_PRIORITY)
+        (pid, ppid) = struct.unpack_from('<QQ', view, offset + SPI_PID)
+        (handles, session) = struct.unpack_from('<II', view, offset + SPI_HANDLES)
+        (working_set,) = struct.unpack_from('<Q', view, offset + SPI_WORKING_SET)
+        (private,) = struct.unpack_from('<Q', view, offset + SPI_PRIVATE)
+
+        if name_ptr and name_len:
+            start = name_ptr - base_address
+            name = bytes(view[start:start + name_len]).decode('utf-16-le', errors='replace')
+        else:
+            name = 'System Idle Process' if pid == 0 else ''
+
+        records[pid] = NtProcessRecord(
+            pid=pid,
+            parent_pid=ppid,
+            name=name,
+            create_time=_filetime_to_unix(create_ft),
+            user_time=user_t / 1e7,
+            kernel_time=kernel_t / 1e7,
+            working_set=working_set,
+            private_bytes=private,
+            thread_count=threads,
+            handle_count=handles,
+            session_id=session,
+            priority_class=BASE_PRIORITY_TO_CLASS.get(base_prio, 0x20),
+        )
+
+        if next_entry == 0:
+            break
+        offset += next_entry
+
+    return records
+
+
+def build_snapshot_buffer(processes):
+    """
+    Monta um buffer no mesmo layout do kernel (base_address = 0).
+    processes: lista de dicts com pid, parent_pid, name e opcionais
+    (create_time, user_time, kernel_time, working_set, private_bytes,
+    thread_count, handle_count, session_id, base_priority).
+    Usado pelo backend gravado para testes/benchmark fora do Windows.
+    """
+    entries = []
+    for proc in processes:
+        name_bytes = proc.get('name', '').encode('utf-16-le')
+        # Threads reais (80 bytes cada) são puladas pelo parser via NextEntryOffset
+        body_size = SPI_SIZE + 80 * proc.get('thread_count', 1)
+        entry_size = (body_size + len(name_bytes) + 2 + 7) & ~7
+        entries.append((proc, name_bytes, body_size, entry_size))
+
+    total = sum(e[3] for e in entries)
+    buf = bytearray(total)
+    offset = 0
+
+    for i, (proc, name_bytes, body_size, entry_size) in enumerate(entries):
+        next_entry = entry_size if i < len(entries) - 1 else 0
+        create_time = proc.get('create_time', 0.0)
+        create_ft = int(create_time * 1e7) + EPOCH_DIFF_100NS if create_time else 0
+        name_offset = offset + body_size
+
+        struct.pack_into('<II', buf, offset + SPI_NEXT_ENTRY, next_entry, proc.get('thread_count', 1))
+        struct.pack_into('<qqq', buf, offset + SPI_CREATE_TIME, create_ft,
+                         int(proc.get('user_time', 0) * 1e7), int(proc.get('kernel_time', 0) * 1e7))
+        struct.pack_into('<HH', buf, offset + SPI_NAME_LENGTH, len(name_bytes), len(name_bytes) + 2)
+        struct.pack_into('<Q', buf, offset + SPI_NAME_BUFFER, name_offset if name_bytes else 0)
+        struct.pack_into('<i', buf, offset + SPI_BASE_PRIORITY, proc.get('base_priority', 8))
+        struct.pack_into('<QQ', buf, offset + SPI_PID, proc['pid'], proc.get('parent_pid', 0))
+        struct.pack_into('<II', buf, offset + SPI_HANDLES, proc.get('handle_count', 0), proc.get('session_id', 0))
+        struct.pack_into('<Q', buf, offset + SPI_WORKING_SET, proc.get('working_set', 0))
+        struct.pack_into('<Q', buf, offset + SPI_PRIVATE, proc.get('private_bytes', 0))
+        buf[name_offset:name_offset + len(name_bytes)] = name_bytes
+
+        offset += entry_size
+
+    return bytes(buf)
+
+
+class NtProcessSnapshotBackend:
+    """Backend real (Windows x64): uma syscall por snapshot"""
+
+    def __init__(self):
+        self.ntdll = ctypes.WinDLL('ntdll')
+        self.kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self.advapi32 = ctypes.WinDLL('advapi32', use_last_error=True)
+        self._buffer = ctypes.create_string_buffer(512 * 1024)
+        self._user_cache = {}       # (pid, create_time) -> username
+        self._sid_cache = {}        # SID string -> DOMAIN\\user
+
+    def _query(self):
+        """Chama NtQuerySystemInformation, aumentando o buffer se preciso"""
+        needed = wintypes.ULONG(0)
+        while True:
+            status = self.ntdll.NtQuerySystemInformation(
+                SystemProcessInformation,
+                self._buffer,
+                ctypes.sizeof(self._buffer),
+                ctypes.byref(needed)
+            ) & 0xFFFFFFFF
+            if status == STATUS_INFO_LENGTH_MISMATCH:
+                # Margem para processos criados entre as chamadas
+                self._buffer = ctypes.create_string_buffer(needed.value + 64 * 1024)
+                continue
+            if status != 0:
+                raise OSError(f"NtQuerySystemInformation falhou: 0x{status:08X}")
+            return needed.value
+
+    def snapshot(self):
+        """Retorna dict pid -> NtProcessRecord"""
+        used = self._query()
+        view = memoryview(self._buffer)[:used]
+        return parse_process_buffer(view, ctypes.addressof(self._buffer))
+
+    def record_to_file(self, path):
+        """Grava o buffer bruto (para o backend gravado / benchmark)"""
+        used = self._query()
+        with open(path, 'wb') as f:
+            f.write(struct.pack('<Q', ctypes.addressof(self._buffer)))
+            f.write(self._buffer.raw[:used])
+
+    def username(self, pid, create_time=None):
+        """DOMAIN\\user do processo (cache por processo e por SID)"""
+        key = (pid, create_time)
+        if key in self._user_cache:
+            return self._user_cache[key]
+
+        user = ''
+        sid = self._process_sid(pid)
+        if sid:
+            user = self._sid_cache.get(sid)
+            if user is None:
+                user = self._lookup_sid(sid)
+                self._sid_cache[sid] = user
+        self._user_cache[key] = user
+        return user
+
+    def forget(self, pid, create_time=None):
+        """Remove processo encerrado do cache de usuários"""
+        self._user_cache.pop((pid, create_time), None)
+
+    def _process_sid(self, pid):
+        """SID (string) do token do processo"""
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        TOKEN_QUERY = 0x0008
+        TokenUser = 1
+
+        handle = self.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        token = wintypes.HANDLE()
+        try:
+            if not self.advapi32.OpenProcessToken(handle, TOKEN_QUERY, ctypes.byref(token)):
+                return None
+            size = wintypes.DWORD(0)
+            self.advapi32.GetTokenInformation(token, TokenUser, None, 0, ctypes.byref(size))
+            buf = ctypes.create_string_buffer(size.value)
+            if not self.advapi32.GetTokenInformation(token, TokenUser, buf, size, ctypes.byref(size)):
+                return None
+            # TOKEN_USER.User.Sid é o primeiro campo (ponteiro)
+            psid = ctypes.c_void_p.from_buffer(buf).value
+            string_sid = wintypes.LPWSTR()
+            if not self.advapi32.ConvertSidToStringSidW(ctypes.c_void_p(psid), ctypes.byref(string_sid)):
+                return None
+            try:
+                return string_sid.value
+            finally:
+                self.kernel32.LocalFree(string_sid)
+        finally:
+            if token:
+                self.kernel32.CloseHandle(token)
+            self.kernel32.CloseHandle(handle)
+
+    def _lookup_sid(self, string_sid):
+        """Converte SID em DOMAIN\\user (LookupAccountSid é a parte cara)"""
+        psid = ctypes.c_void_p()
+        if not self.advapi32.ConvertStringSidToSidW(string_sid, ctypes.byref(psid)):
+            return ''
+        try:
+            name = ctypes.create_unicode_buffer(256)
+            domain = ctypes.create_unicode_buffer(256)
+            name_size = wintypes.DWORD(256)
+            domain_size = wintypes.DWORD(256)
+            sid_type = wintypes.DWORD()
+            if not self.advapi32.LookupAccountSidW(None, psid, name, ctypes.byref(name_size),
+                                                   domain, ctypes.byref(domain_size),
+                                                   ctypes.byref(sid_type)):
+                return ''
+            return f"{domain.value}\\{name.value}" if domain.value else name.value
+        finally:
+            self.kernel32.LocalFree(psid)
+
+
+class RecordedSnapshotBackend:
+    """Backend gravado: reproduz buffers salvos (testes/benchmark no Linux)"""
+
+    def __init__(self, buffers, base_address=0, usernames=None):
+        """
+        buffers: bytes ou lista de bytes (cada snapshot() avança para o próximo,
+        repetindo o último)
+        usernames: dict pid -> username
+        """
+        self._buffers = [buffers] if isinstance(buffers, (bytes, bytearray)) else list(buffers)
+        self.base_address = base_address
+        self.usernames = usernames or {}
+        self._index = 0
+
+    @classmethod
+    def from_file(cls, path, usernames=None):
+        """Carrega buffer gravado por NtProcessSnapshotBackend.record_to_file()"""
+        with open(path, 'rb') as f:
+            (base_address,) = struct.unpack('<Q', f.read(8))
+            return cls(f.read(), base_address=base_address, usernames=usernames)
+
+    def snapshot(self):
+        buffer = self._buffers[min(self._index, len(self._buffers) - 1)]
+        self._index += 1
+        return parse_process_buffer(buffer, self.base_address)
+
+    def username(self, pid, create_time=None):
+        return self.usernames.get(pid, '')
+
+    def forget(self, pid, create_time=None):
+        pass
+
+
+def get_backend():
+    """Backend nativo quando disponível (Windows 64-bit), senão None (usa psutil)"""
+    if sys.platform != 'win32' or struct.calcsize('P') != 8:
+        return None
+    try:
+        return NtProcessSnapshotBackend()
+    except Exception as e:
+        print(f"[PROCS] Backend NtQuerySystemInformation indisponível: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    # Benchmark do parser com buffer sintético (funciona em qualquer SO)
+    fake = [{'pid': 4 * i, 'parent_pid': 4, 'name': f'proc{i}.exe',
+             'create_time': time.time() - i, 'thread_count': 12,
+             'working_set': 50 * 1024 * 1024} for i in range(1, 501)]
+    backend = RecordedSnapshotBackend(build_snapshot_buffer(fake))
+
+    start = time.perf_counter()
+    for _ in range(100):
+        records = backend.snapshot()
+    elapsed = (time.perf_counter() - start) / 100
+    print(f"{len(records)} processos parseados em {elapsed * 1000:.2f}ms por snapshot")
+
+    native = get_backend()
+    if native:
+        start = time.perf_counter()
+        records = native.snapshot()
+        print(f"Nativo: {len(records)} processos em {(time.perf_counter() - start) * 1000:.2f}ms")
@@ -2,18 +2,19 @@
 NVMe/SSD Manager
 Otimizações específicas para drives de estado sólido (NVMe/SATA SSD)
 """
-import subprocess
-import threading
-import time
 import ctypes
 import sys
+from modules import scheduler
+from modules import powershell_host
+from modules import command_executor
+from modules import power_settings
 
 class NVMeManager:
     def __init__(self, config=None):
         self.config = config or {}
         self.trim_interval = self.config.get('trim_interval_hours', 24) * 3600
         self.running = False
-        self.thread = None
+        self.executor = command_executor.get_executor()
 
     def apply_filesystem_optimizations(self):
         """Aplica otimizações de sistema de arquivos (NTFS)"""
@@ -23,13 +24,13 @@ class NVMeManager:
         # fsutil behavior set disablelastaccess 1
         try:
             # Check current status
-            check = subprocess.run(['fsutil', 'behavior', 'query', 'DisableLastAccess'], 
-                                 capture_output=True, text=True)
+            check = self.executor.run(['fsutil', 'behavior', 'query', 'DisableLastAccess'],
+                                      cache_ttl=60)
             
             if " = 1" not in check.stdout:
                 print("[NVMe] Desativando 'Last Access Update' (Otimizando IOPS)...")
-                subprocess.run(['fsutil', 'behavior', 'set', 'DisableLastAccess', '1'], 
-                             capture_output=True)
+                self.executor.run(['fsutil', 'behavior', 'set', 'DisableLastAccess', '1'])
+                self.executor.invalidate(['fsutil', 'behavior', 'query'])
                 print("[NVMe] ✓ Last Access Update desativado")
             else:
                 print("[NVMe] ✓ Last Access Update já estava otimizado")
@@ -41,10 +42,15 @@ class NVMeManager:
         """Impede que o SSD entre em suspensão (Evita APST Lag)"""
         try:
             print("[NVMe] Configurando Plano de Energia (Disco: Nunca suspender)...")
-            # AC (Tomada)
-            subprocess.run(['powercfg', '/change', 'disk-timeout-ac', '0'], capture_output=True)
-            # DC (Bateria - opcional, mas bom para performance)
-            subprocess.run(['powercfg', '/change', 'disk-timeout-dc', '0'], capture_output=True)
+            # AC (Tomada) e DC (Bateria - opcional, mas bom para performance): 0 = nunca
+            power = power_settings.get_settings()
+            if power.available:
+                power.set(power_settings.SUB_DISK, power_settings.DISKIDLE, 0, ac=True, dc=True)
+            else:
+                self.executor.run_many([
+                    ['powercfg', '/change', 'disk-timeout-ac', '0'],
+                    ['powercfg', '/change', 'disk-timeout-dc', '0'],
+                ])
             print("[NVMe] ✓ Suspensão de disco desativada")
         except Exception as e:
             print(f"[NVMe] Erro ao configurar energia: {e}")
@@ -56,7 +62,10 @@ class NVMeManager:
             # ReTrim é rápido e seguro. Defrag é bloqueado pelo Windows em SSDs automaticamente.
             # Removed -Verbose to prevent dashboard glitches
             cmd = "Optimize-Volume -DriveLetter C -ReTrim"
-            subprocess.run(["powershell", "-Command", cmd], capture_output=True)
+            result = powershell_host.get_pool().run(cmd, timeout=600)
+            if not result.ok:
+                print(f"[NVMe] ⚠ TRIM: {result.error}")
+                return False
             print("[NVMe] ✓ TRIM executado com sucesso")
             return True
         except Exception as e:
@@ -69,25 +78,13 @@ class NVMeManager:
         
         self.running = True
         
-        def trim_loop():
-            # Executa um TRIM logo na inicialização
-            time.sleep(10) # Aguarda sistema estabilizar
-            self.run_retrim()
-            
-            while self.running:
-                # Aguarda intervalo (padrão 24h)
-                for _ in range(int(self.trim_interval / 10)):
-                    if not self.running: break
-                    time.sleep(10)
-                
-                if self.running:
-                    self.run_retrim()
-        
-        self.thread = threading.Thread(target=trim_loop, daemon=True)
-        self.thread.start()
+        # Primeiro TRIM 10s após a inicialização (sistema estabilizar), depois a cada
+        # trim_interval (padrão 24h). Roda em thread própria: o TRIM pode demorar.
+        sched = scheduler.get_scheduler()
+        sched.add_job('nvme_trim', self.run_retrim, self.trim_interval,
+                      first_delay=10, power_aware=False, threaded=True)
         print(f"[NVMe] Agendador de TRIM iniciado (Intervalo: {self.trim_interval/3600:.1f}h)")
 
     def stop(self):
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=1)
+        scheduler.get_scheduler().cancel('nvme_trim')
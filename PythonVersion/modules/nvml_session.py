@@ -0,0 +1,348 @@
+"""
+NVML Session - Sessão NVIDIA única para todo o otimizador
+- nvmlInit uma vez, todas as GPUs enumeradas uma vez (handles em cache)
+- Uma passada em lote por tick: uso, temperatura, memória, energia e clocks
+  de todas as GPUs, compartilhada por todos os consumidores (max_age)
+- Campos não suportados pelo driver são marcados e não consultados de novo
+Inclui um módulo NVML falso para testes sem GPU
+"""
+import threading
+import time
+from typing import NamedTuple, Tuple
+
+NVML_TEMPERATURE_GPU = 0
+NVML_CLOCK_GRAPHICS = 0
+NVML_CLOCK_MEM = 2
+
+
+class GpuDevice(NamedTuple):
+    """GPU enumerada (handle reutilizado entre passadas)"""
+    index: int
+    handle: object
+    name: str
+
+
+class GpuStats(NamedTuple):
+    """Estatísticas de uma GPU em uma passada"""
+    index: int
+    name: str
+    gpu_util: float          # %
+    mem_util: float          # % (controlador de memória)
+    temperature: float       # °C
+    mem_used: int            # bytes
+    mem_total: int           # bytes
+    power_w: float
+    power_limit_w: float
+    clock_graphics_mhz: int
+    clock_mem_mhz: int
+    timestamp: float
+
+
+class GpuProcess(NamedTuple):
+    """Processo usando uma GPU (gráfico e/ou compute)"""
+    gpu_index: int
+    pid: int
+    used_bytes: int          # 0 = desconhecido (driver WDDM nem sempre informa)
+
+
+def _decode(name):
+    return name.decode('utf-8') if isinstance(name, bytes) else name
+
+
+class NvmlSession:
+    """Dona do nvmlInit e dos handles; coleta estatísticas de todas as GPUs em lote"""
+
+    def __init__(self, nvml=None, max_age=0.5):
+        self._nvml = nvml           # Módulo pynvml (ou fake); importado sob demanda
+        self.max_age = max_age      # Passadas mais novas que isso são reaproveitadas
+        self.devices = ()
+        self.initialized = False
+        self.error = None
+        self.passes = 0             # Passadas reais no driver
+        self._stats = ()
+        self._sampled_at = 0.0
+        self._unsupported = set()   # (índice, campo) que o driver recusou
+        self._lock = threading.Lock()
+        self._started = False
+
+    @property
+    def nvml(self):
+        """Módulo NVML da sessão (para chamadas de escrita, ex.: power limit)"""
+        self.start()
+        return self._nvml
+
+    def start(self):
+        """Inicializa NVML e enumera as GPUs (idempotente)"""
+        with self._lock:
+            if self._started:
+                return self.initialized
+            self._started = True
+            try:
+                if self._nvml is None:
+                    import pynvml
+                    self._nvml = pynvml
+                self._nvml.nvmlInit()
+                devices = []
+                for index in range(self._nvml.nvmlDeviceGetCount()):
+                    handle = self._nvml.nvmlDeviceGetHandleByIndex(index)
+                    devices.append(GpuDevice(index, handle, _decode(self._nvml.nvmlDeviceGetName(handle))))
+                self.devices = tuple(devices)
+                self.initialized = True
+            except Exception as e:
+                self.error = e
+                self.initialized = False
+            return self.initialized
+
+    def shutdown(self):
+        """Encerra a sessão NVML"""
+        with self._lock:
+            if self.initialized:
+                try:
+                    self._nvml.nvmlShutdown()
+                except Exception:
+                    pass
+            self.initialized = False
+            self._started = False
+            self.devices = ()
+            self._stats = ()
+
+    @property
+    def available(self):
+        return self.start() and bool(self.devices)
+
+    @property
+    def count(self):
+        self.start()
+        return len(self.devices)
+
+    def handle(self, index=0):
+        """Handle em cache da GPU `index` (None se não existir)"""
+        self.start()
+        return self.devices[index].handle if index < len(self.devices) else None
+
+    def name(self, index=0):
+        self.start()
+        return self.devices[index].name if index < len(self.devices) else ''
+
+    # === Coleta em lote ===
+
+    def sample(self, max_age=None) -> Tuple[GpuStats, ...]:
+        """
+        Estatísticas de todas as GPUs. Reaproveita a última passada se ela
+        tiver menos de max_age segundos (padrão: self.max_age).
+        """
+        if not self.available:
+            return ()
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            if self._stats and time.time() - self._sampled_at < max_age:
+                return self._stats
+            now = time.time()
+            self._stats = tuple(self._read_device(device, now) for device in self.devices)
+            self._sampled_at = now
+            self.passes += 1
+            return self._stats
+
+    def get(self, index=0, max_age=None):
+        """Estatísticas de uma GPU (None se não existir)"""
+        stats = self.sample(max_age)
+        return stats[index] if index < len(stats) else None
+
+    def processes(self, index=None):
+        """
+        Processos com memória de vídeo alocada (todas as GPUs ou só `index`).
+        Gráfico e compute somados por PID; não entra na passada em lote
+        (só quem atribui VRAM por processo precisa disto).
+        """
+        if not self.available:
+            return ()
+        result = []
+        for device in self.devices:
+            if index is not None and device.index != index:
+                continue
+            used = {}
+            for field, read in (('graphics_processes', self._nvml.nvmlDeviceGetGraphicsRunningProcesses),
+                                ('compute_processes', self._nvml.nvmlDeviceGetComputeRunningProcesses)):
+                for proc in self._field(device, field, read, ()) or ():
+                    used[proc.pid] = used.get(proc.pid, 0) + (proc.usedGpuMemory or 0)
+            result.extend(GpuProcess(device.index, pid, amount) for pid, amount in used.items())
+        return tuple(result)
+
+    def _field(self, device, field, read, default):
+        """Lê um campo; se o driver não suportar, não pergunta mais"""
+        key = (device.index, field)
+        if key in self._unsupported:
+            return default
+        try:
+            return read(device.handle)
+        except Exception as e:
+            if type(e).__name__ in ('NVMLError_NotSupported', 'NVMLError_NoPermission'):
+                self._unsupported.add(key)
+            return default
+
+    def _read_device(self, device, now):
+        nvml = self._nvml
+        util = self._field(device, 'util', nvml.nvmlDeviceGetUtilizationRates, None)
+        mem = self._field(device, 'memory', nvml.nvmlDeviceGetMemoryInfo, None)
+        return GpuStats(
+            index=device.index,
+            name=device.name,
+            gpu_util=float(util.gpu) if util else 0.0,
+            mem_util=float(util.memory) if util else 0.0,
+            temperature=float(self._field(
+                device, 'temperature',
+                lambda h: nvml.nvmlDeviceGetTemperature(h, NVML_TEMPERATURE_GPU), 0)),
+            mem_used=mem.used if mem else 0,
+            mem_total=mem.total if mem else 0,
+            power_w=self._field(device, 'power', nvml.nvmlDeviceGetPowerUsage, 0) / 1000,
+            power_limit_w=self._field(device, 'power_limit', nvml.nvmlDeviceGetPowerManagementLimit, 0) / 1000,
+            clock_graphics_mhz=self._field(
+                device, 'clock_graphics', lambda h: nvml.nvmlDeviceGetClockInfo(h, NVML_CLOCK_GRAPHICS), 0),
+            clock_mem_mhz=self._field(
+                device, 'clock_mem', lambda h: nvml.nvmlDeviceGetClockInfo(h, NVML_CLOCK_MEM), 0),
+            timestamp=now,
+        )
+
+
+class _Utilization:
+    def __init__(self, gpu, memory):
+        self.gpu = gpu
+        self.memory = memory
+
+
+class _MemoryInfo:
+    def __init__(self, total, used):
+        self.total = total
+        self.used = used
+        self.free = total - used
+
+
+class _ProcessInfo:
+    def __init__(self, pid, used):
+        self.pid = pid
+        self.usedGpuMemory = used
+
+
+class FakeNVML:
+    """
+    Substituto do pynvml para testes: GPUs descritas por dicionários,
+    contagem de chamadas ao "driver" e power limit gravável.
+    """
+
+    NVML_TEMPERATURE_GPU = NVML_TEMPERATURE_GPU
+    NVML_CLOCK_GRAPHICS = NVML_CLOCK_GRAPHICS
+    NVML_CLOCK_MEM = NVML_CLOCK_MEM
+
+    class NVMLError(Exception):
+        pass
+
+    class NVMLError_NotSupported(NVMLError):
+        pass
+
+    class NVMLError_NoPermission(NVMLError):
+        pass
+
+    def __init__(self, gpus=None):
+        self.gpus = gpus if gpus is not None else [
+            {'name': 'NVIDIA GeForce RTX 3050 Laptop GPU', 'util': 35, 'mem_util': 20, 'temp': 62,
+             'mem_total': 4 << 30, 'mem_used': 1 << 30, 'power_mw': 45000, 'limit_mw': 60000, 'default_limit_mw': 60000,
+             'min_limit_mw': 30000, 'max_limit_mw': 80000, 'clock_graphics': 1500, 'clock_mem': 6000},
+        ]
+        self.calls = 0
+        self.initialized = False
+
+    def _gpu(self, handle):
+        self.calls += 1
+        if not self.initialized:
+            raise self.NVMLError("NVML not initialized")
+        return self.gpus[handle]
+
+    def _value(self, handle, key):
+        value = self._gpu(handle).get(key)
+        if value is None:
+            raise self.NVMLError_NotSupported(key)
+        return value
+
+    def nvmlInit(self):
+        self.initialized = True
+
+    def nvmlShutdown(self):
+        self.initialized = False
+
+    def nvmlDeviceGetCount(self):
+        self.calls += 1
+        return len(self.gpus)
+
+    def nvmlDeviceGetHandleByIndex(self, index):
+        self._gpu(index)
+        return index
+
+    def nvmlDeviceGetName(self, handle):
+        return self._gpu(handle)['name'].encode('utf-8')
+
+    def nvmlDeviceGetUtilizationRates(self, handle):
+        gpu = self._gpu(handle)
+        return _Utilization(gpu.get('util', 0), gpu.get('mem_util', 0))
+
+    def nvmlDeviceGetTemperature(self, handle, sensor):
+        return self._value(handle, 'temp')
+
+    def nvmlDeviceGetMemoryInfo(self, handle):
+        gpu = self._gpu(handle)
+        return _MemoryInfo(gpu.get('mem_total', 0), gpu.get('mem_used', 0))
+
+    def nvmlDeviceGetPowerUsage(self, handle):
+        return self._value(handle, 'power_mw')
+
+    def nvmlDeviceGetPowerManagementLimit(self, handle):
+        return self._value(handle, 'limit_mw')
+
+    def nvmlDeviceGetPowerManagementDefaultLimit(self, handle):
+        return self._value(handle, 'default_limit_mw')
+
+    def nvmlDeviceGetPowerManagementLimitConstraints(self, handle):
+        return self._value(handle, 'min_limit_mw'), self._value(handle, 'max_limit_mw')
+
+    def nvmlDeviceSetPowerManagementLimit(self, handle, limit_mw):
+        gpu = self._gpu(handle)
+        if 'max_limit_mw' not in gpu:
+            raise self.NVMLError_NotSupported('power limit')
+        gpu['limit_mw'] = max(gpu.get('min_limit_mw', 0), min(gpu['max_limit_mw'], int(limit_mw)))
+
+    def nvmlDeviceGetGraphicsRunningProcesses(self, handle):
+        return [_ProcessInfo(pid, used) for pid, used in self._gpu(handle).get('processes', [])]
+
+    def nvmlDeviceGetComputeRunningProcesses(self, handle):
+        return [_ProcessInfo(pid, used) for pid, used in self._gpu(handle).get('compute_processes', [])]
+
+    def nvmlDeviceGetClockInfo(self, handle, clock_type):
+        return self._value(handle, 'clock_mem' if clock_type == NVML_CLOCK_MEM else 'clock_graphics')
+
+
+# Singleton global
+_instance = None
+
+def get_session() -> NvmlSession:
+    """Retorna instância singleton da NvmlSession"""
+    global _instance
+    if _instance is None:
+        _instance = NvmlSession()
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste com duas GPUs falsas (uma sem leitura de energia)
+    fake = FakeNVML()
+    fake.gpus.append({'name': 'NVIDIA RTX A2000', 'util': 80, 'temp': 71,
+                      'mem_total': 6 << 30, 'mem_used': 3 << 30, 'clock_graphics': 1200, 'clock_mem': 7000})
+    session = NvmlSession(nvml=fake)
+    for stats in session.sample():
+        print(f"GPU {stats.index} {stats.name}: {stats.gpu_util:.0f}% {stats.temperature:.0f}°C "
+              f"{stats.mem_used >> 20}/{stats.mem_total >> 20}MB {stats.power_w:.1f}W "
+              f"{stats.clock_graphics_mhz}/{stats.clock_mem_mhz}MHz")
+
+    calls = fake.calls
+    for _ in range(5):
+        session.sample()   # Mesmo tick: reaproveita a passada
+    session.sample(max_age=0)
+    print(f"Chamadas ao driver na segunda passada: {fake.calls - calls} | passadas: {session.passes}")
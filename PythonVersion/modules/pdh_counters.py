@@ -0,0 +1,458 @@
+"""
+PDH Counters - Contadores de desempenho do Windows em lote (ctypes/pdh.dll)
+- Todos os contadores registrados UMA vez numa query (nomes em inglês via
+  PdhAddEnglishCounterW: funciona em Windows pt-BR)
+- Um único PdhCollectQueryData por tick
+- Valores brutos lidos com PdhGetRawCounterValue/Array; taxas, médias e
+  timers calculados aqui a partir de duas amostras (sem PdhGetFormatted*)
+- Backend gravado (amostras brutas) para testes fora do Windows
+"""
+import ctypes
+import re
+import sys
+import threading
+import time
+from ctypes import wintypes
+from typing import NamedTuple
+
+from modules import scheduler
+
+# Tipos de cálculo (a partir de duas amostras brutas)
+RAW = 'raw'                     # Valor instantâneo (bytes, fila)
+RATE = 'rate'                   # Δvalor / Δtempo (por segundo)
+AVERAGE = 'average'             # Δvalor / Δbase (% Processor Performance)
+AVERAGE_TIMER = 'average_timer' # (Δvalor / frequência) / Δbase (Avg. Disk sec/Transfer)
+TIMER_100NS = 'timer_100ns'     # 100 · Δvalor / Δtempo (GPU Engine Utilization)
+
+PDH_MORE_DATA = 0x800007D2
+PDH_CSTATUS_VALID_DATA = 0
+PDH_CSTATUS_NEW_DATA = 1
+
+
+class RawValue(NamedTuple):
+    """Amostra bruta de um contador (PDH_RAW_COUNTER)"""
+    first: int
+    second: int
+    timestamp: int          # FILETIME (100ns)
+
+
+class CounterSpec(NamedTuple):
+    """Contador a registrar"""
+    name: str
+    path: str               # Caminho em inglês; '(*)' = todas as instâncias
+    kind: str = RAW
+    scale: float = 1.0
+    aggregate: object = None  # callable({instância: valor}) -> valor (só para '(*)')
+
+
+_GPU_ENGINE_RE = re.compile(r'luid_(0x[0-9a-fA-F]+_0x[0-9a-fA-F]+).*engtype_(\w+)')
+_GPU_ADAPTER_RE = re.compile(r'luid_(0x[0-9a-fA-F]+_0x[0-9a-fA-F]+)')
+
+
+def gpu_engines_by_adapter(instances):
+    """
+    GPU Engine(*): soma os processos por (adaptador, tipo de engine) e
+    devolve {luid: {engtype: %}}
+    """
+    adapters = {}
+    for instance, value in instances.items():
+        match = _GPU_ENGINE_RE.search(instance)
+        if not match:
+            continue
+        engines = adapters.setdefault(match.group(1), {})
+        engines[match.group(2)] = engines.get(match.group(2), 0.0) + value
+    return adapters
+
+
+def by_adapter(instances):
+    """GPU Adapter Memory(*): {luid: valor}"""
+    result = {}
+    for instance, value in instances.items():
+        match = _GPU_ADAPTER_RE.search(instance)
+        if match:
+            result[match.group(1)] = result.get(match.group(1), 0) + value
+    return result
+
+
+DEFAULT_COUNTERS = (
+    CounterSpec('standby_core', r'\Memory\Standby Cache Core Bytes'),
+    CounterSpec('standby_normal', r'\Memory\Standby Cache Normal Priority Bytes'),
+    CounterSpec('standby_reserve', r'\Memory\Standby Cache Reserve Bytes'),
+    CounterSpec('modified_bytes', r'\Memory\Modified Page List Bytes'),
+    CounterSpec('cache_bytes', r'\Memory\Cache Bytes'),
+    CounterSpec('page_reads_s', r'\Memory\Page Reads/sec', RATE),
+    CounterSpec('disk_queue', r'\PhysicalDisk(_Total)\Current Disk Queue Length'),
+    CounterSpec('disk_latency_ms', r'\PhysicalDisk(_Total)\Avg. Disk sec/Transfer', AVERAGE_TIMER, 1000.0),
+    CounterSpec('disk_read_bytes_s', r'\PhysicalDisk(_Total)\Disk Read Bytes/sec', RATE),
+    CounterSpec('cpu_performance', r'\Processor Information(_Total)\% Processor Performance', AVERAGE),
+    CounterSpec('gpu_engines', r'\GPU Engine(*)\Utilization Percentage', TIMER_100NS,
+                aggregate=gpu_engines_by_adapter),
+    CounterSpec('gpu_dedicated_bytes', r'\GPU Adapter Memory(*)\Dedicated Usage', aggregate=by_adapter),
+)
+
+
+class PdhSample(NamedTuple):
+    """Valores calculados em um tick"""
+    timestamp: float
+    values: dict            # nome -> float (ou dict para contadores com '(*)')
+
+    def get(self, name, default=0.0):
+        value = self.values.get(name)
+        return default if value is None else value
+
+    @property
+    def standby_bytes(self):
+        """Lista standby completa (core + normal + reserve)"""
+        return int(self.get('standby_core') + self.get('standby_normal') + self.get('standby_reserve'))
+
+    def adapter_utilization(self):
+        """{luid: % da engine mais ocupada} por adaptador"""
+        return {luid: min(100.0, max(engines.values(), default=0.0))
+                for luid, engines in self.get('gpu_engines', {}).items()}
+
+    def integrated_gpu_percent(self):
+        """
+        Uso da iGPU: adaptador com menos memória dedicada em uso (a iGPU só
+        tem a faixa reservada). Com um só adaptador, é ele.
+        """
+        utilization = self.adapter_utilization()
+        if not utilization:
+            return None
+        dedicated = self.get('gpu_dedicated_bytes', {})
+        luid = min(utilization, key=lambda l: dedicated.get(l, 0))
+        return utilization[luid]
+
+
+def compute(kind, previous, current, timebase):
+    """Valor de um contador a partir de duas amostras brutas (None sem histórico)"""
+    if kind == RAW:
+        return float(current.first)
+    if previous is None:
+        return None
+    d_value = current.first - previous.first
+    d_time = current.timestamp - previous.timestamp
+    if d_value < 0 or d_time <= 0:
+        return None  # Contador zerou (instância recriada) ou amostra repetida
+    if kind == RATE:
+        return d_value / (d_time / 1e7)
+    if kind == TIMER_100NS:
+        return 100.0 * d_value / d_time
+    d_base = current.second - previous.second
+    if d_base <= 0:
+        return 0.0
+    if kind == AVERAGE:
+        return d_value / d_base
+    if kind == AVERAGE_TIMER:
+        return (d_value / timebase) / d_base
+    raise ValueError(f"Tipo de contador desconhecido: {kind}")
+
+
+# === Backend nativo (pdh.dll) ===
+
+class FILETIME(ctypes.Structure):
+    _fields_ = [('dwLowDateTime', wintypes.DWORD), ('dwHighDateTime', wintypes.DWORD)]
+
+
+class PDH_RAW_COUNTER(ctypes.Structure):
+    _fields_ = [
+        ('CStatus', wintypes.DWORD),
+        ('TimeStamp', FILETIME),
+        ('FirstValue', ctypes.c_longlong),
+        ('SecondValue', ctypes.c_longlong),
+        ('MultiCount', wintypes.DWORD),
+    ]
+
+
+class PDH_RAW_COUNTER_ITEM_W(ctypes.Structure):
+    _fields_ = [('szName', wintypes.LPWSTR), ('RawValue', PDH_RAW_COUNTER)]
+
+
+def _to_raw(counter):
+    timestamp = (counter.TimeStamp.dwHighDateTime << 32) | counter.TimeStamp.dwLowDateTime
+    return RawValue(counter.FirstValue, counter.SecondValue, timestamp)
+
+
+class PdhBackend:
+    """Query PDH real"""
+
+    name = 'pdh'
+
+    def __init__(self):
+        if sys.platform != 'win32':
+            raise OSError("PDH requer Windows")
+        self.pdh = ctypes.WinDLL('pdh')
+        self.query = wintypes.HANDLE()
+        status = self.pdh.PdhOpenQueryW(None, None, ctypes.byref(self.query))
+        if status != 0:
+            raise OSError(f"PdhOpenQueryW falhou: 0x{status & 0xFFFFFFFF:08X}")
+
+    def add(self, path):
+        handle = wintypes.HANDLE()
+        status = self.pdh.PdhAddEnglishCounterW(self.query, path, None, ctypes.byref(handle))
+        if status != 0:
+            raise OSError(f"0x{status & 0xFFFFFFFF:08X}")
+        return handle
+
+    def timebase(self, handle):
+        value = ctypes.c_longlong(0)
+        if self.pdh.PdhGetCounterTimeBase(handle, ctypes.byref(value)) != 0 or not value.value:
+            return 10_000_000
+        return value.value
+
+    def collect(self):
+        return self.pdh.PdhCollectQueryData(self.query) == 0
+
+    def raw(self, handle):
+        counter = PDH_RAW_COUNTER()
+        counter_type = wintypes.DWORD()
+        status = self.pdh.PdhGetRawCounterValue(handle, ctypes.byref(counter_type), ctypes.byref(counter))
+        if status != 0 or counter.CStatus not in (PDH_CSTATUS_VALID_DATA, PDH_CSTATUS_NEW_DATA):
+            return None
+        return _to_raw(counter)
+
+    def raw_array(self, handle):
+        size = wintypes.DWORD(0)
+        count = wintypes.DWORD(0)
+        status = self.pdh.PdhGetRawCounterArrayW(handle, ctypes.byref(size), ctypes.byref(count), None)
+        if status & 0xFFFFFFFF != PDH_MORE_DATA or not size.value:
+            return {}
+        buffer = ctypes.create_string_buffer(size.value)
+        status = self.pdh.PdhGetRawCounterArrayW(handle, ctypes.byref(size), ctypes.byref(count), buffer)
+        if status != 0:
+            return {}
+        items = ctypes.cast(buffer, ctypes.POINTER(PDH_RAW_COUNTER_ITEM_W))
+        result = {}
+        for i in range(count.value):
+            item = items[i]
+            if item.RawValue.CStatus in (PDH_CSTATUS_VALID_DATA, PDH_CSTATUS_NEW_DATA):
+                result[item.szName] = _to_raw(item.RawValue)
+        return result
+
+    def close(self):
+        if self.query:
+            self.pdh.PdhCloseQuery(self.query)
+            self.query = wintypes.HANDLE()
+
+
+# === Backend gravado ===
+
+# Duas coletas reais (1s de intervalo) recortadas - fixture dos cálculos
+SAMPLE_RECORDING = [
+    {
+        r'\Memory\Standby Cache Core Bytes': RawValue(412_000_000, 0, 133_000_000_000_000_000),
+        r'\Memory\Standby Cache Normal Priority Bytes': RawValue(2_950_000_000, 0, 133_000_000_000_000_000),
+        r'\Memory\Standby Cache Reserve Bytes': RawValue(1_100_000_000, 0, 133_000_000_000_000_000),
+        r'\Memory\Modified Page List Bytes': RawValue(180_000_000, 0, 133_000_000_000_000_000),
+        r'\Memory\Cache Bytes': RawValue(640_000_000, 0, 133_000_000_000_000_000),
+        r'\Memory\Page Reads/sec': RawValue(1_204_500, 0, 133_000_000_000_000_000),
+        r'\PhysicalDisk(_Total)\Current Disk Queue Length': RawValue(1, 0, 133_000_000_000_000_000),
+        r'\PhysicalDisk(_Total)\Avg. Disk sec/Transfer': RawValue(8_000_000, 52_000, 133_000_000_000_000_000),
+        r'\PhysicalDisk(_Total)\Disk Read Bytes/sec': RawValue(90_000_000_000, 0, 133_000_000_000_000_000),
+        r'\Processor Information(_Total)\% Processor Performance': RawValue(5_000_000, 50_000, 133_000_000_000_000_000),
+        r'\GPU Engine(*)\Utilization Percentage': {
+            'pid_4120_luid_0x00000000_0x0000D1F2_phys_0_eng_0_engtype_3D': RawValue(40_000_000, 0, 133_000_000_000_000_000),
+            'pid_880_luid_0x00000000_0x0000D1F2_phys_0_eng_0_engtype_3D': RawValue(10_000_000, 0, 133_000_000_000_000_000),
+            'pid_4120_luid_0x00000000_0x0000E5A1_phys_0_eng_0_engtype_3D': RawValue(70_000_000, 0, 133_000_000_000_000_000),
+        },
+        r'\GPU Adapter Memory(*)\Dedicated Usage': {
+            'luid_0x00000000_0x0000D1F2_phys_0': RawValue(120_000_000, 0, 133_000_000_000_000_000),
+            'luid_0x00000000_0x0000E5A1_phys_0': RawValue(1_800_000_000, 0, 133_000_000_000_000_000),
+        },
+    },
+    {
+        r'\Memory\Standby Cache Core Bytes': RawValue(412_000_000, 0, 133_000_000_010_000_000),
+        r'\Memory\Standby Cache Normal Priority Bytes': RawValue(2_870_000_000, 0, 133_000_000_010_000_000),
+        r'\Memory\Standby Cache Reserve Bytes': RawValue(1_100_000_000, 0, 133_000_000_010_000_000),
+        r'\Memory\Modified Page List Bytes': RawValue(184_000_000, 0, 133_000_000_010_000_000),
+        r'\Memory\Cache Bytes': RawValue(641_000_000, 0, 133_000_000_010_000_000),
+        r'\Memory\Page Reads/sec': RawValue(1_204_560, 0, 133_000_000_010_000_000),
+        r'\PhysicalDisk(_Total)\Current Disk Queue Length': RawValue(3, 0, 133_000_000_010_000_000),
+        r'\PhysicalDisk(_Total)\Avg. Disk sec/Transfer': RawValue(8_360_000, 52_120, 133_000_000_010_000_000),
+        r'\PhysicalDisk(_Total)\Disk Read Bytes/sec': RawValue(90_048_000_000, 0, 133_000_000_010_000_000),
+        r'\Processor Information(_Total)\% Processor Performance': RawValue(5_011_500, 50_100, 133_000_000_010_000_000),
+        r'\GPU Engine(*)\Utilization Percentage': {
+            'pid_4120_luid_0x00000000_0x0000D1F2_phys_0_eng_0_engtype_3D': RawValue(42_000_000, 0, 133_000_000_010_000_000),
+            'pid_880_luid_0x00000000_0x0000D1F2_phys_0_eng_0_engtype_3D': RawValue(11_500_000, 0, 133_000_000_010_000_000),
+            'pid_4120_luid_0x00000000_0x0000E5A1_phys_0_eng_0_engtype_3D': RawValue(79_000_000, 0, 133_000_000_010_000_000),
+        },
+        r'\GPU Adapter Memory(*)\Dedicated Usage': {
+            'luid_0x00000000_0x0000D1F2_phys_0': RawValue(121_000_000, 0, 133_000_000_010_000_000),
+            'luid_0x00000000_0x0000E5A1_phys_0': RawValue(1_810_000_000, 0, 133_000_000_010_000_000),
+        },
+    },
+]
+
+
+class RecordedPdhBackend:
+    """
+    Reproduz coletas gravadas: lista de {caminho: RawValue | {instância: RawValue}}.
+    Cada collect() avança uma amostra (a última se repete).
+    """
+
+    name = 'recorded'
+
+    def __init__(self, samples=None, timebase=10_000_000):
+        self.samples = samples if samples is not None else SAMPLE_RECORDING
+        self._timebase = timebase
+        self.position = -1
+        self.collects = 0
+
+    def add(self, path):
+        if not any(path in sample for sample in self.samples):
+            raise OSError(f"contador não gravado: {path}")
+        return path
+
+    def timebase(self, handle):
+        return self._timebase
+
+    def collect(self):
+        self.collects += 1
+        self.position = min(self.position + 1, len(self.samples) - 1)
+        return True
+
+    def raw(self, handle):
+        value = self.samples[self.position].get(handle)
+        return value if isinstance(value, RawValue) else None
+
+    def raw_array(self, handle):
+        value = self.samples[self.position].get(handle)
+        return dict(value) if isinstance(value, dict) else {}
+
+    def close(self):
+        pass
+
+
+def record_samples(backend, paths, count=2, interval=1.0):
+    """Grava `count` coletas brutas de um backend (para montar fixtures)"""
+    handles = {path: backend.add(path) for path in paths}
+    samples = []
+    for i in range(count):
+        if i:
+            time.sleep(interval)
+        backend.collect()
+        samples.append({path: backend.raw_array(h) if '(*)' in path else backend.raw(h)
+                        for path, h in handles.items()})
+    return samples
+
+
+# === Engine ===
+
+class PdhEngine:
+    """Registra contadores uma vez e calcula todos a cada collect()"""
+
+    JOB_NAME = 'pdh_counters'
+
+    def __init__(self, specs=DEFAULT_COUNTERS, backend=None, interval=1.0):
+        self.specs = tuple(specs)
+        self.interval = interval
+        self.running = False
+        self.backend = backend
+        self.counters = {}          # nome -> (spec, handle, timebase)
+        self.failed = {}            # nome -> erro (contador inexistente nesta máquina)
+        self._previous = {}         # nome -> RawValue | {instância: RawValue}
+        self._sample = PdhSample(0.0, {})
+        self._lock = threading.Lock()
+        self._opened = False
+
+    @property
+    def available(self):
+        self.open()
+        return bool(self.counters)
+
+    def open(self):
+        """Abre a query e registra os contadores (uma vez)"""
+        with self._lock:
+            if self._opened:
+                return
+            self._opened = True
+            try:
+                if self.backend is None:
+                    self.backend = PdhBackend()
+            except Exception as e:
+                self.failed['*'] = e
+                return
+            for spec in self.specs:
+                try:
+                    handle = self.backend.add(spec.path)
+                    self.counters[spec.name] = (spec, handle, self.backend.timebase(handle))
+                except Exception as e:
+                    self.failed[spec.name] = e
+            if self.failed:
+                print(f"[PDH] Contadores indisponíveis: {', '.join(sorted(self.failed))}")
+
+    def collect(self) -> PdhSample:
+        """Uma coleta (PdhCollectQueryData) e o cálculo de todos os contadores"""
+        self.open()
+        with self._lock:
+            if not self.counters or not self.backend.collect():
+                return self._sample
+            values = {}
+            for name, (spec, handle, timebase) in self.counters.items():
+                try:
+                    if '(*)' in spec.path:
+                        current = self.backend.raw_array(handle)
+                        previous = self._previous.get(name) or {}
+                        instances = {}
+                        for instance, raw in current.items():
+                            value = compute(spec.kind, previous.get(instance), raw, timebase)
+                            if value is not None:
+                                instances[instance] = value * spec.scale
+                        values[name] = spec.aggregate(instances) if spec.aggregate else instances
+                    else:
+                        current = self.backend.raw(handle)
+                        if current is None:
+                            continue
+                        value = compute(spec.kind, self._previous.get(name), current, timebase)
+                        if value is not None:
+                            values[name] = value * spec.scale
+                    self._previous[name] = current
+                except Exception:
+                    continue
+            self._sample = PdhSample(time.time(), values)
+            return self._sample
+
+    def get_sample(self, max_age=None) -> PdhSample:
+        """Último resultado; coleta na hora se não houver ou estiver velho"""
+        sample = self._sample
+        if not sample.timestamp or (max_age is not None and time.time() - sample.timestamp > max_age):
+            return self.collect()
+        return sample
+
+    def start(self):
+        """Coleta periódica no scheduler central (taxas precisam de duas amostras)"""
+        if self.running or not self.available:
+            return False
+        self.running = True
+        self.collect()
+        scheduler.get_scheduler().add_job(self.JOB_NAME, self.collect, self.interval)
+        return True
+
+    def stop(self):
+        self.running = False
+        scheduler.get_scheduler().cancel(self.JOB_NAME)
+        if self.backend is not None:
+            self.backend.close()
+
+
+# Singleton global
+_instance = None
+
+def get_engine() -> PdhEngine:
+    """Retorna instância singleton do PdhEngine"""
+    global _instance
+    if _instance is None:
+        _instance = PdhEngine()
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste com as coletas gravadas
+    engine = PdhEngine(backend=RecordedPdhBackend())
+    engine.collect()
+    sample = engine.collect()
+    print(f"Standby: {sample.standby_bytes / 1024**2:.0f}MB | Cache: {sample.get('cache_bytes') / 1024**2:.0f}MB")
+    print(f"Page reads/s: {sample.get('page_reads_s'):.0f} | Disco: fila {sample.get('disk_queue'):.0f}, "
+          f"latência {sample.get('disk_latency_ms'):.2f}ms, leitura {sample.get('disk_read_bytes_s') / 1024**2:.0f}MB/s")
+    print(f"% Processor Performance: {sample.get('cpu_performance'):.1f}%")
+    print(f"GPU por adaptador: {sample.adapter_utilization()} | iGPU: {sample.integrated_gpu_percent():.0f}%")
+    print(f"Coletas: {engine.backend.collects} para {len(engine.counters)} contadores")
@@ -0,0 +1,235 @@
+"""
+Power Settings - Configurações do plano de energia via powrprof (sem powercfg.exe)
+- Leitura/escrita nativa AC e DC (PowerRead/Write*ValueIndex)
+- Cache dos valores atuais com validade (max_age) para leituras
+- Escrita relê o valor do sistema antes: sem mudança é ignorada, mesmo
+  que o plano tenha sido editado por fora (powercfg, Painel de Controle)
+- Transações: várias escritas, UM PowerSetActiveScheme no final
+"""
+import ctypes
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Subgrupos / configurações (GUIDs documentados em winnt.h)
+SUB_PROCESSOR = '54533251-82be-4824-96c1-47b60b740d00'
+PROCTHROTTLEMAX = 'bc5038f7-23e0-4960-96da-33abaf5935ec'
+PROCTHROTTLEMIN = '893dee8e-2bef-41e0-89c6-b55d0929964c'
+SUB_DISK = '0012ee47-9041-4b5d-9b77-535fba8b1442'
+DISKIDLE = '6738e2c4-e8a5-4a42-b16a-e040e769756e'
+
+
+class GUID(ctypes.Structure):
+    _fields_ = [
+        ("Data1", ctypes.c_uint32),
+        ("Data2", ctypes.c_uint16),
+        ("Data3", ctypes.c_uint16),
+        ("Data4", ctypes.c_ubyte * 8),
+    ]
+
+    @classmethod
+    def from_string(cls, text):
+        return cls.from_buffer_copy(uuid.UUID(text).bytes_le)
+
+    def __str__(self):
+        return str(uuid.UUID(bytes_le=bytes(self)))
+
+
+class PowrProfBackend:
+    """Chamadas diretas à powrprof.dll"""
+
+    name = 'powrprof'
+
+    def __init__(self):
+        self.powrprof = ctypes.WinDLL('powrprof')
+        self.kernel32 = ctypes.WinDLL('kernel32')
+        guid_p = ctypes.POINTER(GUID)
+        self.powrprof.PowerGetActiveScheme.argtypes = [ctypes.c_void_p, ctypes.POINTER(guid_p)]
+        self.powrprof.PowerSetActiveScheme.argtypes = [ctypes.c_void_p, guid_p]
+        for name in ('PowerReadACValueIndex', 'PowerReadDCValueIndex'):
+            getattr(self.powrprof, name).argtypes = [
+                ctypes.c_void_p, guid_p, guid_p, guid_p, ctypes.POINTER(ctypes.c_uint32)]
+        for name in ('PowerWriteACValueIndex', 'PowerWriteDCValueIndex'):
+            getattr(self.powrprof, name).argtypes = [
+                ctypes.c_void_p, guid_p, guid_p, guid_p, ctypes.c_uint32]
+
+    @staticmethod
+    def _check(status, what):
+        if status != 0:
+            raise OSError(status, f"{what} falhou (código {status})")
+
+    def active_scheme(self):
+        ptr = ctypes.POINTER(GUID)()
+        self._check(self.powrprof.PowerGetActiveScheme(None, ctypes.byref(ptr)), 'PowerGetActiveScheme')
+        try:
+            return str(ptr.contents)
+        finally:
+            self.kernel32.LocalFree(ptr)
+
+    def read(self, scheme, subgroup, setting, ac=True):
+        value = ctypes.c_uint32(0)
+        func = self.powrprof.PowerReadACValueIndex if ac else self.powrprof.PowerReadDCValueIndex
+        self._check(func(None, ctypes.byref(GUID.from_string(scheme)),
+                         ctypes.byref(GUID.from_string(subgroup)),
+                         ctypes.byref(GUID.from_string(setting)),
+                         ctypes.byref(value)), 'PowerReadValueIndex')
+        return value.value
+
+    def write(self, scheme, subgroup, setting, value, ac=True):
+        func = self.powrprof.PowerWriteACValueIndex if ac else self.powrprof.PowerWriteDCValueIndex
+        self._check(func(None, ctypes.byref(GUID.from_string(scheme)),
+                         ctypes.byref(GUID.from_string(subgroup)),
+                         ctypes.byref(GUID.from_string(setting)),
+                         int(value)), 'PowerWriteValueIndex')
+
+    def activate(self, scheme):
+        self._check(self.powrprof.PowerSetActiveScheme(None, ctypes.byref(GUID.from_string(scheme))),
+                    'PowerSetActiveScheme')
+
+
+class FakePowerBackend:
+    """Plano de energia em memória (testes) - conta leituras/escritas/ativações"""
+
+    name = 'fake'
+
+    def __init__(self, scheme='381b4222-f694-41f0-9685-ff5bb260df2e', values=None):
+        self.scheme = scheme
+        self.values = dict(values or {})   # (scheme, subgroup, setting, ac) -> valor
+        self.reads = 0
+        self.writes = []
+        self.activations = 0
+
+    def active_scheme(self):
+        return self.scheme
+
+    def read(self, scheme, subgroup, setting, ac=True):
+        self.reads += 1
+        return self.values.get((scheme, subgroup, setting, ac), 100)
+
+    def write(self, scheme, subgroup, setting, value, ac=True):
+        self.writes.append((subgroup, setting, value, ac))
+        self.values[(scheme, subgroup, setting, ac)] = value
+
+    def activate(self, scheme):
+        self.activations += 1
+
+
+class PowerSettings:
+    """Visão em cache do plano ativo com escritas agrupadas"""
+
+    def __init__(self, backend=None, max_age=30.0):
+        self.backend = backend
+        self.max_age = max_age      # Segundos até reler um valor do sistema
+        self._cache = {}            # (scheme, subgroup, setting, ac) -> (valor, lido_em)
+        self._lock = threading.RLock()
+        self._depth = 0             # Transações aninhadas
+        self._dirty = False
+        self._scheme = None
+
+    @property
+    def available(self):
+        return self.backend is not None
+
+    def _active_scheme(self):
+        # Dentro de uma transação o plano é lido uma vez só
+        if self._depth and self._scheme:
+            return self._scheme
+        scheme = self.backend.active_scheme()
+        if self._depth:
+            self._scheme = scheme
+        return scheme
+
+    def get(self, subgroup, setting, ac=True):
+        """Valor atual (do cache enquanto tiver menos de max_age segundos)"""
+        if not self.available:
+            return None
+        with self._lock:
+            key = (self._active_scheme(), subgroup, setting, ac)
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[1] < self.max_age:
+                return cached[0]
+            return self._read(key)
+
+    def _read(self, key):
+        value = self.backend.read(*key)
+        self._cache[key] = (value, time.monotonic())
+        return value
+
+    def set(self, subgroup, setting, value, ac=True, dc=False):
+        """
+        Escreve valor (AC e/ou DC). Retorna True se algo mudou.
+        Fora de transação ativa o plano na hora; dentro, só no commit.
+        """
+        if not self.available:
+            return False
+        changed = False
+        with self.transaction():
+            scheme = self._active_scheme()
+            for on_ac in [flag for flag, wanted in ((True, ac), (False, dc)) if wanted]:
+                key = (scheme, subgroup, setting, on_ac)
+                # Relê do sistema (leitura barata): o cache pode estar velho
+                if self._read(key) == value:
+                    continue  # Sem mudança: nada de escrita nem activate
+                self.backend.write(*key[:3], value, ac=on_ac)
+                self._cache[key] = (value, time.monotonic())
+                changed = True
+            self._dirty = self._dirty or changed
+        return changed
+
+    @contextmanager
+    def transaction(self):
+        """Agrupa escritas: um único PowerSetActiveScheme ao sair"""
+        with self._lock:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    scheme, dirty = self._scheme, self._dirty
+                    self._scheme = None
+                    self._dirty = False
+                    if dirty:
+                        self.backend.activate(scheme or self.backend.active_scheme())
+
+    def invalidate(self):
+        """Descarta cache (plano alterado por fora, ex.: Painel de Controle)"""
+        with self._lock:
+            self._cache.clear()
+
+
+def get_default_backend():
+    """powrprof no Windows; None fora dele"""
+    if sys.platform != 'win32':
+        return None
+    try:
+        return PowrProfBackend()
+    except Exception as e:
+        print(f"[POWER] powrprof indisponível: {e}")
+        return None
+
+
+# Singleton global
+_instance = None
+
+def get_settings() -> PowerSettings:
+    """Retorna instância singleton de PowerSettings"""
+    global _instance
+    if _instance is None:
+        _instance = PowerSettings(get_default_backend())
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste com backend falso
+    settings = PowerSettings(FakePowerBackend())
+    with settings.transaction():
+        settings.set(SUB_PROCESSOR, PROCTHROTTLEMAX, 85, dc=True)
+        settings.set(SUB_PROCESSOR, PROCTHROTTLEMIN, 10)
+    settings.set(SUB_PROCESSOR, PROCTHROTTLEMAX, 85)  # Sem mudança
+    backend = settings.backend
+    backend.values[(backend.scheme, SUB_PROCESSOR, PROCTHROTTLEMAX, True)] = 100  # Editado por fora
+    settings.set(SUB_PROCESSOR, PROCTHROTTLEMAX, 85)  # Volta a escrever
+    print(f"Escritas: {len(backend.writes)} | Ativações: {backend.activations} | Leituras: {backend.reads}")
@@ -0,0 +1,312 @@
+"""
+PowerShell Host - Processo PowerShell persistente com protocolo JSON
+Evita um cold start do powershell.exe (centenas de ms) a cada comando:
+- Uma linha JSON por requisição no stdin, uma linha JSON por resposta no stdout
+- Vários script blocks por round-trip (run_batch)
+- Timeout por comando e recuperação automática se o processo morrer
+"""
+import base64
+import itertools
+import json
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+# Loop executado dentro do PowerShell:
+#   entrada: {"id": 1, "scripts": ["...", "..."]}
+#   saída:   {"id": 1, "results": [{"ok": true, "output": "...", "error": ""}, ...]}
+BOOTSTRAP_SCRIPT = r'''
+$ErrorActionPreference = 'Continue'
+$ProgressPreference = 'SilentlyContinue'
+[Console]::InputEncoding = [Text.UTF8Encoding]::new($false)
+[Console]::OutputEncoding = [Text.UTF8Encoding]::new($false)
+[Console]::Out.WriteLine('{"ready": true}')
+[Console]::Out.Flush()
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($line -eq $null) { break }
+    if ($line.Trim() -eq '') { continue }
+    $req = $line | ConvertFrom-Json
+    $results = @()
+    foreach ($script in @($req.scripts)) {
+        try {
+            $items = @(& ([ScriptBlock]::Create($script)) 2>&1)
+            $errs = @($items | Where-Object { $_ -is [System.Management.Automation.ErrorRecord] })
+            $outs = @($items | Where-Object { $_ -isnot [System.Management.Automation.ErrorRecord] })
+            $results += @{
+                ok = ($errs.Count -eq 0)
+                output = ($outs | Out-String).TrimEnd()
+                error = (($errs | ForEach-Object { $_.ToString() }) -join "`n")
+            }
+        } catch {
+            $results += @{ ok = $false; output = ''; error = $_.Exception.Message }
+        }
+    }
+    $resp = @{ id = $req.id; results = @($results) } | ConvertTo-Json -Compress -Depth 4
+    [Console]::Out.WriteLine($resp)
+    [Console]::Out.Flush()
+}
+'''
+
+CREATE_NO_WINDOW = 0x08000000
+
+
+def _default_command():
+    encoded = base64.b64encode(BOOTSTRAP_SCRIPT.encode('utf-16-le')).decode('ascii')
+    return ['powershell', '-NoLogo', '-NoProfile', '-NonInteractive',
+            '-ExecutionPolicy', 'Bypass', '-EncodedCommand', encoded]
+
+
+def standin_command():
+    """Shell substituto (Python) que fala o mesmo protocolo - para testes fora do Windows"""
+    return [sys.executable, '-u', __file__, '--standin']
+
+
+class PowerShellResult(NamedTuple):
+    """Resultado de um script block"""
+    ok: bool
+    output: str
+    error: str
+
+
+class PowerShellHost:
+    """Um processo PowerShell de longa duração"""
+
+    def __init__(self, command=None, startup_timeout=20):
+        self.command = command or _default_command()
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.restarts = 0
+        self._started = False
+        self._eof = False
+        self._lines = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _start(self):
+        """Inicia o processo e aguarda o sinal de pronto"""
+        kwargs = {}
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = CREATE_NO_WINDOW
+
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1,
+            **kwargs
+        )
+        self._lines = queue.Queue()
+        self._eof = False
+        threading.Thread(target=self._reader, args=(self.process, self._lines), daemon=True).start()
+
+        line = self._next_line(time.time() + self.startup_timeout)
+        if line is None or not line.get('ready'):
+            self._kill()
+            raise RuntimeError("PowerShell host não respondeu na inicialização")
+
+    @staticmethod
+    def _reader(process, lines):
+        """Thread leitora: stdout -> fila (None = processo terminou)"""
+        try:
+            for raw in process.stdout:
+                lines.put(raw)
+        except Exception:
+            pass
+        lines.put(None)
+
+    def _next_line(self, deadline):
+        """Próxima linha JSON válida (None = timeout ou processo morreu)"""
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            try:
+                raw = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if raw is None:
+                self._eof = True
+                return None
+            raw = raw.strip()
+            if not raw.startswith('{'):
+                continue  # Ruído fora do protocolo
+            try:
+                return json.loads(raw)
+            except ValueError:
+                continue
+
+    def _kill(self):
+        if self.process is not None:
+            try:
+                self.process.kill()
+                self.process.wait(timeout=2)
+            except Exception:
+                pass
+        self.process = None
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def run(self, script, timeout=10) -> PowerShellResult:
+        """Executa um script block"""
+        return self.run_batch([script], timeout=timeout)[0]
+
+    def run_batch(self, scripts, timeout=10):
+        """Executa vários script blocks em um único round-trip"""
+        with self._lock:
+            for attempt in range(2):
+                if not self.is_alive():
+                    if self._started:
+                        self.restarts += 1
+                    self._kill()
+                    self._start()
+                    self._started = True
+
+                request_id = next(self._ids)
+                try:
+                    self.process.stdin.write(json.dumps({'id': request_id, 'scripts': list(scripts)}) + '\n')
+                    self.process.stdin.flush()
+                except (BrokenPipeError, OSError):
+                    # Morreu antes de receber o pedido -> reinicia e tenta de novo
+                    self._kill()
+                    continue
+                break
+            else:
+                return [PowerShellResult(False, '', 'host encerrado') for _ in scripts]
+
+            deadline = time.time() + timeout
+            while True:
+                response = self._next_line(deadline)
+                if response is None:
+                    # Timeout ou crash: mata o host (o próximo comando reinicia)
+                    reason = 'host encerrado' if self._eof else 'timeout'
+                    self._kill()
+                    return [PowerShellResult(False, '', reason) for _ in scripts]
+                if response.get('id') == request_id:
+                    break
+
+            results = response.get('results') or []
+            if isinstance(results, dict):
+                results = [results]
+            return [PowerShellResult(bool(r.get('ok')), r.get('output') or '', r.get('error') or '')
+                    for r in results]
+
+    def close(self):
+        """Encerra o processo"""
+        with self._lock:
+            if self.is_alive():
+                try:
+                    self.process.stdin.close()
+                    self.process.wait(timeout=2)
+                except Exception:
+                    pass
+            self._kill()
+
+
+class PowerShellPool:
+    """Pool pequeno de hosts (um comando longo não bloqueia os outros)"""
+
+    def __init__(self, size=2, command=None):
+        self.size = size
+        self.command = command
+        self._hosts = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._hosts.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return PowerShellHost(self.command)
+        return self._hosts.get()
+
+    def run(self, script, timeout=10) -> PowerShellResult:
+        return self.run_batch([script], timeout=timeout)[0]
+
+    def run_batch(self, scripts, timeout=10):
+        host = self._acquire()
+        try:
+            return host.run_batch(scripts, timeout=timeout)
+        except Exception as e:
+            return [PowerShellResult(False, '', str(e)) for _ in scripts]
+        finally:
+            self._hosts.put(host)
+
+    def close(self):
+        while True:
+            try:
+                self._hosts.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# Singleton global
+_instance = None
+
+def get_pool() -> PowerShellPool:
+    """Retorna pool singleton de hosts PowerShell"""
+    global _instance
+    if _instance is None:
+        _instance = PowerShellPool(size=2)
+    return _instance
+
+
+def _standin_main():
+    """
+    Shell substituto: mesmo protocolo, scripts simples
+      echo <texto>   -> output
+      sleep <seg>    -> dorme
+      fail <msg>     -> ok=false
+      crash          -> encerra o processo
+    """
+    print('{"ready": true}', flush=True)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        req = json.loads(line)
+        results = []
+        for script in req['scripts']:
+            cmd, _, arg = script.strip().partition(' ')
+            if cmd == 'crash':
+                sys.exit(1)
+            if cmd == 'sleep':
+                time.sleep(float(arg))
+                results.append({'ok': True, 'output': '', 'error': ''})
+            elif cmd == 'fail':
+                results.append({'ok': False, 'output': '', 'error': arg})
+            else:
+                results.append({'ok': True, 'output': arg, 'error': ''})
+        print(json.dumps({'id': req['id'], 'results': results}), flush=True)
+
+
+if __name__ == "__main__":
+    if '--standin' in sys.argv:
+        _standin_main()
+        sys.exit(0)
+
+    # Teste com o shell substituto (ou PowerShell real com --real)
+    host = PowerShellHost(None if '--real' in sys.argv else standin_command())
+    start = time.perf_counter()
+    print(host.run_batch(['echo primeiro', 'echo segundo', 'fail oops']))
+    print(f"Primeiro round-trip (inclui start): {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    start = time.perf_counter()
+    print(host.run('echo quente'))
+    print(f"Round-trip quente: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    print(host.run('sleep 2', timeout=0.5))
+    print(host.run('crash'))
+    print(host.run('echo recuperado'), f"(restarts: {host.restarts})")
+    host.close()
@@ -0,0 +1,148 @@
+"""
+Process Start Events - Fontes de eventos de criação de processo
+WMI Win32_ProcessStartTrace (kernel trace, quase instantâneo) com fallback
+para __InstanceCreationEvent (via WMI broker); fonte sintética para testes
+"""
+import sys
+import time
+from typing import NamedTuple
+
+from modules import wmi_broker
+
+# FILETIME (100ns desde 1601) -> epoch Unix
+EPOCH_DIFF_100NS = 116444736000000000
+
+
+class ProcessStartEvent(NamedTuple):
+    """Processo recém-criado"""
+    pid: int
+    name: str
+    created: float      # Quando o processo nasceu (epoch, segundo a fonte)
+    received: float     # Quando o evento chegou ao otimizador
+
+
+class ProcessStartSource:
+    """Interface: start(callback) entrega ProcessStartEvent; stop() encerra"""
+
+    name = 'base'
+
+    def start(self, callback):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+class WmiProcessStartSource(ProcessStartSource):
+    """Eventos via WMI, atendidos pela thread COM do broker"""
+
+    name = 'wmi'
+
+    def __init__(self, broker=None):
+        self.broker = broker or wmi_broker.get_broker()
+        self.subscription = None
+        self.mode = None        # 'trace' ou 'instance'
+
+    @property
+    def running(self):
+        return self.subscription is not None and self.subscription.active
+
+    def start(self, callback):
+        if self.running:
+            return
+        try:
+            self.subscription = self.broker.subscribe(
+                wmi_broker.CIMV2, self._create_watcher, self._parse, callback)
+            print(f"[EVENTS] Eventos de processo via WMI ({self.mode})")
+        except Exception as e:
+            print(f"[EVENTS] Erro no watcher WMI: {e}")
+
+    def stop(self):
+        if self.subscription is not None:
+            self.broker.unsubscribe(self.subscription)
+            self.subscription = None
+
+    def _create_watcher(self, c):
+        """Win32_ProcessStartTrace (requer admin) ou __InstanceCreationEvent"""
+        try:
+            watcher = c.Win32_ProcessStartTrace.watch_for()
+            self.mode = 'trace'
+            return watcher
+        except Exception:
+            # Fallback: evento de instância (WITHIN 1s)
+            watcher = c.watch_for(notification_type="Creation", wmi_class="Win32_Process", delay_secs=1)
+            self.mode = 'instance'
+            return watcher
+
+    def _parse(self, event):
+        """Converte evento WMI em ProcessStartEvent (na thread COM)"""
+        received = time.time()
+        if self.mode == 'trace':
+            created = received
+            try:
+                created = (int(event.TIME_CREATED) - EPOCH_DIFF_100NS) / 1e7
+            except Exception:
+                pass
+            return ProcessStartEvent(int(event.ProcessID), event.ProcessName or '', created, received)
+
+        created = received
+        try:
+            # CIM_DATETIME: yyyymmddHHMMSS.mmmmmm+UUU (hora local)
+            stamp = event.CreationDate.split('.')[0]
+            micro = int(event.CreationDate.split('.')[1][:6])
+            created = time.mktime(time.strptime(stamp, '%Y%m%d%H%M%S')) + micro / 1e6
+        except Exception:
+            pass
+        return ProcessStartEvent(int(event.ProcessId), event.Name or '', created, received)
+
+
+class SyntheticProcessStartSource(ProcessStartSource):
+    """Fonte controlada manualmente (testes e benchmarks de latência)"""
+
+    name = 'synthetic'
+
+    def __init__(self):
+        self._callback = None
+
+    def start(self, callback):
+        self._callback = callback
+
+    def stop(self):
+        self._callback = None
+
+    def emit(self, name, pid=0, created=None):
+        """Dispara um evento de início de processo"""
+        now = time.time()
+        event = ProcessStartEvent(pid, name, created if created is not None else now, now)
+        if self._callback:
+            self._callback(event)
+        return event
+
+
+def get_default_source():
+    """Fonte WMI no Windows (se o pacote wmi existir), senão None (só polling)"""
+    if sys.platform != 'win32':
+        return None
+    try:
+        import wmi  # noqa: F401
+        return WmiProcessStartSource()
+    except ImportError:
+        return None
+
+
+if __name__ == "__main__":
+    # Teste
+    source = get_default_source() or SyntheticProcessStartSource()
+    source.start(lambda e: print(f"[+] {e.pid:6d} {e.name} "
+                                 f"(atraso {(e.received - e.created) * 1000:.0f}ms)"))
+    print(f"Fonte: {source.name}. Pressione Ctrl+C para parar")
+
+    if isinstance(source, SyntheticProcessStartSource):
+        source.emit('valorant.exe', pid=1234)
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        source.stop()
+        print("Finalizado")
@@ -0,0 +1,297 @@
+"""
+Process Table - Tabela de processos incremental e compartilhada
+Um único scan por tick, convertido em eventos (spawned / exited / changed)
+para SmartProcessManager, GameModeDetector e Dashboard
+"""
+import threading
+import time
+from typing import NamedTuple, Tuple
+
+import psutil
+
+from modules import nt_process_snapshot
+from modules import scheduler
+
+
+class ProcessEntry:
+    """Processo conhecido pela tabela (chave: pid + create_time)"""
+
+    __slots__ = ('pid', 'create_time', 'name', 'nice', 'parent_pid',
+                 '_proc', '_username', '_backend')
+
+    def __init__(self, pid, create_time, name, nice, parent_pid=None, proc=None, backend=None):
+        self.pid = pid
+        self.create_time = create_time
+        self.name = name or ''
+        self.nice = nice
+        self.parent_pid = parent_pid
+        self._proc = proc
+        self._username = None
+        self._backend = backend
+
+    @property
+    def key(self):
+        return (self.pid, self.create_time)
+
+    @property
+    def proc(self):
+        """psutil.Process (criado só quando alguém precisa agir no processo)"""
+        if self._proc is None:
+            self._proc = psutil.Process(self.pid)
+        return self._proc
+
+    @property
+    def username(self):
+        """Usuário dono do processo (consulta de token só uma vez por processo)"""
+        if self._username is None:
+            try:
+                if self._backend is not None:
+                    self._username = self._backend.username(self.pid, self.create_time) or ''
+                else:
+                    self._username = self.proc.username() or ''
+            except (psutil.NoSuchProcess, psutil.AccessDenied, OSError):
+                self._username = ''
+        return self._username
+
+    def __repr__(self):
+        return f"ProcessEntry(pid={self.pid}, name={self.name!r}, nice={self.nice})"
+
+
+class ProcessDelta(NamedTuple):
+    """Diferença entre dois scans"""
+    spawned: Tuple[ProcessEntry, ...]
+    exited: Tuple[ProcessEntry, ...]
+    changed: Tuple[ProcessEntry, ...]
+
+    def __bool__(self):
+        return bool(self.spawned or self.exited or self.changed)
+
+
+class ProcessTable:
+    """
+    Mantém a lista de processos atualizada com custo O(mudanças):
+    - Tick normal: só psutil.pids() e leitura dos PIDs novos
+    - Tick completo (a cada full_refresh_every): revalida create_time (reuso de PID)
+      e relê prioridade de todos para gerar eventos 'changed'
+    Com um backend de snapshot (NtQuerySystemInformation) todo tick é completo:
+    uma única syscall traz nome, create_time e prioridade de todos os processos.
+    """
+
+    def __init__(self, interval=2.0, full_refresh_every=5, backend=None):
+        self.interval = interval
+        self.backend = backend
+        self.full_refresh_every = full_refresh_every
+        self.running = False
+        self._entries = {}          # pid -> ProcessEntry
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self._tick = 0
+
+    def start(self):
+        """Inicia atualização periódica"""
+        if self.running:
+            return
+
+        self.running = True
+        self.refresh(full=True)
+        scheduler.get_scheduler().add_job('process_table', self._tick_refresh, self.interval)
+        print(f"[PROCS] Tabela de processos iniciada ({len(self._entries)} processos)")
+
+    def stop(self):
+        """Para a atualização"""
+        self.running = False
+        scheduler.get_scheduler().cancel('process_table')
+
+    def subscribe(self, callback):
+        """Registra callback(delta) chamado quando algo muda"""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Remove callback registrado"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _tick_refresh(self):
+        """Job do scheduler: scan incremental, completo a cada N ticks"""
+        self._tick += 1
+        self.refresh(full=(self._tick % self.full_refresh_every == 0))
+
+    def _read_entry(self, pid):
+        """Lê dados de um PID novo (retorna None se sumiu)"""
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                name = proc.name()
+                try:
+                    nice = proc.nice()
+                except psutil.AccessDenied:
+                    nice = None
+            return ProcessEntry(pid, proc.create_time(), name, nice, proc=proc)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    def refresh(self, full=False) -> ProcessDelta:
+        """Faz um scan e publica o delta"""
+        if self.backend is not None:
+            return self._refresh_from_snapshot()
+
+        current_pids = set(psutil.pids())
+        spawned = []
+        exited = []
+        changed = []
+
+        with self._lock:
+            known_pids = set(self._entries)
+
+            for pid in known_pids - current_pids:
+                exited.append(self._entries.pop(pid))
+
+            if full:
+                for pid in known_pids & current_pids:
+                    entry = self._entries[pid]
+                    try:
+                        # PID reutilizado? create_time diferente = outro processo
+                        if psutil.Process(pid).create_time() != entry.create_time:
+                            exited.append(self._entries.pop(pid))
+                            known_pids.discard(pid)
+                            continue
+                        nice = entry.proc.nice()
+                        if nice != entry.nice:
+                            entry.nice = nice
+                            changed.append(entry)
+                    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                        exited.append(self._entries.pop(pid))
+                        known_pids.discard(pid)
+                        current_pids.discard(pid)
+                    except psutil.AccessDenied:
+                        pass
+
+            for pid in current_pids - known_pids:
+                entry = self._read_entry(pid)
+                if entry is not None:
+                    self._entries[pid] = entry
+                    spawned.append(entry)
+
+        delta = ProcessDelta(tuple(spawned), tuple(exited), tuple(changed))
+        if delta:
+            self._publish(delta)
+        return delta
+
+    def _refresh_from_snapshot(self) -> ProcessDelta:
+        """Scan via backend de snapshot (uma syscall para todos os processos)"""
+        records = self.backend.snapshot()
+        spawned = []
+        exited = []
+        changed = []
+
+        with self._lock:
+            for pid in list(self._entries):
+                record = records.get(pid)
+                entry = self._entries[pid]
+                if record is None or record.create_time != entry.create_time:
+                    exited.append(self._entries.pop(pid))
+                    self.backend.forget(pid, entry.create_time)
+                elif record.priority_class != entry.nice:
+                    entry.nice = record.priority_class
+                    changed.append(entry)
+
+            for pid, record in records.items():
+                if pid not in self._entries:
+                    entry = ProcessEntry(pid, record.create_time, record.name,
+                                         record.priority_class, parent_pid=record.parent_pid,
+                                         backend=self.backend)
+                    self._entries[pid] = entry
+                    spawned.append(entry)
+
+        delta = ProcessDelta(tuple(spawned), tuple(exited), tuple(changed))
+        if delta:
+            self._publish(delta)
+        return delta
+
+    def _publish(self, delta):
+        """Entrega o delta para todos os assinantes"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(delta)
+            except Exception as e:
+                print(f"[PROCS] Erro no assinante {getattr(callback, '__name__', callback)}: {e}")
+
+    def note_priority(self, pid, nice):
+        """Atualiza prioridade em cache (quem alterou avisa, sem novo scan)"""
+        with self._lock:
+            entry = self._entries.get(pid)
+            if entry is not None:
+                entry.nice = nice
+
+    def entries(self):
+        """Lista de processos conhecidos"""
+        with self._lock:
+            return list(self._entries.values())
+
+    def get(self, pid):
+        """Retorna entrada do PID (ou None)"""
+        with self._lock:
+            return self._entries.get(pid)
+
+    def find_by_names(self, names):
+        """Primeira entrada cujo nome (minúsculo) está em names"""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.name.lower() in names:
+                    return entry
+        return None
+
+    def count_priorities(self, high_classes, low_classes):
+        """Conta processos em prioridade alta/baixa usando o cache (sem syscalls)"""
+        high = 0
+        low = 0
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.nice in high_classes:
+                    high += 1
+                elif entry.nice in low_classes:
+                    low += 1
+        return high, low
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Singleton global
+_instance = None
+
+def get_table() -> ProcessTable:
+    """Retorna instância singleton da tabela de processos"""
+    global _instance
+    if _instance is None:
+        _instance = ProcessTable(interval=2.0, backend=nt_process_snapshot.get_backend())
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste
+    table = get_table()
+
+    def show(delta):
+        for e in delta.spawned:
+            print(f"[+] {e.pid:6d} {e.name}")
+        for e in delta.exited:
+            print(f"[-] {e.pid:6d} {e.name}")
+        for e in delta.changed:
+            print(f"[~] {e.pid:6d} {e.name} nice={e.nice}")
+
+    table.start()
+    table.subscribe(show)
+    print("Monitorando processos... Pressione Ctrl+C para parar")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        table.stop()
+        print("Finalizado")
@@ -24,6 +24,7 @@ class ProfileManager:
             'cpu_min_freq': 50,
             'ram_threshold_mb': 2048,  # Limpa RAM mais agressivamente
             'ram_check_interval': 3,
+            'file_cache_percent': 10,  # Teto do cache de arquivos (modo cache_limit)
             'network_qos': True,
             'game_boost': True,
             'thermal_limit': 90  # Permite mais calor
@@ -35,6 +36,7 @@ class ProfileManager:
             'cpu_min_freq': 20,
             'ram_threshold_mb': 4096,
             'ram_check_interval': 10,
+            'file_cache_percent': 35,
             'network_qos': False,
             'game_boost': False,
             'thermal_limit': 80
@@ -46,6 +48,7 @@ class ProfileManager:
             'cpu_min_freq': 5,
             'ram_threshold_mb': 8192,  # Só limpa quando realmente necessário
             'ram_check_interval': 30,
+            'file_cache_percent': 25,
             'network_qos': False,
             'game_boost': False,
             'thermal_limit': 70
@@ -57,6 +60,7 @@ class ProfileManager:
             'cpu_min_freq': 10,
             'ram_threshold_mb': 4096,
             'ram_check_interval': 5,
+            'file_cache_percent': 20,
             'network_qos': True,
             'game_boost': True,
             'thermal_limit': 80
@@ -98,14 +102,16 @@ class ProfileManager:
             # Aplica configurações de CPU
             if 'cpu_power' in self.services:
                 cpu = self.services['cpu_power']
-                cpu.set_max_cpu_frequency(settings['cpu_max_freq'])
-                cpu.set_min_cpu_frequency(settings['cpu_min_freq'])
+                cpu.apply_profile_limits(settings['cpu_max_freq'], settings['cpu_min_freq'],
+                                         settings['thermal_limit'])
             
             # Aplica configurações de RAM
             if 'cleaner' in self.services:
                 cleaner = self.services['cleaner']
                 cleaner.threshold_mb = settings['ram_threshold_mb']
                 cleaner.check_interval = settings['ram_check_interval']
+                if cleaner.cache_limiter is not None:
+                    cleaner.cache_limiter.percent = settings.get('file_cache_percent', cleaner.cache_limiter.percent)
             
             print(f"[PROFILE] ✓ Perfil {settings['name']} aplicado!")
             return True
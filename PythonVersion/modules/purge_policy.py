@@ -0,0 +1,193 @@
+"""
+Purge Policy - Quando limpar a lista Standby
+Cada política recebe o estado da memória a cada tick do cleaner e devolve
+uma PurgeDecision (limpar ou não, motivo e benefício previsto):
+- threshold:  disponível abaixo do limite e standby > mínimo (comportamento original)
+- aggressive: limpa a cada tick, sem condição (antigo AggressiveStandbyCleaner)
+- predictive: tendência (EWMA) da memória disponível; só limpa se prevê
+  cruzar o limite dentro do horizonte, com histerese e cooldown entre limpezas
+"""
+import time
+from typing import NamedTuple, Optional
+
+THRESHOLD = 'threshold'
+AGGRESSIVE = 'aggressive'
+PREDICTIVE = 'predictive'
+
+
+class MemoryState(NamedTuple):
+    """Leitura de memória usada pelas políticas (MB)"""
+    timestamp: float
+    available_mb: int     # Free + Zero + Standby
+    free_mb: int          # Free + Zero (o que a limpeza repõe)
+    standby_mb: int       # Cache recuperável pela limpeza
+
+
+class PurgeDecision(NamedTuple):
+    """Resultado de uma avaliação de política"""
+    purge: bool
+    reason: str
+    predicted_benefit_mb: int = 0         # Standby que a limpeza deve devolver
+    slope_mb_s: float = 0.0               # Tendência da memória disponível (negativa = caindo)
+    eta_s: Optional[float] = None         # Segundos até cruzar o limite (None = não está caindo)
+    target_free_mb: Optional[int] = None  # Livre que a limpeza deve alcançar (None = só baixa prioridade)
+
+
+class PurgePolicy:
+    """Base: threshold_mb é o limite alterado pelos perfis"""
+
+    name = ''
+
+    def __init__(self, threshold_mb=1024, min_standby_mb=1024):
+        self.threshold_mb = threshold_mb
+        self.min_standby_mb = min_standby_mb  # Abaixo disto limpar só causa stutter
+        self.last_purge_at = None
+
+    def decide(self, state):
+        raise NotImplementedError
+
+    def note_purge(self, state, freed_mb):
+        """Chamado pelo cleaner depois de cada limpeza executada"""
+        self.last_purge_at = state.timestamp
+
+
+class ThresholdPolicy(PurgePolicy):
+    """Disponível < limite e há cache suficiente para valer a pena"""
+
+    name = THRESHOLD
+
+    def decide(self, state):
+        if state.available_mb >= self.threshold_mb:
+            return PurgeDecision(False, "disponível acima do limite")
+        # [V2.0] Surgical Check: Just checking free RAM is not enough.
+        # IF (Free < Limit) AND (Standby < min) -> DO NOTHING (Cleaning empty cache = Stutter)
+        if state.standby_mb <= self.min_standby_mb:
+            return PurgeDecision(False, "memória cheia, pouco cache para liberar")
+        # Falta até o limite, coberta pela standby devolvida à lista livre
+        target = state.free_mb + self.threshold_mb - state.available_mb
+        return PurgeDecision(True, f"disponível {state.available_mb}MB < {self.threshold_mb}MB",
+                             state.standby_mb, target_free_mb=target)
+
+
+class AggressivePolicy(PurgePolicy):
+    """Limpa sempre (intervalo definido pelo check_interval do cleaner)"""
+
+    name = AGGRESSIVE
+
+    def __init__(self, threshold_mb=0, min_standby_mb=0):
+        super().__init__(threshold_mb, min_standby_mb)
+
+    def decide(self, state):
+        if state.standby_mb <= self.min_standby_mb:
+            return PurgeDecision(False, "cache já estava limpo")
+        return PurgeDecision(True, "limpeza periódica", state.standby_mb)
+
+
+class PredictivePolicy(PurgePolicy):
+    """
+    Acompanha a inclinação da memória disponível (MB/s, média exponencial) e
+    limpa só quando o limite (threshold_mb) será cruzado dentro de horizon_s.
+    A purge não altera a disponível (standby -> livre), então a tendência
+    mede só o consumo real. Depois de uma limpeza: cooldown_s sem limpar e
+    desarmado até a disponível voltar acima de limite + hysteresis_mb.
+    """
+
+    name = PREDICTIVE
+
+    def __init__(self, threshold_mb=1024, min_standby_mb=1024, horizon_s=30.0,
+                 alpha=0.3, cooldown_s=60.0, hysteresis_mb=512):
+        super().__init__(threshold_mb, min_standby_mb)
+        self.horizon_s = horizon_s
+        self.alpha = alpha                  # Peso da amostra nova na EWMA
+        self.cooldown_s = cooldown_s
+        self.hysteresis_mb = hysteresis_mb
+        self.slope = 0.0                    # MB/s
+        self.armed = True
+        self._last = None                   # MemoryState anterior
+
+    def _update_slope(self, state):
+        last, self._last = self._last, state
+        if last is None:
+            return
+        dt = state.timestamp - last.timestamp
+        if dt <= 0:
+            return
+        sample = (state.available_mb - last.available_mb) / dt
+        self.slope = self.alpha * sample + (1 - self.alpha) * self.slope
+
+    def eta(self, state):
+        """Segundos até a memória disponível cruzar o limite na tendência atual"""
+        if state.available_mb <= self.threshold_mb:
+            return 0.0
+        if self.slope >= 0:
+            return None
+        return (state.available_mb - self.threshold_mb) / -self.slope
+
+    def decide(self, state):
+        self._update_slope(state)
+        eta = self.eta(state)
+
+        def skip(reason):
+            return PurgeDecision(False, reason, 0, self.slope, eta)
+
+        if not self.armed:
+            if state.available_mb < self.threshold_mb + self.hysteresis_mb:
+                return skip("aguardando histerese")
+            self.armed = True
+        if self.last_purge_at is not None and state.timestamp - self.last_purge_at < self.cooldown_s:
+            return skip("cooldown")
+        if eta is None or eta > self.horizon_s:
+            return skip("sem risco no horizonte")
+        if state.standby_mb <= self.min_standby_mb:
+            return skip("memória cheia, pouco cache para liberar")
+
+        if eta == 0.0:
+            reason = f"disponível {state.available_mb}MB abaixo do limite {self.threshold_mb}MB"
+        else:
+            reason = (f"disponível {state.available_mb}MB caindo {-self.slope:.0f}MB/s, "
+                      f"limite em {eta:.0f}s")
+        # Falta prevista no fim do horizonte
+        shortfall = self.threshold_mb - (state.available_mb + self.slope * self.horizon_s)
+        target = state.free_mb + max(0, int(shortfall))
+        return PurgeDecision(True, reason, state.standby_mb, self.slope, eta, target)
+
+    def note_purge(self, state, freed_mb):
+        super().note_purge(state, freed_mb)
+        self.armed = False
+
+
+POLICIES = {
+    THRESHOLD: ThresholdPolicy,
+    AGGRESSIVE: AggressivePolicy,
+    PREDICTIVE: PredictivePolicy,
+}
+
+
+def create_policy(name, threshold_mb=1024, **options):
+    """Política pelo nome do config (standby_cleaner.policy)"""
+    try:
+        cls = POLICIES[name]
+    except KeyError:
+        print(f"[WARN] Política de limpeza desconhecida '{name}', usando '{THRESHOLD}'")
+        cls = ThresholdPolicy
+        options = {}
+    return cls(threshold_mb=threshold_mb, **options)
+
+
+if __name__ == "__main__":
+    # Simulação: jogo carregando assets consome ~80MB/s por 60s e depois estabiliza;
+    # o cache volta a encher a 20MB/s (não muda a disponível)
+    policy = PredictivePolicy(threshold_mb=4096, horizon_s=20, cooldown_s=30)
+    now = time.time()
+    available, standby = 9000, 6000
+    for tick in range(30):
+        state = MemoryState(now + tick * 5, available, available - standby, standby)
+        decision = policy.decide(state)
+        eta = f"{decision.eta_s:.0f}s" if decision.eta_s is not None else "-"
+        print(f"t={tick * 5:3d}s disp={available:5d}MB slope={decision.slope_mb_s:6.1f} eta={eta:>5} "
+              f"{'PURGE' if decision.purge else '     '} {decision.reason}")
+        if decision.purge:
+            standby = 0
+        if tick < 12:
+            available -= 400
+        standby = min(available, standby + 100)
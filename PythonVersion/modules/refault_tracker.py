@@ -0,0 +1,290 @@
+"""
+Refault Tracker - Quanto custa cada purge da Standby
+Depois de cada purge abre uma janela de observação e mede leitura de disco
+(psutil disk_io_counters) e hard faults (PDH Memory\\Page Reads/sec) acima da
+linha de base: é o cache descartado sendo lido de volta. Com o histórico de
+memória ganha x custo de refault da máquina, ajusta o limite do cleaner e a
+standby mínima para parar de fazer purges que custam mais do que liberam.
+Histórico e ajuste persistem em ~/.nvme_optimizer/purge_tuning.json
+"""
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
+
+import psutil
+
+from modules import pdh_counters
+from modules import scheduler
+
+MB = 1024 * 1024
+
+
+class IoSample(NamedTuple):
+    """Contadores acumulados de I/O de leitura"""
+    timestamp: float
+    read_bytes: float     # Bytes lidos do disco (acumulado)
+    hard_faults: float    # Leituras de página por hard fault (acumulado)
+
+
+class PurgeCost(NamedTuple):
+    """Memória ganha por um purge x I/O de refault atribuído a ele"""
+    timestamp: float
+    trigger: str
+    freed_mb: float
+    refault_mb: float     # Leitura de disco acima da linha de base na janela
+    hard_faults: int      # Hard faults acima da linha de base na janela
+    window_s: float
+
+    @property
+    def cost_ratio(self):
+        """Fração do que foi liberado que voltou a ser lido do disco"""
+        return self.refault_mb / self.freed_mb if self.freed_mb > 0 else 0.0
+
+
+class SystemIoSource:
+    """Leitura de disco acumulada (psutil) + hard faults integrados da taxa PDH"""
+
+    def __init__(self, pdh=None):
+        self.pdh = pdh or pdh_counters.get_engine()
+        self._faults = 0.0
+        self._last_ts = None
+
+    def sample(self) -> IoSample:
+        now = time.time()
+        io = psutil.disk_io_counters()
+        read_bytes = io.read_bytes if io else 0
+        if self.pdh.available:
+            rate = self.pdh.get_sample(max_age=2.0).get('page_reads_s')
+            if self._last_ts is not None:
+                self._faults += rate * (now - self._last_ts)
+        self._last_ts = now
+        return IoSample(now, read_bytes, self._faults)
+
+
+class FakeIoSource:
+    """Fonte simulada: leitura e hard faults por segundo configuráveis"""
+
+    def __init__(self, read_mb_s=20.0, faults_s=50.0):
+        self.read_mb_s = read_mb_s
+        self.faults_s = faults_s
+        self.now = 0.0
+        self._read = 0.0
+        self._faults = 0.0
+
+    def advance(self, seconds):
+        self.now += seconds
+        self._read += self.read_mb_s * MB * seconds
+        self._faults += self.faults_s * seconds
+
+    def sample(self) -> IoSample:
+        return IoSample(self.now, self._read, self._faults)
+
+
+class _Window:
+    """Janela aberta após um purge"""
+
+    def __init__(self, start, trigger, freed_mb):
+        self.start = start
+        self.trigger = trigger
+        self.freed_mb = freed_mb
+        self.excess_bytes = 0.0
+        self.excess_faults = 0.0
+
+
+class RefaultTracker:
+    """
+    Job do scheduler: linha de base de leitura/faults fora das janelas,
+    excesso dentro delas. A cada purge medido, EWMA do custo e ajuste:
+    custo alto -> limite menor (purga mais perto do esgotamento) e standby
+    mínima maior; custo baixo -> volta aos valores do config/perfil.
+    """
+
+    JOB_NAME = 'refault_tracker'
+
+    def __init__(self, source=None, path=None, window_s=30.0, interval=2.0,
+                 baseline_alpha=0.1, cost_alpha=0.4, high_cost=0.4, low_cost=0.2,
+                 step=0.15, min_scale=0.25, base_min_standby_mb=1024, max_min_standby_mb=4096,
+                 history_size=50, log=None):
+        self.source = source or SystemIoSource()
+        self.path = Path(path) if path else Path.home() / ".nvme_optimizer" / "purge_tuning.json"
+        self.window_s = window_s
+        self.interval = interval
+        self.baseline_alpha = baseline_alpha
+        self.cost_alpha = cost_alpha            # Peso do purge novo na EWMA do custo
+        self.high_cost = high_cost              # Acima: purges caros -> recua
+        self.low_cost = low_cost                # Abaixo: purges baratos -> volta ao base
+        self.step = step                        # Ajuste relativo por purge medido
+        self.min_scale = min_scale              # Limite nunca abaixo de base * min_scale
+        self.base_min_standby_mb = base_min_standby_mb
+        self.max_min_standby_mb = max_min_standby_mb
+        self.log = log                          # callback(evento, detalhes) - ex.: HistoryLogger.log_event
+        self.running = False
+
+        # Estado ajustado (persistido)
+        self.threshold_scale = 1.0
+        self.min_standby_mb = base_min_standby_mb
+        self.cost_ewma = None
+        self.records = deque(maxlen=history_size)
+
+        self.baseline_read_s = None             # Bytes/s fora das janelas
+        self.baseline_faults_s = None
+        self._windows = []
+        self._last = None
+        self.load()
+
+    # === Ajuste aplicado pelo cleaner ===
+
+    def threshold_for(self, base_mb):
+        """Limite efetivo para o limite base do config/perfil"""
+        return int(base_mb * self.threshold_scale)
+
+    # === Medição ===
+
+    def note_purge(self, freed_mb, trigger=''):
+        """Abre a janela de refault de um purge executado"""
+        if freed_mb <= 0:
+            return
+        self._windows.append(_Window(self.source.sample().timestamp, trigger, freed_mb))
+
+    def tick(self):
+        """Uma amostragem (job do scheduler)"""
+        sample = self.source.sample()
+        last, self._last = self._last, sample
+        if last is None:
+            return
+        dt = sample.timestamp - last.timestamp
+        if dt <= 0:
+            return
+        read_s = max(0.0, sample.read_bytes - last.read_bytes) / dt
+        faults_s = max(0.0, sample.hard_faults - last.hard_faults) / dt
+
+        if not self._windows:
+            # Picos limitados a 2x a base: a cauda de um refault não vira linha de base
+            if self.baseline_read_s:
+                read_s = min(read_s, 2 * self.baseline_read_s)
+            if self.baseline_faults_s:
+                faults_s = min(faults_s, 2 * self.baseline_faults_s)
+            self.baseline_read_s = self._ewma(self.baseline_read_s, read_s, self.baseline_alpha)
+            self.baseline_faults_s = self._ewma(self.baseline_faults_s, faults_s, self.baseline_alpha)
+            return
+
+        base_read = self.baseline_read_s or 0.0
+        base_faults = self.baseline_faults_s or 0.0
+        excess_bytes = max(0.0, read_s - base_read) * dt
+        excess_faults = max(0.0, faults_s - base_faults) * dt
+        # Janelas sobrepostas: excesso dividido pela memória que cada purge liberou
+        total_freed = sum(w.freed_mb for w in self._windows)
+        for window in self._windows:
+            share = window.freed_mb / total_freed
+            window.excess_bytes += excess_bytes * share
+            window.excess_faults += excess_faults * share
+        expired = [w for w in self._windows if sample.timestamp - w.start >= self.window_s]
+        for window in expired:
+            self._windows.remove(window)
+            self._finish(window, sample.timestamp)
+
+    @staticmethod
+    def _ewma(current, value, alpha):
+        return value if current is None else alpha * value + (1 - alpha) * current
+
+    def _finish(self, window, now):
+        cost = PurgeCost(now, window.trigger, window.freed_mb, window.excess_bytes / MB,
+                         int(window.excess_faults), now - window.start)
+        self.records.append(cost)
+        self.cost_ewma = self._ewma(self.cost_ewma, cost.cost_ratio, self.cost_alpha)
+        self._tune()
+        print(f"[REFAULT] Purge {cost.trigger or '-'}: +{cost.freed_mb:.0f}MB livres, "
+              f"{cost.refault_mb:.0f}MB relidos ({cost.hard_faults} hard faults) em {cost.window_s:.0f}s "
+              f"-> limite x{self.threshold_scale:.2f}, standby mín. {self.min_standby_mb}MB")
+        if self.log:
+            self.log("purge_cost", f"{cost.trigger}: freed {cost.freed_mb:.0f}MB, refault "
+                                   f"{cost.refault_mb:.0f}MB ({cost.cost_ratio * 100:.0f}%)")
+        self.save()
+        return cost
+
+    def _tune(self):
+        """Recuo/avanço proporcional ao custo médio dos purges recentes"""
+        if self.cost_ewma >= self.high_cost:
+            self.threshold_scale = max(self.min_scale, self.threshold_scale * (1 - self.step))
+            self.min_standby_mb = min(self.max_min_standby_mb, int(self.min_standby_mb * (1 + self.step)))
+        elif self.cost_ewma <= self.low_cost:
+            self.threshold_scale = min(1.0, self.threshold_scale * (1 + self.step))
+            self.min_standby_mb = max(self.base_min_standby_mb, int(self.min_standby_mb * (1 - self.step)))
+
+    # === Persistência ===
+
+    def load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            self.threshold_scale = min(1.0, max(self.min_scale, float(data.get('threshold_scale', 1.0))))
+            self.min_standby_mb = min(self.max_min_standby_mb,
+                                      max(self.base_min_standby_mb, int(data.get('min_standby_mb', 0))))
+            self.cost_ewma = data.get('cost_ewma')
+            for record in data.get('records', []):
+                self.records.append(PurgeCost(**record))
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def save(self):
+        data = {
+            'threshold_scale': round(self.threshold_scale, 3),
+            'min_standby_mb': self.min_standby_mb,
+            'cost_ewma': self.cost_ewma,
+            'records': [r._asdict() for r in self.records],
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(data, indent=1), encoding='utf-8')
+        except OSError as e:
+            print(f"[REFAULT] Erro ao salvar ajuste: {e}")
+
+    # === Ciclo de vida ===
+
+    def start(self):
+        """Registra o job no scheduler central"""
+        if self.running:
+            return
+        self.running = True
+        self._last = None
+        scheduler.get_scheduler().add_job(self.JOB_NAME, self.tick, self.interval)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        scheduler.get_scheduler().cancel(self.JOB_NAME)
+        self.save()
+
+    def get_status(self):
+        return {
+            'threshold_scale': self.threshold_scale,
+            'min_standby_mb': self.min_standby_mb,
+            'cost_ratio': self.cost_ewma,
+            'measuring': len(self._windows),
+            'last': self.records[-1] if self.records else None,
+        }
+
+
+if __name__ == "__main__":
+    # Simulação: jogo relendo assets depois de purges completos
+    import tempfile
+    source = FakeIoSource(read_mb_s=20, faults_s=50)
+    tracker = RefaultTracker(source=source, path=Path(tempfile.mkdtemp()) / "purge_tuning.json")
+    for _ in range(10):
+        source.advance(2)
+        tracker.tick()
+    print(f"Linha de base: {tracker.baseline_read_s / MB:.0f}MB/s, {tracker.baseline_faults_s:.0f} faults/s")
+
+    for freed_mb, refault_mb_s in ((3000, 80), (2800, 70), (2500, 5), (2600, 2), (2400, 3), (2500, 1)):
+        tracker.note_purge(freed_mb, 'predictive')
+        source.read_mb_s, source.faults_s = 20 + refault_mb_s, 50 + refault_mb_s * 40
+        for _ in range(16):
+            source.advance(2)
+            tracker.tick()
+        source.read_mb_s, source.faults_s = 20, 50
+        for _ in range(5):
+            source.advance(2)
+            tracker.tick()
+    print(f"Limite 4096MB -> {tracker.threshold_for(4096)}MB | standby mínima {tracker.min_standby_mb}MB")
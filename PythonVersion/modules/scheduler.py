@@ -0,0 +1,283 @@
+"""
+Central Scheduler - Uma thread para todos os jobs periódicos
+Substitui as threads com time.sleep() de cada serviço:
+- Intervalo por job, jitter e alinhamento (wakeups agrupados)
+- Coalescing: atrasou várias execuções -> roda uma vez só
+- Backoff exponencial em erros
+- Desacelera jobs em bateria ou com o usuário ocioso
+"""
+import ctypes
+import heapq
+import itertools
+import random
+import sys
+import threading
+import time
+
+import psutil
+
+
+class ScheduledJob:
+    """Job periódico registrado no Scheduler"""
+
+    def __init__(self, name, func, interval, jitter=0.0, power_aware=True,
+                 threaded=False, max_backoff=8):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter            # Fração do intervalo (0.1 = até +10%)
+        self.power_aware = power_aware  # Desacelera em bateria/ocioso
+        self.threaded = threaded        # Roda em thread própria (jobs longos: TRIM)
+        self.max_backoff = max_backoff
+        self.next_run = 0.0
+        self.backoff = 1                # Multiplicador atual (erros consecutivos)
+        self.runs = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_duration = 0.0
+        self.cancelled = False
+        self._busy = False
+
+    def __repr__(self):
+        return f"ScheduledJob({self.name!r}, every {self.interval}s)"
+
+
+class Scheduler:
+    """Timer queue (heap) servida por uma única thread"""
+
+    # Jobs devidos dentro desta janela rodam no mesmo wakeup
+    COALESCE_WINDOW = 0.05
+
+    def __init__(self, battery_slowdown=2.0, idle_slowdown=1.5, idle_after_seconds=300):
+        self.battery_slowdown = battery_slowdown
+        self.idle_slowdown = idle_slowdown
+        self.idle_after_seconds = idle_after_seconds
+        self.slowdown = 1.0
+        self.on_battery = False
+        self.user_idle = False
+        self.running = False
+        self.thread = None
+        self._heap = []
+        self._jobs = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    # === API ===
+
+    def add_job(self, name, func, interval, first_delay=None, jitter=0.0,
+                power_aware=True, threaded=False, max_backoff=8):
+        """
+        Registra job periódico (substitui job com o mesmo nome).
+        first_delay: atraso da primeira execução (padrão: próximo slot alinhado)
+        """
+        job = ScheduledJob(name, func, interval, jitter, power_aware, threaded, max_backoff)
+        now = time.time()
+        job.next_run = now + first_delay if first_delay is not None else self._aligned_next(job, now)
+
+        with self._cond:
+            old = self._jobs.get(name)
+            if old is not None:
+                old.cancelled = True
+            self._jobs[name] = job
+            heapq.heappush(self._heap, (job.next_run, next(self._counter), job))
+            self._cond.notify()
+
+        self.start()
+        return job
+
+    def cancel(self, name):
+        """Remove job pelo nome"""
+        with self._cond:
+            job = self._jobs.pop(name, None)
+            if job is not None:
+                job.cancelled = True
+                self._cond.notify()
+
+    def set_interval(self, name, interval):
+        """Altera intervalo de um job (vale a partir da próxima execução)"""
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is not None and job.interval != interval:
+                job.interval = interval
+                # Reagenda para não esperar o intervalo antigo inteiro
+                self._reschedule(job, time.time())
+                self._cond.notify()
+
+    def run_now(self, name):
+        """Antecipa a próxima execução de um job para já (ex.: jogo abriu); False se não existe"""
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is None:
+                return False
+            job.next_run = time.time()
+            heapq.heappush(self._heap, (job.next_run, next(self._counter), job))
+            self._cond.notify()
+            return True
+
+    def get_job(self, name):
+        return self._jobs.get(name)
+
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs.values())
+
+    def start(self):
+        """Inicia a thread do scheduler (idempotente)"""
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run_loop, name="scheduler", daemon=True)
+        self.thread.start()
+        self.add_job('power_policy', self._update_power_policy, 30, first_delay=0, power_aware=False)
+
+    def stop(self):
+        """Para a thread do scheduler"""
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    # === Internals ===
+
+    def _effective_interval(self, job):
+        factor = self.slowdown if job.power_aware else 1.0
+        return job.interval * factor * job.backoff
+
+    def _aligned_next(self, job, now):
+        """Próximo múltiplo do intervalo (jobs com intervalos compatíveis acordam juntos)"""
+        interval = self._effective_interval(job)
+        next_run = (int(now / interval) + 1) * interval
+        if job.jitter:
+            next_run += random.uniform(0, job.jitter * interval)
+        return next_run
+
+    def _reschedule(self, job, now):
+        job.next_run = self._aligned_next(job, now)
+        heapq.heappush(self._heap, (job.next_run, next(self._counter), job))
+
+    def _run_loop(self):
+        while True:
+            with self._cond:
+                if not self.running:
+                    return
+                # Descarta entradas canceladas/obsoletas do topo
+                while self._heap and (self._heap[0][2].cancelled or
+                                      self._heap[0][0] != self._heap[0][2].next_run):
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                now = time.time()
+                wait = self._heap[0][0] - now
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+
+                # Agrupa todos os jobs devidos neste wakeup
+                due = []
+                while self._heap and self._heap[0][0] <= now + self.COALESCE_WINDOW:
+                    run_at, _, job = heapq.heappop(self._heap)
+                    if not job.cancelled and job.next_run == run_at:
+                        due.append(job)
+
+            for job in due:
+                self._execute(job)
+                with self._cond:
+                    if not job.cancelled:
+                        # Coalescing: agenda a partir de agora, execuções perdidas não acumulam
+                        self._reschedule(job, time.time())
+
+    def _execute(self, job):
+        if job.threaded:
+            if job._busy:
+                return  # Execução anterior ainda rodando -> coalesce
+            job._busy = True
+            threading.Thread(target=self._invoke, args=(job,), name=job.name, daemon=True).start()
+        else:
+            self._invoke(job)
+
+    def _invoke(self, job):
+        start = time.time()
+        try:
+            job.func()
+            job.runs += 1
+            job.backoff = 1
+        except Exception as e:
+            job.errors += 1
+            job.last_error = e
+            job.backoff = min(job.backoff * 2, job.max_backoff)
+            print(f"[SCHED] Erro no job '{job.name}': {e} (próxima em {self._effective_interval(job):.0f}s)")
+        finally:
+            job.last_duration = time.time() - start
+            job._busy = False
+
+    def _update_power_policy(self):
+        """Desacelera amostragem em bateria ou com usuário ocioso"""
+        try:
+            battery = psutil.sensors_battery()
+            self.on_battery = bool(battery and not battery.power_plugged)
+        except Exception:
+            self.on_battery = False
+
+        idle_seconds = get_user_idle_seconds()
+        self.user_idle = idle_seconds is not None and idle_seconds >= self.idle_after_seconds
+
+        slowdown = 1.0
+        if self.on_battery:
+            slowdown *= self.battery_slowdown
+        if self.user_idle:
+            slowdown *= self.idle_slowdown
+
+        if slowdown != self.slowdown:
+            print(f"[SCHED] Ritmo dos jobs: x{slowdown:.1f} "
+                  f"(bateria: {self.on_battery}, ocioso: {self.user_idle})")
+            self.slowdown = slowdown
+
+
+def get_user_idle_seconds():
+    """Segundos desde o último input do usuário (GetLastInputInfo) ou None"""
+    if sys.platform != 'win32':
+        return None
+    try:
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+        info = LASTINPUTINFO()
+        info.cbSize = ctypes.sizeof(info)
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            return None
+        millis = ctypes.windll.kernel32.GetTickCount() - info.dwTime
+        return (millis & 0xFFFFFFFF) / 1000.0
+    except Exception:
+        return None
+
+
+# Singleton global
+_instance = None
+
+def get_scheduler() -> Scheduler:
+    """Retorna instância singleton do Scheduler"""
+    global _instance
+    if _instance is None:
+        _instance = Scheduler()
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste
+    sched = get_scheduler()
+    sched.add_job('fast', lambda: print(f"{time.time():.2f} fast"), 1)
+    sched.add_job('slow', lambda: print(f"{time.time():.2f} slow"), 3)
+    sched.add_job('broken', lambda: 1 / 0, 1, power_aware=False)
+
+    try:
+        time.sleep(10)
+    except KeyboardInterrupt:
+        pass
+    sched.stop()
+    for job in sched.jobs():
+        print(f"{job.name}: {job.runs} execuções, {job.errors} erros")
@@ -0,0 +1,312 @@
+"""
+Sensor Registry - Descoberta única de sensores de temperatura, indexados por
+identificador e tipo (pacote, núcleo, GPU hotspot, NVMe), com leitura
+direcionada (WHERE Identifier=...) e nível de confiança por fonte.
+A descoberta fica em cache entre execuções (~/.nvme_optimizer/sensors.json).
+"""
+import json
+import platform
+import re
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+# Namespaces WMI de monitores de hardware (LibreHardwareMonitor é o fork ativo)
+HW_MONITOR_NAMESPACES = ('root\\LibreHardwareMonitor', 'root\\OpenHardwareMonitor')
+ACPI_NAMESPACE = 'root\\wmi'
+
+# Tipos de sensor
+CPU_PACKAGE = 'cpu_package'
+CPU_CORE = 'cpu_core'
+GPU_CORE = 'gpu_core'
+GPU_HOTSPOT = 'gpu_hotspot'
+NVME_COMPOSITE = 'nvme_composite'
+DISK = 'disk'
+ACPI_ZONE = 'acpi_zone'
+OTHER = 'other'
+
+# Confiança por fonte/tipo
+HIGH = 'high'        # Sensor digital do próprio chip (DTS, NVML, SMART)
+MEDIUM = 'medium'    # Sensor real, mas não exatamente o que se quer (ex.: maior núcleo)
+LOW = 'low'          # Aproximação (zona ACPI da placa-mãe, GPU + offset)
+
+CACHE_VERSION = 1
+
+_CORE_RE = re.compile(r'core\s*#\s*(\d+)', re.IGNORECASE)
+
+
+class SensorInfo(NamedTuple):
+    """Sensor descoberto"""
+    identifier: str
+    name: str
+    kind: str
+    namespace: str
+    index: Optional[int]     # Núcleo (cpu_core) ou None
+    confidence: str
+
+
+class SensorValue(NamedTuple):
+    """Leitura de um sensor"""
+    identifier: str
+    kind: str
+    value: float
+    source: str              # Namespace/API de origem
+    confidence: str
+    timestamp: float
+
+
+def classify(name, identifier):
+    """(kind, index, confidence) a partir do nome/identificador do LHM/OHM"""
+    ident = identifier.lower()
+    lname = name.lower()
+
+    if 'cpu' in ident:  # /intelcpu/0/temperature/0, /amdcpu/0/temperature/2
+        match = _CORE_RE.search(name)
+        if match and 'distance' not in lname and 'max' not in lname and 'average' not in lname:
+            return CPU_CORE, int(match.group(1)) - 1, HIGH
+        if 'package' in lname or 'tctl' in lname or 'tdie' in lname:
+            return CPU_PACKAGE, None, HIGH
+        if 'core max' in lname:
+            return CPU_PACKAGE, None, MEDIUM
+        return OTHER, None, MEDIUM
+
+    if 'gpu' in ident:  # /gpu-nvidia/0/temperature/0, /nvidiagpu/0/temperature/2
+        if 'hot spot' in lname or 'hotspot' in lname or 'junction' in lname:
+            return GPU_HOTSPOT, None, HIGH
+        if 'core' in lname or lname == 'gpu':
+            return GPU_CORE, None, HIGH
+        return OTHER, None, MEDIUM
+
+    if '/nvme/' in ident:
+        if 'composite' in lname or lname == 'temperature':
+            return NVME_COMPOSITE, None, HIGH
+        return DISK, None, MEDIUM
+
+    if '/hdd/' in ident or '/ssd/' in ident:
+        return DISK, None, MEDIUM
+
+    return OTHER, None, LOW
+
+
+class SensorRegistry:
+    """
+    Índice de sensores. `query(namespace, wql)` executa WQL e devolve objetos
+    com atributos (conexão WMI real, broker ou fake de teste).
+    """
+
+    def __init__(self, query, cache_path=None, namespaces=HW_MONITOR_NAMESPACES):
+        self.query = query
+        self.namespaces = namespaces
+        self.cache_path = Path(cache_path) if cache_path else Path.home() / ".nvme_optimizer" / "sensors.json"
+        self.sensors = {}           # identifier -> SensorInfo
+        self._by_kind = {}          # kind -> [SensorInfo]
+        self.discovered_at = 0.0
+        self.from_cache = False
+
+    # === Descoberta ===
+
+    def discover(self, force=False):
+        """Carrega do cache ou varre os namespaces uma vez"""
+        if not force and self._load_cache():
+            self.from_cache = True
+            return self.sensors
+
+        sensors = []
+        for namespace in self.namespaces:
+            try:
+                rows = self.query(namespace,
+                                  "SELECT Identifier, Name FROM Sensor WHERE SensorType = 'Temperature'")
+            except Exception:
+                continue
+            for row in rows:
+                kind, index, confidence = classify(row.Name or '', row.Identifier or '')
+                sensors.append(SensorInfo(row.Identifier, row.Name, kind, namespace, index, confidence))
+            if sensors:
+                break  # LHM e OHM expõem os mesmos sensores: usa o primeiro que responder
+
+        try:
+            for row in self.query(ACPI_NAMESPACE, "SELECT InstanceName FROM MSAcpi_ThermalZoneTemperature"):
+                sensors.append(SensorInfo(row.InstanceName, row.InstanceName, ACPI_ZONE,
+                                          ACPI_NAMESPACE, None, LOW))
+        except Exception:
+            pass
+
+        self.from_cache = False
+        self._index(sensors)
+        self._save_cache()
+        return self.sensors
+
+    def _index(self, sensors):
+        self.sensors = {s.identifier: s for s in sensors}
+        self._by_kind = {}
+        for sensor in sorted(sensors, key=lambda s: (s.index is None, s.index or 0, s.identifier)):
+            self._by_kind.setdefault(sensor.kind, []).append(sensor)
+        self.discovered_at = time.time()
+
+    def _load_cache(self):
+        try:
+            data = json.loads(self.cache_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != CACHE_VERSION or data.get('host') != platform.node():
+            return False
+        sensors = [SensorInfo(*entry) for entry in data.get('sensors', [])]
+        if not sensors:
+            return False
+        self._index(sensors)
+        self.discovered_at = data.get('discovered_at', 0.0)
+        return True
+
+    def _save_cache(self):
+        if not self.sensors:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_path.write_text(json.dumps({
+                'version': CACHE_VERSION,
+                'host': platform.node(),
+                'discovered_at': self.discovered_at,
+                'sensors': [list(s) for s in self.sensors.values()],
+            }, indent=1), encoding='utf-8')
+        except OSError:
+            pass
+
+    # === Consulta do índice ===
+
+    def by_kind(self, kind):
+        return list(self._by_kind.get(kind, ()))
+
+    def get(self, identifier):
+        return self.sensors.get(identifier)
+
+    # === Leitura ===
+
+    def read(self, sensors):
+        """
+        Lê só os sensores pedidos: um WQL por namespace com
+        WHERE Identifier = '...' OR ... (em vez de varrer Sensor()).
+        Sensor sumido (hardware mudou) -> redescoberta na próxima chamada.
+        """
+        values = {}
+        now = time.time()
+        groups = {}
+        for sensor in sensors:
+            groups.setdefault(sensor.namespace, []).append(sensor)
+
+        for namespace, group in groups.items():
+            try:
+                if namespace == ACPI_NAMESPACE:
+                    rows = self.query(namespace,
+                                      "SELECT InstanceName, CurrentTemperature FROM MSAcpi_ThermalZoneTemperature")
+                    for row in rows:
+                        sensor = self.sensors.get(row.InstanceName)
+                        if sensor in group:
+                            celsius = row.CurrentTemperature / 10.0 - 273.15
+                            values[sensor.identifier] = SensorValue(
+                                sensor.identifier, sensor.kind, celsius, 'acpi', sensor.confidence, now)
+                    continue
+
+                where = ' OR '.join(f"Identifier = '{_escape(s.identifier)}'" for s in group)
+                for row in self.query(namespace, f"SELECT Identifier, Value FROM Sensor WHERE {where}"):
+                    sensor = self.sensors.get(row.Identifier)
+                    if sensor is not None and row.Value is not None:
+                        values[sensor.identifier] = SensorValue(
+                            sensor.identifier, sensor.kind, float(row.Value),
+                            _source_name(namespace), sensor.confidence, now)
+            except Exception:
+                continue
+
+        if sensors and not values and self.from_cache:
+            # Cache de descoberta obsoleto: descarta para redescobrir
+            self.from_cache = False
+            self.sensors = {}
+            self._by_kind = {}
+        return values
+
+    def read_kind(self, kind):
+        return self.read(self.by_kind(kind))
+
+    def cpu_reading(self):
+        """
+        (temperatura CPU, fonte, confiança, temperaturas por núcleo) em UMA consulta.
+        Ordem: pacote > maior núcleo > zona ACPI.
+        """
+        wanted = self.by_kind(CPU_PACKAGE) + self.by_kind(CPU_CORE)
+        values = self.read(wanted) if wanted else {}
+        cores = tuple(values[s.identifier].value for s in self.by_kind(CPU_CORE) if s.identifier in values)
+
+        for sensor in self.by_kind(CPU_PACKAGE):
+            if sensor.identifier in values and values[sensor.identifier].value > 0:
+                value = values[sensor.identifier]
+                return value.value, value.source, value.confidence, cores
+        if cores:
+            return max(cores), _source_name(self.by_kind(CPU_CORE)[0].namespace), MEDIUM, cores
+
+        acpi = self.read_kind(ACPI_ZONE)
+        if acpi:
+            hottest = max(acpi.values(), key=lambda v: v.value)
+            return hottest.value, hottest.source, LOW, ()
+        return 0.0, 'none', LOW, ()
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def _source_name(namespace):
+    return {
+        'root\\LibreHardwareMonitor': 'lhm',
+        'root\\OpenHardwareMonitor': 'ohm',
+        ACPI_NAMESPACE: 'acpi',
+    }.get(namespace, namespace)
+
+
+class _Row:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeSensorSource:
+    """
+    Fonte WMI falsa (testes fora do Windows): responde WQL de descoberta e de
+    leitura a partir de uma lista de (namespace, identifier, name, value).
+    """
+
+    def __init__(self, sensors=None):
+        self.sensors = sensors or [
+            ('root\\LibreHardwareMonitor', '/intelcpu/0/temperature/0', 'CPU Core #1', 61.0),
+            ('root\\LibreHardwareMonitor', '/intelcpu/0/temperature/1', 'CPU Core #2', 64.0),
+            ('root\\LibreHardwareMonitor', '/intelcpu/0/temperature/4', 'CPU Package', 66.0),
+            ('root\\LibreHardwareMonitor', '/gpu-nvidia/0/temperature/0', 'GPU Core', 58.0),
+            ('root\\LibreHardwareMonitor', '/gpu-nvidia/0/temperature/2', 'GPU Hot Spot', 71.0),
+            ('root\\LibreHardwareMonitor', '/nvme/0/temperature/0', 'Composite Temperature', 44.0),
+        ]
+        self.queries = []
+
+    def __call__(self, namespace, wql):
+        self.queries.append((namespace, wql))
+        if 'MSAcpi' in wql:
+            return []
+        rows = [s for s in self.sensors if s[0] == namespace]
+        if 'WHERE Identifier' in wql:
+            wanted = set(re.findall(r"Identifier = '([^']*)'", wql))
+            rows = [s for s in rows if s[1] in wanted]
+        return [_Row(Identifier=s[1], Name=s[2], Value=s[3]) for s in rows]
+
+
+if __name__ == "__main__":
+    # Teste com fonte falsa
+    import tempfile
+    source = FakeSensorSource()
+    registry = SensorRegistry(source, cache_path=Path(tempfile.gettempdir()) / "sensors_test.json")
+    registry.discover(force=True)
+    for kind in (CPU_PACKAGE, CPU_CORE, GPU_HOTSPOT, NVME_COMPOSITE):
+        print(f"{kind}: {[s.name for s in registry.by_kind(kind)]}")
+
+    source.queries.clear()
+    print(registry.cpu_reading())
+    print(f"Consultas para ler CPU (pacote + núcleos): {len(source.queries)} -> {source.queries[0][1][:80]}...")
+
+    cached = SensorRegistry(source, cache_path=registry.cache_path)
+    cached.discover()
+    print(f"Segunda execução usa cache: {cached.from_cache} ({len(cached.sensors)} sensores)")
@@ -0,0 +1,405 @@
+"""
+Service State Index - Estado de TODOS os serviços em uma única enumeração
+EnumServicesStatusExW (ctypes) + registro (tipo de início e dependências);
+fallback: um único `sc queryex state= all` parseado
+"""
+import ctypes
+import re
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple
+
+# SERVICE_STATUS_PROCESS.dwCurrentState
+SERVICE_STATES = {
+    1: 'stopped',
+    2: 'start_pending',
+    3: 'stop_pending',
+    4: 'running',
+    5: 'continue_pending',
+    6: 'pause_pending',
+    7: 'paused',
+}
+
+# HKLM\SYSTEM\CurrentControlSet\Services\<nome>\Start
+START_TYPES = {0: 'boot', 1: 'system', 2: 'auto', 3: 'demand', 4: 'disabled'}
+
+SERVICES_KEY = r"SYSTEM\CurrentControlSet\Services"
+
+SC_MANAGER_ENUMERATE_SERVICE = 0x0004
+SC_ENUM_PROCESS_INFO = 0
+SERVICE_WIN32 = 0x30
+SERVICE_STATE_ALL = 0x3
+ERROR_MORE_DATA = 234
+
+
+class ServiceInfo(NamedTuple):
+    """Estado de um serviço"""
+    name: str
+    display_name: str
+    state: str                       # 'running', 'stopped', ...
+    pid: int
+    start_type: Optional[str]        # 'auto', 'demand', 'disabled', ... (None = desconhecido)
+    dependencies: Tuple[str, ...]    # Serviços dos quais este depende
+
+
+# Saída real de `sc queryex type= service state= all` (recortada) - fixture do parser
+SAMPLE_SC_QUERYEX = """
+SERVICE_NAME: DiagTrack
+DISPLAY_NAME: Connected User Experiences and Telemetry
+        TYPE               : 10  WIN32_OWN_PROCESS
+        STATE              : 4  RUNNING
+                                (STOPPABLE, NOT_PAUSABLE, ACCEPTS_SHUTDOWN)
+        WIN32_EXIT_CODE    : 0  (0x0)
+        SERVICE_EXIT_CODE  : 0  (0x0)
+        CHECKPOINT         : 0x0
+        WAIT_HINT          : 0x0
+        PID                : 4312
+        FLAGS              :
+
+SERVICE_NAME: SysMain
+DISPLAY_NAME: SysMain
+        TYPE               : 30  WIN32
+        STATE              : 1  STOPPED
+        WIN32_EXIT_CODE    : 1077  (0x435)
+        SERVICE_EXIT_CODE  : 0  (0x0)
+        CHECKPOINT         : 0x0
+        WAIT_HINT          : 0x0
+        PID                : 0
+        FLAGS              :
+
+SERVICE_NAME: WSearch
+DISPLAY_NAME: Windows Search
+        TYPE               : 10  WIN32_OWN_PROCESS
+        STATE              : 2  START_PENDING
+                                (NOT_STOPPABLE, NOT_PAUSABLE, IGNORES_SHUTDOWN)
+        WIN32_EXIT_CODE    : 0  (0x0)
+        SERVICE_EXIT_CODE  : 0  (0x0)
+        CHECKPOINT         : 0x1
+        WAIT_HINT          : 0x7d0
+        PID                : 9120
+        FLAGS              :
+"""
+
+_SC_FIELD = re.compile(r'^\s*([A-Z_0-9]+)\s*:\s*(.*?)\s*$')
+
+
+def parse_sc_queryex(text):
+    """
+    Parseia a saída de `sc queryex` -> {nome_minúsculo: ServiceInfo}
+    (tipo de início e dependências não fazem parte dessa saída)
+    """
+    services = {}
+    current = None
+
+    def flush():
+        if current and current.get('SERVICE_NAME'):
+            name = current['SERVICE_NAME']
+            services[name.lower()] = ServiceInfo(
+                name=name,
+                display_name=current.get('DISPLAY_NAME', name),
+                state=current.get('state', 'unknown'),
+                pid=current.get('pid', 0),
+                start_type=None,
+                dependencies=(),
+            )
+
+    for line in text.splitlines():
+        match = _SC_FIELD.match(line)
+        if not match:
+            continue
+        key, value = match.groups()
+        if key == 'SERVICE_NAME':
+            flush()
+            current = {'SERVICE_NAME': value}
+        elif current is None:
+            continue
+        elif key == 'DISPLAY_NAME':
+            current['DISPLAY_NAME'] = value
+        elif key == 'STATE':
+            # "4  RUNNING" - usa o código numérico (independe do idioma)
+            code = value.split()[0] if value else ''
+            current['state'] = SERVICE_STATES.get(int(code), 'unknown') if code.isdigit() else 'unknown'
+        elif key == 'PID':
+            current['pid'] = int(value) if value.isdigit() else 0
+    flush()
+    return services
+
+
+def _read_registry_config(names):
+    """Tipo de início e dependências (registro) -> {nome_minúsculo: (start_type, deps)}"""
+    try:
+        import winreg
+    except ImportError:
+        return {}
+
+    config = {}
+    try:
+        root = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, SERVICES_KEY)
+    except OSError:
+        return {}
+
+    with root:
+        for name in names:
+            try:
+                with winreg.OpenKey(root, name) as key:
+                    try:
+                        start_type = START_TYPES.get(winreg.QueryValueEx(key, 'Start')[0])
+                    except OSError:
+                        start_type = None
+                    try:
+                        deps = tuple(winreg.QueryValueEx(key, 'DependOnService')[0] or ())
+                    except OSError:
+                        deps = ()
+                config[name.lower()] = (start_type, deps)
+            except OSError:
+                continue
+    return config
+
+
+def _with_registry_config(services):
+    """Completa ServiceInfo com tipo de início e dependências do registro"""
+    config = _read_registry_config([info.name for info in services.values()])
+    for key, (start_type, deps) in config.items():
+        if key in services:
+            services[key] = services[key]._replace(start_type=start_type, dependencies=deps)
+    return services
+
+
+class SERVICE_STATUS_PROCESS(ctypes.Structure):
+    _fields_ = [
+        ("dwServiceType", ctypes.c_uint32),
+        ("dwCurrentState", ctypes.c_uint32),
+        ("dwControlsAccepted", ctypes.c_uint32),
+        ("dwWin32ExitCode", ctypes.c_uint32),
+        ("dwServiceSpecificExitCode", ctypes.c_uint32),
+        ("dwCheckPoint", ctypes.c_uint32),
+        ("dwWaitHint", ctypes.c_uint32),
+        ("dwProcessId", ctypes.c_uint32),
+        ("dwServiceFlags", ctypes.c_uint32),
+    ]
+
+
+class ENUM_SERVICE_STATUS_PROCESSW(ctypes.Structure):
+    _fields_ = [
+        ("lpServiceName", ctypes.c_wchar_p),
+        ("lpDisplayName", ctypes.c_wchar_p),
+        ("ServiceStatusProcess", SERVICE_STATUS_PROCESS),
+    ]
+
+
+class NativeServiceBackend:
+    """EnumServicesStatusExW: uma chamada (ou poucas, se o buffer não couber)"""
+
+    name = 'native'
+
+    def __init__(self):
+        self.advapi32 = ctypes.WinDLL('advapi32', use_last_error=True)
+        self.advapi32.OpenSCManagerW.restype = ctypes.c_void_p
+        self.advapi32.OpenSCManagerW.argtypes = [ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_uint32]
+        self.advapi32.CloseServiceHandle.argtypes = [ctypes.c_void_p]
+        self.advapi32.EnumServicesStatusExW.argtypes = [
+            ctypes.c_void_p, ctypes.c_int, ctypes.c_uint32, ctypes.c_uint32,
+            ctypes.c_void_p, ctypes.c_uint32, ctypes.POINTER(ctypes.c_uint32),
+            ctypes.POINTER(ctypes.c_uint32), ctypes.POINTER(ctypes.c_uint32), ctypes.c_wchar_p,
+        ]
+
+    def enumerate(self):
+        manager = self.advapi32.OpenSCManagerW(None, None, SC_MANAGER_ENUMERATE_SERVICE)
+        if not manager:
+            raise ctypes.WinError(ctypes.get_last_error())
+
+        services = {}
+        try:
+            needed = ctypes.c_uint32(0)
+            returned = ctypes.c_uint32(0)
+            resume = ctypes.c_uint32(0)
+            size = 64 * 1024
+            while True:
+                buffer = ctypes.create_string_buffer(size)
+                ok = self.advapi32.EnumServicesStatusExW(
+                    manager, SC_ENUM_PROCESS_INFO, SERVICE_WIN32, SERVICE_STATE_ALL,
+                    buffer, size, ctypes.byref(needed), ctypes.byref(returned),
+                    ctypes.byref(resume), None
+                )
+                error = 0 if ok else ctypes.get_last_error()
+                if not ok and error != ERROR_MORE_DATA:
+                    raise ctypes.WinError(error)
+
+                entries = ctypes.cast(buffer, ctypes.POINTER(ENUM_SERVICE_STATUS_PROCESSW))
+                for i in range(returned.value):
+                    entry = entries[i]
+                    status = entry.ServiceStatusProcess
+                    services[entry.lpServiceName.lower()] = ServiceInfo(
+                        name=entry.lpServiceName,
+                        display_name=entry.lpDisplayName or entry.lpServiceName,
+                        state=SERVICE_STATES.get(status.dwCurrentState, 'unknown'),
+                        pid=status.dwProcessId,
+                        start_type=None,
+                        dependencies=(),
+                    )
+
+                if ok:
+                    break
+                # ERROR_MORE_DATA: continua do resume handle (buffer do tamanho pedido)
+                size = max(size, needed.value)
+        finally:
+            self.advapi32.CloseServiceHandle(manager)
+
+        return _with_registry_config(services)
+
+
+class ScQueryBackend:
+    """Fallback: um único `sc queryex` para todos os serviços"""
+
+    name = 'sc'
+
+    def __init__(self, executor=None):
+        from modules import command_executor
+        self.executor = executor or command_executor.get_executor()
+
+    def enumerate(self):
+        result = self.executor.run(['sc', 'queryex', 'type=', 'service', 'state=', 'all'], timeout=10)
+        if not result.ok:
+            raise RuntimeError(result.stderr or result.stdout or 'sc queryex falhou')
+        return _with_registry_config(parse_sc_queryex(result.stdout))
+
+
+class FixtureServiceBackend:
+    """Backend com saída de `sc queryex` gravada (testes fora do Windows)"""
+
+    name = 'fixture'
+
+    def __init__(self, text=SAMPLE_SC_QUERYEX, start_types=None):
+        self.text = text
+        self.start_types = start_types or {}
+        self.calls = 0
+
+    def enumerate(self):
+        self.calls += 1
+        services = parse_sc_queryex(self.text)
+        for key, start_type in self.start_types.items():
+            if key.lower() in services:
+                services[key.lower()] = services[key.lower()]._replace(start_type=start_type)
+        return services
+
+
+class ServiceStateIndex:
+    """Mapa indexado (nome do serviço, sem diferenciar maiúsculas) -> ServiceInfo"""
+
+    def __init__(self, backend=None, max_age=30, fallback=None, max_failures=3):
+        self.backend = backend
+        self.max_age = max_age
+        self.fallback = fallback            # Backend reserva (sc queryex) se o principal falhar
+        self.max_failures = max_failures    # Falhas seguidas do principal até trocar de vez
+        self._failures = 0
+        self._services = {}
+        self._timestamp = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Relê o estado de todos os serviços (uma enumeração)"""
+        if self.backend is None:
+            return self._services
+        try:
+            services = self.backend.enumerate()
+            self._failures = 0
+        except Exception as e:
+            print(f"[SERVICES] Erro ao enumerar serviços ({self.backend.name}): {e}")
+            services = self._enumerate_fallback()
+            if services is None:
+                return self._services
+        with self._lock:
+            self._services = services
+            self._timestamp = time.time()
+        return services
+
+    def _enumerate_fallback(self):
+        """Enumeração pelo backend reserva; troca de vez após max_failures seguidas"""
+        if self.fallback is None or self.fallback.name == self.backend.name:
+            return None
+        self._failures += 1
+        try:
+            services = self.fallback.enumerate()
+        except Exception as e:
+            print(f"[SERVICES] Erro ao enumerar serviços ({self.fallback.name}): {e}")
+            return None
+        if self._failures >= self.max_failures:
+            print(f"[SERVICES] {self.backend.name} falhou {self._failures}x seguidas, usando {self.fallback.name}")
+            self.backend = self.fallback
+        return services
+
+    def invalidate(self):
+        """Força releitura no próximo acesso (após stop/config)"""
+        self._timestamp = 0.0
+
+    def _current(self):
+        if time.time() - self._timestamp > self.max_age:
+            self.refresh()
+        return self._services
+
+    def get(self, name) -> Optional[ServiceInfo]:
+        return self._current().get(name.lower())
+
+    def state(self, name):
+        """'running', 'stopped', ... ou 'unknown' (serviço inexistente)"""
+        info = self.get(name)
+        return info.state if info else 'unknown'
+
+    def all(self):
+        return dict(self._current())
+
+    def count(self, state='running'):
+        return sum(1 for info in self._current().values() if info.state == state)
+
+    def dependents(self, name):
+        """Serviços que dependem de `name`"""
+        key = name.lower()
+        return [info.name for info in self._current().values()
+                if key in (d.lower() for d in info.dependencies)]
+
+
+def get_default_backend():
+    """Enumeração nativa no Windows; sc queryex se a API falhar; None fora do Windows"""
+    if sys.platform != 'win32':
+        return None
+    try:
+        return NativeServiceBackend()
+    except Exception:
+        return ScQueryBackend()
+
+
+def get_fallback_backend():
+    """sc queryex como reserva da enumeração nativa; None fora do Windows"""
+    if sys.platform != 'win32':
+        return None
+    try:
+        return ScQueryBackend()
+    except Exception:
+        return None
+
+
+# Singleton global
+_instance = None
+
+def get_index() -> ServiceStateIndex:
+    """Retorna índice singleton de estado dos serviços"""
+    global _instance
+    if _instance is None:
+        _instance = ServiceStateIndex(backend=get_default_backend(), fallback=get_fallback_backend())
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste (fixture fora do Windows)
+    backend = get_default_backend() or FixtureServiceBackend(start_types={'SysMain': 'disabled'})
+    index = ServiceStateIndex(backend)
+
+    start = time.perf_counter()
+    services = index.refresh()
+    print(f"{len(services)} serviços em {(time.perf_counter() - start) * 1000:.1f}ms ({backend.name})")
+
+    for name in ('DiagTrack', 'SysMain', 'WSearch', 'NaoExiste'):
+        info = index.get(name)
+        print(f"  {name}: {info.state if info else 'unknown'} "
+              f"(pid {info.pid if info else '-'}, início {info.start_type if info else '-'})")
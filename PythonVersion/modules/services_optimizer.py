@@ -2,8 +2,9 @@
 Windows Services Optimizer
 Desativa serviços desnecessários para liberar RAM e CPU
 """
-import subprocess
 import ctypes
+from modules import command_executor
+from modules import service_state
 
 class WindowsServicesOptimizer:
     """Otimiza serviços do Windows para gaming/performance"""
@@ -41,6 +42,8 @@ class WindowsServicesOptimizer:
     def __init__(self, config=None):
         self.config = config or {}
         self.disabled_services = []
+        self.executor = command_executor.get_executor()
+        self.state = service_state.get_index()  # Uma enumeração para todos os serviços
     
     def is_admin(self):
         """Verifica se tem privilégios de admin"""
@@ -49,60 +52,44 @@ class WindowsServicesOptimizer:
         except:
             return False
     
+    @staticmethod
+    def _simple_status(state):
+        if state == 'running':
+            return 'running'
+        elif state == 'stopped':
+            return 'stopped'
+        return 'unknown'
+    
     def get_service_status(self, service_name):
         """Retorna status do serviço"""
-        try:
-            result = subprocess.run(
-                ['sc', 'query', service_name],
-                capture_output=True, text=True, timeout=5,
-                encoding='utf-8', errors='ignore'
-            )
-            if 'RUNNING' in result.stdout:
-                return 'running'
-            elif 'STOPPED' in result.stdout:
-                return 'stopped'
-            else:
-                return 'unknown'
-        except:
-            return 'unknown'
+        return self._simple_status(self.state.state(service_name))
+    
+    def get_services_status(self, service_names):
+        """Status de vários serviços (lidos do mesmo índice)"""
+        return {s: self.get_service_status(s) for s in service_names}
+    
+    @staticmethod
+    def _disable_chain(service_name, running=True):
+        """stop -> config (em sequência dentro do serviço)"""
+        chain = [['sc', 'config', service_name, 'start=', 'disabled']]
+        if running:
+            chain.insert(0, ['sc', 'stop', service_name])
+        return chain
     
     def disable_service(self, service_name):
         """Desativa um serviço"""
-        try:
-            # Para o serviço
-            subprocess.run(
-                ['sc', 'stop', service_name],
-                capture_output=True, timeout=10,
-                encoding='utf-8', errors='ignore'
-            )
-            
-            # Configura para não iniciar automaticamente
-            result = subprocess.run(
-                ['sc', 'config', service_name, 'start=', 'disabled'],
-                capture_output=True, text=True, timeout=5,
-                encoding='utf-8', errors='ignore'
-            )
-            
-            return result.returncode == 0
-        except:
-            return False
+        results = self.executor.run_chains([self._disable_chain(service_name)])[0]
+        self.state.invalidate()
+        return results[-1].ok
     
     def enable_service(self, service_name):
         """Reativa um serviço"""
-        try:
-            subprocess.run(
-                ['sc', 'config', service_name, 'start=', 'auto'],
-                capture_output=True, timeout=5,
-                encoding='utf-8', errors='ignore'
-            )
-            subprocess.run(
-                ['sc', 'start', service_name],
-                capture_output=True, timeout=10,
-                encoding='utf-8', errors='ignore'
-            )
-            return True
-        except:
-            return False
+        self.executor.run_chains([[
+            ['sc', 'config', service_name, 'start=', 'auto'],
+            ['sc', 'start', service_name],
+        ]])
+        self.state.invalidate()
+        return True
     
     def optimize(self, aggressive=False):
         """Aplica otimizações de serviços"""
@@ -112,21 +99,31 @@ class WindowsServicesOptimizer:
         
         print("[SERVICES] Otimizando serviços do Windows...")
         
+        # 1) Uma enumeração para todos os serviços
+        self.state.refresh()
+        statuses = self.get_services_status(list(self.SAFE_TO_DISABLE))
+        targets = []
+        for service, status in statuses.items():
+            info = self.state.get(service)
+            if status == 'stopped' and info.start_type == 'disabled':
+                continue  # Já parado e desativado: nada a fazer
+            if status in ('running', 'stopped'):
+                targets.append(service)
+        
+        # 2) Serviços diferentes em paralelo; stop/config de cada um em sequência
+        chains = [self._disable_chain(s, running=statuses[s] == 'running') for s in targets]
+        results = self.executor.run_chains(chains)
+        
         disabled_count = 0
         ram_saved_estimate = 0
         
-        for service, description in self.SAFE_TO_DISABLE.items():
-            status = self.get_service_status(service)
-            
-            if status == 'running':
-                if self.disable_service(service):
-                    print(f"[SERVICES] ✓ Desativado: {service}")
-                    self.disabled_services.append(service)
-                    disabled_count += 1
-                    ram_saved_estimate += 15  # Estimativa: ~15MB por serviço
-            elif status == 'stopped':
-                # Já está parado, apenas garante que não inicia
-                self.disable_service(service)
+        for service, chain_results in zip(targets, results):
+            if statuses[service] == 'running' and chain_results[-1].ok:
+                print(f"[SERVICES] ✓ Desativado: {service}")
+                self.disabled_services.append(service)
+                disabled_count += 1
+                ram_saved_estimate += 15  # Estimativa: ~15MB por serviço
+        self.state.invalidate()
         
         print(f"[SERVICES] ✓ {disabled_count} serviços desativados")
         print(f"[SERVICES] ✓ RAM estimada liberada: ~{ram_saved_estimate}MB")
@@ -138,14 +135,27 @@ class WindowsServicesOptimizer:
         return {
             'disabled_count': len(self.disabled_services),
             'disabled_services': self.disabled_services,
-            'ram_saved_mb': len(self.disabled_services) * 15
+            'ram_saved_mb': len(self.disabled_services) * 15,
+            'running_count': self.state.count('running'),
         }
     
     def restore_all(self):
         """Restaura todos os serviços desativados"""
         print("[SERVICES] Restaurando serviços...")
+        self.state.refresh()
+        chains = []
+        for service in self.disabled_services:
+            chain = []
+            info = self.state.get(service)
+            if info is None or info.start_type != 'auto':
+                chain.append(['sc', 'config', service, 'start=', 'auto'])
+            if info is None or info.state != 'running':
+                chain.append(['sc', 'start', service])
+            if chain:
+                chains.append(chain)
+        self.executor.run_chains(chains)
+        self.state.invalidate()
         for service in self.disabled_services:
-            self.enable_service(service)
             print(f"[SERVICES] ✓ Restaurado: {service}")
         self.disabled_services = []
 
@@ -154,8 +164,9 @@ if __name__ == "__main__":
     optimizer = WindowsServicesOptimizer()
     
     print("Serviços que serão desativados:")
+    statuses = optimizer.get_services_status(list(optimizer.SAFE_TO_DISABLE))
     for svc, desc in optimizer.SAFE_TO_DISABLE.items():
-        status = optimizer.get_service_status(svc)
+        status = statuses[svc]
         print(f"  - {svc}: {desc} [{status}]")
     
     input("\nPressione ENTER para otimizar...")
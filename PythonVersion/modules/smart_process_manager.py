@@ -4,6 +4,7 @@ import ctypes
 import threading
 import psutil
 import time
+from modules import process_table
 
 class IO_PRIORITY:
     VeryLow = 0    # Background (Chrome, Updates)
@@ -12,6 +13,11 @@ class IO_PRIORITY:
     High = 3       # Games, Active Apps
     Critical = 4
 
+class MEMORY_PRIORITY:
+    VeryLow = 1    # Páginas saem do working set / standby primeiro
+    Low = 2
+    Normal = 5
+
 class SmartProcessManager:
     def __init__(self):
         self.running = False
@@ -22,6 +28,7 @@ class SmartProcessManager:
             self.ntdll = ctypes.WinDLL('ntdll.dll')
             self.kernel32 = ctypes.WinDLL('kernel32.dll')
             self.ProcessIoPriority = 33
+            self.ProcessMemoryPriority = 0  # PROCESS_INFORMATION_CLASS (SetProcessInformation)
             self.api_available = True
         except:
             self.api_available = False
@@ -41,54 +48,76 @@ class SmartProcessManager:
             'onedrive.exe', 'dropbox.exe', 'googledrivesync.exe',
             'SearchIndexer.exe', 'CompatTelRunner.exe'
         }
+        self._low_priority_lower = {name.lower() for name in self.low_priority_apps}
         
+        # Chaves (pid, create_time) já ajustadas - seguro contra reuso de PID
         self.adjusted_pids = set()
+        self.table = process_table.get_table()
+        
+        # Rebaixados temporariamente (pressão de VRAM): chave -> (entry, nice, io originais)
+        self.demoted = {}
         
     def start(self):
         """Inicia monitoramento inteligente"""
         if self.running: return
         self.running = True
-        self.thread = threading.Thread(target=self._monitoring_loop, daemon=True)
-        self.thread.start()
+        # Reage só a processos novos/encerrados (tabela compartilhada)
+        self._scan_and_prioritize()
+        self.table.subscribe(self._on_process_delta)
         print("[INFO] SmartProcessManager V2.0 iniciado (CPU + I/O Priority)")
     
     def stop(self):
         self.running = False
-        if self.thread: self.thread.join(timeout=5)
+        self.table.unsubscribe(self._on_process_delta)
+        self.restore_demoted()
     
-    def _monitoring_loop(self):
-        while self.running:
-            try:
-                self._scan_and_prioritize()
-                time.sleep(10)
-            except Exception as e:
-                print(f"[ERROR] Erro no monitoramento: {e}")
-                time.sleep(30)
+    def _on_process_delta(self, delta):
+        """Chamado pela ProcessTable a cada mudança"""
+        if not self.running: return
+        try:
+            for entry in delta.spawned:
+                self._prioritize_entry(entry)
+            if delta.exited:
+                self._cleanup_dead_pids(delta.exited)
+        except Exception as e:
+            print(f"[ERROR] Erro no monitoramento: {e}")
     
     def _scan_and_prioritize(self):
+        """Passada inicial sobre os processos já existentes"""
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'username', 'nice']):
-                try:
-                    if proc.pid in self.adjusted_pids: continue
-                    if proc.info['name'] in self.system_processes: continue
-                    if not proc.info['username']: continue
-                    
-                    is_user_process = 'SYSTEM' not in proc.info['username'].upper()
-                    
-                    if is_user_process:
-                        if proc.info['name'].lower() in self.low_priority_apps:
-                            self._set_low_priority(proc)
-                        else:
-                            self._set_high_priority(proc)
-                        self.adjusted_pids.add(proc.pid)
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            self._cleanup_dead_pids()
+            for entry in self.table.entries():
+                self._prioritize_entry(entry)
         except Exception as e:
             print(f"[ERROR] Erro scan: {e}")
     
+    def _prioritize_entry(self, entry):
+        try:
+            if entry.key in self.adjusted_pids: return
+            if entry.name in self.system_processes: return
+            username = entry.username  # Token lookup só uma vez por processo
+            if not username: return
+            
+            is_user_process = 'SYSTEM' not in username.upper()
+            
+            if is_user_process:
+                if self.is_low_priority(entry):
+                    self._set_low_priority(entry)
+                else:
+                    self._set_high_priority(entry)
+                self.adjusted_pids.add(entry.key)
+                
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    
+    def is_low_priority(self, entry):
+        """App de segundo plano (navegadores, Discord, sync) pelo nome"""
+        return entry.name.lower() in self._low_priority_lower
+    
+    def low_priority_entries(self):
+        """Processos do usuário já classificados como prioridade BAIXA"""
+        return [entry for entry in self.table.entries()
+                if entry.key in self.adjusted_pids and self.is_low_priority(entry)]
+    
     def _set_io_priority(self, pid, priority):
         """Define prioridade de I/O via native API"""
         if not self.api_available: return False
@@ -106,39 +135,118 @@ class SmartProcessManager:
         except:
             return False
 
-    def _set_high_priority(self, proc):
+    def _get_io_priority(self, pid):
+        """Lê prioridade de I/O atual (Normal se não der para ler)"""
+        if not self.api_available: return IO_PRIORITY.Normal
+        try:
+            PROCESS_QUERY_INFORMATION = 0x0400
+            handle = self.kernel32.OpenProcess(PROCESS_QUERY_INFORMATION, False, pid)
+            if not handle: return IO_PRIORITY.Normal
+            
+            prio = ctypes.c_int(IO_PRIORITY.Normal)
+            status = self.ntdll.NtQueryInformationProcess(
+                handle, self.ProcessIoPriority, ctypes.byref(prio), ctypes.sizeof(prio), None
+            )
+            self.kernel32.CloseHandle(handle)
+            return prio.value if status == 0 else IO_PRIORITY.Normal
+        except:
+            return IO_PRIORITY.Normal
+    
+    def _set_memory_priority(self, pid, priority):
+        """Define prioridade de memória (SetProcessInformation / ProcessMemoryPriority)"""
+        if not self.api_available: return False
+        try:
+            PROCESS_SET_INFORMATION = 0x0200
+            handle = self.kernel32.OpenProcess(PROCESS_SET_INFORMATION, False, pid)
+            if not handle: return False
+            
+            info = wintypes.ULONG(priority)  # MEMORY_PRIORITY_INFORMATION
+            ok = self.kernel32.SetProcessInformation(
+                handle, self.ProcessMemoryPriority, ctypes.byref(info), ctypes.sizeof(info)
+            )
+            self.kernel32.CloseHandle(handle)
+            return bool(ok)
+        except:
+            return False
+    
+    def demote(self, entry, reason=''):
+        """
+        Rebaixa CPU (Idle), I/O (Very Low) e memória (Very Low) de um processo
+        em segundo plano; o estado original fica guardado para restore_demoted()
+        """
+        if entry.key in self.demoted or entry.name in self.system_processes:
+            return False
+        try:
+            nice_before = entry.proc.nice()
+            io_before = self._get_io_priority(entry.pid)
+            entry.proc.nice(psutil.IDLE_PRIORITY_CLASS)
+            self.table.note_priority(entry.pid, psutil.IDLE_PRIORITY_CLASS)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+        self._set_io_priority(entry.pid, IO_PRIORITY.VeryLow)
+        self._set_memory_priority(entry.pid, MEMORY_PRIORITY.VeryLow)
+        self.demoted[entry.key] = (entry, nice_before, io_before)
+        print(f"[PRIORITY] ⏬ REBAIXADO (CPU+I/O+Mem) → {entry.name}" + (f" ({reason})" if reason else ""))
+        return True
+    
+    def restore_demoted(self, keys=None):
+        """Devolve prioridades originais (todos os rebaixados, ou só `keys`)"""
+        restored = 0
+        for key in list(self.demoted if keys is None else keys):
+            item = self.demoted.pop(key, None)
+            if item is None:
+                continue
+            entry, nice_before, io_before = item
+            try:
+                entry.proc.nice(nice_before)
+                self.table.note_priority(entry.pid, nice_before)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            self._set_io_priority(entry.pid, io_before)
+            self._set_memory_priority(entry.pid, MEMORY_PRIORITY.Normal)
+            restored += 1
+        if restored:
+            print(f"[PRIORITY] ⏫ {restored} processo(s) restaurado(s)")
+        return restored
+    
+    def _set_high_priority(self, entry):
         try:
             # CPU: High
-            proc.nice(psutil.HIGH_PRIORITY_CLASS)
+            entry.proc.nice(psutil.HIGH_PRIORITY_CLASS)
+            self.table.note_priority(entry.pid, psutil.HIGH_PRIORITY_CLASS)
             # I/O: High (3)
-            io_ok = self._set_io_priority(proc.pid, IO_PRIORITY.High)
+            io_ok = self._set_io_priority(entry.pid, IO_PRIORITY.High)
             
-            msg = f"[PRIORITY] ⭐ ALTA (CPU+I/O) → {proc.info['name']}"
+            msg = f"[PRIORITY] ⭐ ALTA (CPU+I/O) → {entry.name}"
             if io_ok: msg += " [IO: High]"
             print(msg)
         except: pass
     
-    def _set_low_priority(self, proc):
+    def _set_low_priority(self, entry):
         try:
             # CPU: Below Normal
-            proc.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+            entry.proc.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+            self.table.note_priority(entry.pid, psutil.BELOW_NORMAL_PRIORITY_CLASS)
             # I/O: Very Low (0) - Background mode!
-            io_ok = self._set_io_priority(proc.pid, IO_PRIORITY.VeryLow)
+            io_ok = self._set_io_priority(entry.pid, IO_PRIORITY.VeryLow)
             
-            msg = f"[PRIORITY] 🔽 BAIXA (CPU+I/O) → {proc.info['name']}"
+            msg = f"[PRIORITY] 🔽 BAIXA (CPU+I/O) → {entry.name}"
             if io_ok: msg += " [IO: Background]"
             print(msg)
         except: pass
     
-    def _cleanup_dead_pids(self):
+    def _cleanup_dead_pids(self, exited):
+        """Remove processos encerrados (eventos 'exited' da tabela)"""
         try:
-            alive = {p.pid for p in psutil.process_iter()}
-            self.adjusted_pids = self.adjusted_pids.intersection(alive)
+            self.adjusted_pids.difference_update(e.key for e in exited)
+            for e in exited:
+                self.demoted.pop(e.key, None)
         except: pass
 
-
 if __name__ == "__main__":
     # Teste
+    table = process_table.get_table()
+    table.start()
     manager = SmartProcessManager()
     manager.start()
     
@@ -151,4 +259,5 @@ if __name__ == "__main__":
             time.sleep(1)
     except KeyboardInterrupt:
         manager.stop()
+        table.stop()
         print("\n[INFO] Finalizado")
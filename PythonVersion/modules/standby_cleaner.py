@@ -1,32 +1,77 @@
 """
 Módulo de limpeza de memória Standby usando ctypes
 Similar ao ISLC
+Listas de páginas lidas direto do kernel (SystemMemoryListInformation):
+decisão e bytes liberados vêm das contagens reais, não de estimativas
 """
-import ctypes
-from ctypes import wintypes
 import time
-import threading
 import psutil
 from datetime import datetime
+from modules import telemetry
+from modules import scheduler
+from modules import memory_lists
+from modules import purge_policy
 
-# Constantes da API do Windows
-SystemMemoryListInformation = 80
-MemoryPurgeStandbyList = 4
-MemoryEmptyWorkingSets = 2
-
-# Carregar ntdll.dll
-ntdll = ctypes.WinDLL('ntdll')
-kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+MB = 1024 * 1024
 
 class StandbyMemoryCleaner:
-    def __init__(self, threshold_mb=1024, check_interval=5):
-        self.threshold_mb = threshold_mb
-        self.check_interval = check_interval
+    JOB_NAME = 'standby_cleaner'
+    
+    def __init__(self, threshold_mb=1024, check_interval=5, backend=None, policy=None,
+                 history=None, tiered=True, tuner=None, cache_limiter=None, mode='purge'):
+        # Quando limpar (threshold / aggressive / predictive); limite efetivo vive na política
+        self.policy = policy or purge_policy.ThresholdPolicy(threshold_mb)
+        self.tuner = tuner            # RefaultTracker: mede o custo dos purges e ajusta limites
+        # 'purge': política decide limpezas | 'cache_limit': teto contínuo do cache (FileCacheLimiter)
+        self.cache_limiter = cache_limiter
+        self.mode = mode if cache_limiter is not None else 'purge'
+        self._base_threshold_mb = threshold_mb
+        self._base_min_standby_mb = self.policy.min_standby_mb
+        self._apply_tuning()
+        self.history = history        # HistoryLogger (decisões e purges por tier)
+        self.tiered = tiered          # Baixa prioridade primeiro, completa só se ainda faltar memória
+        self.last_decision = None     # purge_policy.PurgeDecision
+        self._check_interval = check_interval
         self.running = False
-        self.thread = None
         self.last_cleaned_mb = 0
         self.clean_count = 0
-        self.total_cleaned_mb = 0  # Total acumulado na sessão
+        self.total_cleaned_mb = 0  # Total acumulado na sessão (bytes exatos / MB)
+        self.last_purge = None     # memory_lists.PurgeResult (último tier executado)
+        self.last_tiers = ()       # Tiers da última limpeza, em ordem
+        self.freed_by_tier = {}    # tier -> MB liberados na sessão
+        
+        # Listas de páginas do kernel (None fora do Windows -> estimativa pelo snapshot)
+        self.memory = backend if backend is not None else memory_lists.get_backend()
+    
+    @property
+    def threshold_mb(self):
+        """Limite base (config/perfil); o efetivo é policy.threshold_mb"""
+        return self._base_threshold_mb
+    
+    @threshold_mb.setter
+    def threshold_mb(self, value):
+        """Perfis alteram o limite em tempo real"""
+        self._base_threshold_mb = value
+        self._apply_tuning()
+    
+    def _apply_tuning(self):
+        """Limite e standby mínima ajustados pelo custo medido de refault"""
+        if self.tuner is None:
+            self.policy.threshold_mb = self._base_threshold_mb
+            return
+        self.policy.threshold_mb = self.tuner.threshold_for(self._base_threshold_mb)
+        self.policy.min_standby_mb = max(self._base_min_standby_mb, self.tuner.min_standby_mb)
+    
+    @property
+    def check_interval(self):
+        return self._check_interval
+    
+    @check_interval.setter
+    def check_interval(self, value):
+        """Perfis alteram o intervalo em tempo real -> reagenda o job"""
+        self._check_interval = value
+        if self.running:
+            scheduler.get_scheduler().set_interval(self.JOB_NAME, value)
         
     def start(self):
         """Inicia monitoramento automático"""
@@ -34,143 +79,146 @@ class StandbyMemoryCleaner:
             return
             
         self.running = True
-        self.thread = threading.Thread(target=self._monitoring_loop, daemon=True)
-        self.thread.start()
-        print(f"[INFO] StandbyMemoryCleaner iniciado (threshold: {self.threshold_mb}MB)")
+        scheduler.get_scheduler().add_job(self.JOB_NAME, self._check_memory, self.check_interval)
+        if self.tuner and self.mode == 'purge':
+            self.tuner.start()
+        if self.mode == 'cache_limit':
+            print(f"[INFO] StandbyMemoryCleaner iniciado (teto do cache: {self.cache_limiter.percent}% da RAM com jogo)")
+        else:
+            print(f"[INFO] StandbyMemoryCleaner iniciado (threshold: {self.policy.threshold_mb}MB, política: {self.policy.name})")
         
     def stop(self):
         """Para o monitoramento"""
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=5)
+        scheduler.get_scheduler().cancel(self.JOB_NAME)
+        if self.tuner:
+            self.tuner.stop()
+        if self.cache_limiter:
+            self.cache_limiter.lift()
         print("[INFO] StandbyMemoryCleaner parado")
+    
+    def query_lists(self):
+        """Listas de páginas atuais (None se a consulta não estiver disponível)"""
+        if self.memory is None:
+            return None
+        try:
+            return self.memory.query()
+        except OSError:
+            return None
+    
+    def _memory_state(self):
+        """Estado atual para a política: listas do kernel, ou snapshot como fallback"""
+        info = self.query_lists()
+        if info is not None:
+            return purge_policy.MemoryState(info.timestamp, info.available_bytes // MB,
+                                            info.free_bytes // MB, info.standby_bytes // MB)
+        
+        snap = telemetry.get_sampler().get_snapshot(max_age=self.check_interval)
+        # Sem as listas: contadores PDH no snapshot, ou Available - Free
+        # ('available' inclui standby, 'free' = páginas zeradas)
+        standby_bytes = snap.standby_bytes or (snap.ram_available - snap.ram_free)
+        return purge_policy.MemoryState(snap.timestamp, snap.ram_available // MB,
+                                        snap.ram_free // MB, standby_bytes // MB)
+        
+    def _check_memory(self):
+        """Verificação periódica (job do scheduler): a política decide se limpa"""
+        if self.mode == 'cache_limit':
+            # Crescimento do cache limitado continuamente: sem purges periódicas
+            self.cache_limiter.update()
+            return
+        
+        self._apply_tuning()
+        state = self._memory_state()
+        decision = self.policy.decide(state)
+        self.last_decision = decision
+        if not decision.purge:
+            return
         
-    def _monitoring_loop(self):
-        """Loop de monitoramento contínuo"""
-        while self.running:
-            try:
-                mem = psutil.virtual_memory()
-                available_mb = mem.available // (1024 * 1024)
-                
-                if available_mb < self.threshold_mb:
-                    # [V2.0] Surgical Check: Just checking free RAM is not enough.
-                    # We must check if there is actually Cached/Standby memory to clean.
-                    # IF (Free < Limit) AND (Standby > 1GB) -> CLEAN
-                    # IF (Free < Limit) AND (Standby < 1GB) -> DO NOTHING (Cleaning empty cache = Stutter)
-                    
-                    # Estimate Standby (Available - Free)
-                    # Note: psutil 'available' includes standby. 'free' is zero-filled pages.
-                    # This is rough estimation but efficient.
-                    standby_estimated = mem.available - mem.free
-                    standby_mb = standby_estimated // (1024 * 1024)
-                    
-                    if standby_mb > 1024:
-                        print(f"[CLEANER] Low Memory ({available_mb}MB) & High Cache ({standby_mb}MB) -> PURGING...")
-                        freed_mb = self.clean_standby_memory()
-                        
-                        if freed_mb > 100:
-                            self.last_cleaned_mb = freed_mb
-                            self.clean_count += 1
-                            self.total_cleaned_mb += freed_mb
-                            print(f"[CLEAN] Released: {freed_mb}MB | New Available: {available_mb + freed_mb}MB")
-                    else:
-                        # Low memory but also low cache -> System is genuinely full. Cleaning won't help.
-                        # Do nothing to avoid I/O thrashing.
-                        pass
-                
-                time.sleep(self.check_interval)
-            except Exception as e:
-                print(f"[ERROR] Erro no monitoramento: {e}")
-                time.sleep(10)
+        print(f"[CLEANER] {decision.reason} -> PURGING (~{decision.predicted_benefit_mb}MB de cache)...")
+        if self.history:
+            self.history.log_event("purge_decision", f"{self.policy.name}: {decision.reason} | "
+                                                     f"benefício previsto {decision.predicted_benefit_mb}MB")
+        freed_mb = self.clean_standby_memory(trigger=self.policy.name,
+                                             target_free_mb=decision.target_free_mb)
+        self.policy.note_purge(state, freed_mb)
+        if freed_mb > 0:
+            tiers = ' + '.join(f"{r.tier} {r.freed_bytes // MB}MB" for r in self.last_tiers)
+            print(f"[CLEAN] Released: {freed_mb}MB ({tiers}) | New Free: {self.last_purge.after.free_bytes // MB}MB")
     
-    def clean_standby_memory(self):
-        """Limpa a lista de memória Standby"""
+    def _run_tier(self, command, trigger):
+        result = memory_lists.purge(self.memory, command)
+        self.last_purge = result
+        if result.ok:
+            freed_mb = result.freed_bytes / MB
+            self.freed_by_tier[result.tier] = self.freed_by_tier.get(result.tier, 0) + freed_mb
+            if self.history:
+                self.history.log_purge(trigger, result.tier, freed_mb, result.before.free_bytes / MB,
+                                       result.after.free_bytes / MB, result.duration_ms)
+        return result
+    
+    def clean_standby_memory(self, trigger='manual', full=False, target_free_mb=None):
+        """
+        Limpa a lista de memória Standby; retorna MB liberados (exatos)
+        Em camadas: primeiro só a standby de prioridade 0 (cache frio); a purge
+        completa, que descarta também o cache quente do jogo, só roda se a
+        memória livre continuar abaixo de target_free_mb (a falta pedida pela
+        política) ou com full=True. Sem alvo, só a baixa prioridade.
+        """
+        if self.memory is None:
+            print("[ERROR] Listas de memória indisponíveis (requer Windows)")
+            return 0
         try:
-            # Eleva privilégios
-            self._enable_privilege()
-            
-            # Obtém memória antes
-            mem_before = psutil.virtual_memory().available // (1024 * 1024)
-            
             # [V2.0] Purge Standby List ONLY.
             # Avoid 'EmptyWorkingSets' as it forces active apps to swap to disk (Causes Stutter!)
-            command = ctypes.c_int(MemoryPurgeStandbyList)
-            ntdll.NtSetSystemInformation(
-                SystemMemoryListInformation,
-                ctypes.byref(command),
-                ctypes.sizeof(command)
-            )
+            # Privilégio habilitado uma vez pelo backend (token em cache)
+            results = []
+            if self.tiered and not full:
+                results.append(self._run_tier(memory_lists.MemoryPurgeLowPriorityStandbyList, trigger))
+            if not results or (results[-1].ok and target_free_mb is not None
+                               and results[-1].after.free_bytes // MB < target_free_mb):
+                results.append(self._run_tier(memory_lists.MemoryPurgeStandbyList, trigger))
             
             # Note: We DISABLED MemoryEmptyWorkingSets consciously.
             # While it frees more "Ram", it degrades performance heavily for 1-2 seconds.
-            
-            time.sleep(0.1)  # Aguarda processamento
-            
-            # Obtém memória depois
-            mem_after = psutil.virtual_memory().available // (1024 * 1024)
-            
-            return max(0, mem_after - mem_before)
         except Exception as e:
             print(f"[ERROR] Erro ao limpar memória: {e}")
             return 0
-    
-    def _enable_privilege(self):
-        """Habilita privilégio SE_PROF_SINGLE_PROCESS_NAME"""
-        try:
-            SE_PRIVILEGE_ENABLED = 0x00000002
-            TOKEN_ADJUST_PRIVILEGES = 0x0020
-            TOKEN_QUERY = 0x0008
-            
-            # Abre token do processo
-            token = wintypes.HANDLE()
-            kernel32.OpenProcessToken(
-                kernel32.GetCurrentProcess(),
-                TOKEN_ADJUST_PRIVILEGES | TOKEN_QUERY,
-                ctypes.byref(token)
-            )
-            
-            # Lookup privilege value
-            luid = wintypes.LUID()
-            ctypes.windll.advapi32.LookupPrivilegeValueW(
-                None,
-                "SeProfileSingleProcessPrivilege",
-                ctypes.byref(luid)
-            )
-            
-            # Adjust privileges
-            class TOKEN_PRIVILEGES(ctypes.Structure):
-                _fields_ = [
-                    ("PrivilegeCount", wintypes.DWORD),
-                    ("Luid", wintypes.LUID),
-                    ("Attributes", wintypes.DWORD),
-                ]
-            
-            tp = TOKEN_PRIVILEGES()
-            tp.PrivilegeCount = 1
-            tp.Luid = luid
-            tp.Attributes = SE_PRIVILEGE_ENABLED
-            
-            ctypes.windll.advapi32.AdjustTokenPrivileges(
-                token,
-                False,
-                ctypes.byref(tp),
-                ctypes.sizeof(tp),
-                None,
-                None
-            )
-            
-            kernel32.CloseHandle(token)
-        except:
-            pass  # Privilégio pode já estar habilitado
+        
+        self.last_tiers = tuple(results)
+        if not results[-1].ok:
+            print("[ERROR] Purge recusado pelo kernel (executar como administrador)")
+        
+        freed_bytes = sum(r.freed_bytes for r in results if r.ok)
+        freed_mb = freed_bytes // MB
+        if freed_mb > 0:
+            self.last_cleaned_mb = freed_mb
+            self.clean_count += 1
+            self.total_cleaned_mb += freed_bytes / MB
+            if self.tuner:
+                self.tuner.note_purge(freed_bytes / MB, trigger)
+            if self.history:
+                self.history.log_cleanup(freed_mb, f"{trigger}:{'+'.join(r.tier for r in results)}",
+                                         results[0].before.free_bytes // MB,
+                                         results[-1].after.free_bytes // MB)
+        return freed_mb
     
     def get_memory_info(self):
         """Retorna informações da memória"""
         mem = psutil.virtual_memory()
-        return {
-            'total_mb': mem.total // (1024 * 1024),
-            'available_mb': mem.available // (1024 * 1024),
+        result = {
+            'total_mb': mem.total // MB,
+            'available_mb': mem.available // MB,
             'used_percent': mem.percent
         }
+        info = self.query_lists()
+        if info is not None:
+            result.update({
+                'free_mb': info.free_bytes // MB,
+                'modified_mb': info.modified_bytes // MB,
+                'standby_mb': info.standby_bytes // MB,
+                'standby_by_priority_mb': [b // MB for b in info.standby_bytes_by_priority()],
+            })
+        return result
 
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ import time
 import math
 import multiprocessing
 import psutil
+from modules import temperature_service
 
 class CPUStressTest:
     def __init__(self):
@@ -13,8 +14,11 @@ class CPUStressTest:
         self.target_load = 0
         self.threads = []
         self.thread_count = 0
+        self.requested_load = 0
+        self.thermal_limit = 90
+        self._temp_service = temperature_service.get_service()
         
-    def start(self, target_load_percent=70, thread_count=0):
+    def start(self, target_load_percent=70, thread_count=0, thermal_limit=90):
         """Inicia stress test com carga específica"""
         if self.running:
             print("[WARN] Stress test já está rodando")
@@ -25,6 +29,8 @@ class CPUStressTest:
             return
         
         self.target_load = target_load_percent
+        self.requested_load = target_load_percent
+        self.thermal_limit = thermal_limit
         self.thread_count = thread_count if thread_count > 0 else multiprocessing.cpu_count()
         self.running = True
         
@@ -64,6 +70,7 @@ class CPUStressTest:
             return
         
         self.target_load = new_percent
+        self.requested_load = new_percent
         print(f"[INFO] Carga ajustada para {self.target_load}%")
     
     def _worker_thread(self, thread_id):
@@ -91,15 +98,25 @@ class CPUStressTest:
                 time.sleep(sleep_time_ms / 1000)
     
     def _monitor_thread(self):
-        """Monitora uso real de CPU"""
+        """Monitora uso real de CPU e recua antes de atingir o limite térmico"""
         while self.running:
             try:
                 cpu_percent = psutil.cpu_percent(interval=1)
+                predicted = self._temp_service.forecast_cpu_temp(30, load=self.target_load)
+                self._thermal_backoff(predicted)
                 print(f"[STRESS] Alvo: {self.target_load}% | Atual: {cpu_percent:.1f}% | "
-                      f"Threads: {self.thread_count}", end='\r')
+                      f"Temp 30s: {predicted:.0f}°C | Threads: {self.thread_count}", end='\r')
             except:
                 pass
             time.sleep(2)
+    
+    def _thermal_backoff(self, predicted):
+        """Reduz a carga se a previsão passar do limite; devolve quando houver folga"""
+        if predicted >= self.thermal_limit and self.target_load > 10:
+            self.target_load = max(10, self.target_load - 10)
+            print(f"\n[STRESS] Previsão {predicted:.0f}°C >= {self.thermal_limit}°C: carga reduzida para {self.target_load}%")
+        elif 0 < predicted < self.thermal_limit - 10 and self.target_load < self.requested_load:
+            self.target_load = min(self.requested_load, self.target_load + 10)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+"""
+Telemetry Sampler
+Coleta UM snapshot imutável por tick e publica para todos os consumidores
+(Dashboard, Widget, StandbyMemoryCleaner, Thermal Governor)
+Fontes: psutil, sessão NVML e engine PDH (uma coleta de cada por tick)
+"""
+import time
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+import psutil
+
+from modules import temperature_service
+from modules import scheduler
+from modules import nvml_session
+from modules import pdh_counters
+
+
+class TelemetrySnapshot(NamedTuple):
+    """Snapshot imutável do sistema em um instante"""
+    timestamp: float
+    cpu_percent: float
+    cpu_per_core: Tuple[float, ...]
+    cpu_freq_mhz: float
+    cpu_temp: float
+    ram_total: int        # bytes
+    ram_available: int    # bytes
+    ram_free: int         # bytes (zero/free pages)
+    ram_used: int         # bytes
+    ram_percent: float
+    gpu_name: str         # GPU primária (índice 0); todas em `gpus`
+    gpu_percent: float
+    gpu_temp: float
+    gpu_mem_used: int     # bytes
+    gpu_mem_total: int    # bytes
+    gpu_power_w: float
+    cpu_core_temps: Tuple[float, ...] = ()   # Por núcleo (LHM/OHM), vazio se indisponível
+    gpus: Tuple[nvml_session.GpuStats, ...] = ()   # Todas as GPUs NVIDIA (passada NVML em lote)
+    # Contadores PDH (uma PdhCollectQueryData por tick; 0 se indisponível)
+    standby_bytes: int = 0        # Lista standby (core + normal + reserve)
+    cache_bytes: int = 0          # Working set do cache do sistema
+    disk_queue: float = 0.0       # Fila atual do disco (_Total)
+    disk_latency_ms: float = 0.0  # Latência média por transferência
+    cpu_performance: float = 0.0  # % Processor Performance (>100 = turbo)
+    igpu_percent: Optional[float] = None  # Engine mais ocupada da GPU integrada (None = sem dado)
+
+
+class TelemetrySampler:
+    """Job único (scheduler) que amostra CPU/RAM/GPU e distribui o snapshot"""
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.running = False
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._subscribers = []
+        self._temp_service = temperature_service.get_service()
+        self.subscribe(self._temp_service.observe_snapshot)  # Alimenta o modelo térmico
+
+        # NVIDIA: sessão compartilhada (nvmlInit e enumeração uma vez só)
+        self._nvml = nvml_session.get_session()
+        self._pdh = pdh_counters.get_engine()
+
+        # Primeira chamada do cpu_percent(interval=None) sempre retorna 0.0
+        psutil.cpu_percent(percpu=True)
+
+    def start(self):
+        """Inicia amostragem periódica"""
+        if self.running:
+            return
+
+        self.running = True
+        self._temp_service.wait_ready(timeout=2.0)  # Primeira leitura dos sensores
+        self.sample()
+        scheduler.get_scheduler().add_job('telemetry', self.sample, self.interval)
+        print(f"[TELEMETRY] Sampler iniciado (intervalo: {self.interval}s)")
+
+    def stop(self):
+        """Para a amostragem"""
+        self.running = False
+        scheduler.get_scheduler().cancel('telemetry')
+
+    def subscribe(self, callback):
+        """Registra callback(snapshot) chamado a cada tick"""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Remove callback registrado"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def get_snapshot(self, max_age=None) -> TelemetrySnapshot:
+        """
+        Retorna o último snapshot.
+        Se não houver snapshot (sampler parado) ou ele for mais velho que
+        max_age segundos, amostra na hora.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.sample()
+        if max_age is not None and time.time() - snapshot.timestamp > max_age:
+            return self.sample()
+        return snapshot
+
+    def sample(self) -> TelemetrySnapshot:
+        """Coleta um snapshot novo e publica para os assinantes"""
+        # Uma única leitura por núcleo; o total é a média (evita segunda syscall)
+        per_core = tuple(psutil.cpu_percent(percpu=True))
+        cpu_percent = sum(per_core) / len(per_core) if per_core else 0.0
+
+        try:
+            freq = psutil.cpu_freq()
+            freq_mhz = freq.current if freq else 0.0
+        except:
+            freq_mhz = 0.0
+
+        mem = psutil.virtual_memory()
+
+        # Uma passada NVML para todas as GPUs (forçada: este é o tick de referência)
+        gpus = self._nvml.sample(max_age=0)
+        primary = gpus[0] if gpus else None
+
+        # Todos os contadores PDH numa coleta só
+        counters = self._pdh.collect() if self._pdh.available else pdh_counters.PdhSample(0.0, {})
+        igpu_percent = counters.integrated_gpu_percent()
+
+        snapshot = TelemetrySnapshot(
+            timestamp=time.time(),
+            cpu_percent=cpu_percent,
+            cpu_per_core=per_core,
+            cpu_freq_mhz=freq_mhz,
+            cpu_temp=self._temp_service.get_cpu_temp(),
+            ram_total=mem.total,
+            ram_available=mem.available,
+            ram_free=mem.free,
+            ram_used=mem.used,
+            ram_percent=mem.percent,
+            gpu_name=primary.name if primary else '',
+            gpu_percent=primary.gpu_util if primary else 0.0,
+            gpu_temp=primary.temperature if primary else 0.0,
+            gpu_mem_used=primary.mem_used if primary else 0,
+            gpu_mem_total=primary.mem_total if primary else 0,
+            gpu_power_w=primary.power_w if primary else 0.0,
+            cpu_core_temps=self._temp_service.get_core_temps(),
+            gpus=gpus,
+            standby_bytes=counters.standby_bytes,
+            cache_bytes=int(counters.get('cache_bytes')),
+            disk_queue=counters.get('disk_queue'),
+            disk_latency_ms=counters.get('disk_latency_ms'),
+            cpu_performance=counters.get('cpu_performance'),
+            igpu_percent=igpu_percent,
+        )
+        self._snapshot = snapshot
+        self._publish(snapshot)
+        return snapshot
+
+    def _publish(self, snapshot):
+        """Entrega o snapshot para todos os assinantes"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[TELEMETRY] Erro no assinante {getattr(callback, '__name__', callback)}: {e}")
+
+
+# Global singleton instance
+_instance = None
+
+def get_sampler() -> TelemetrySampler:
+    """Get singleton instance of TelemetrySampler"""
+    global _instance
+    if _instance is None:
+        _instance = TelemetrySampler(interval=1.0)
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste
+    sampler = get_sampler()
+    sampler.subscribe(lambda s: print(
+        f"\rCPU: {s.cpu_percent:5.1f}% | RAM: {s.ram_percent:.1f}% | "
+        f"Temp: {s.cpu_temp:.0f}°C | GPU: {s.gpu_percent:.0f}%", end=''))
+    sampler.start()
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sampler.stop()
+        print("\n[INFO] Finalizado")
@@ -1,119 +1,337 @@
 """
 Centralized Temperature Service
 Single source of truth for CPU/GPU temperature readings with caching
++ online thermal model (first-order RC) for short-term forecasts
 """
+import math
 import time
 import threading
+from typing import NamedTuple
+
+from modules import sensor_registry
+from modules import wmi_broker
+from modules import nvml_session
+
+
+class ThermalModel:
+    """
+    First-order RC model fitted online with recursive least squares:
+        dT/dt = p0 + p1*load + p2*gpu_power - p3*T
+    i.e. T heads to T_ss = (p0 + p1*load + p2*gpu_power) / p3 with tau = 1/p3.
+    """
+    
+    MIN_SAMPLES = 30        # Fit is ignored until then
+    MAX_HORIZON = 600       # Seconds
+    
+    def __init__(self, forgetting=0.995):
+        self.forgetting = forgetting    # < 1: old samples fade (fan curve, ambient change)
+        self.theta = [0.0, 0.0, 0.0, 0.0]
+        self._P = [[1000.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+        self._last = None               # (timestamp, temp, load, gpu_power)
+        self.samples = 0
+        self._lock = threading.Lock()
+    
+    def update(self, timestamp, temp, load, gpu_power_w=0.0):
+        """Feed one observation (temperature °C, CPU load %, GPU power W)"""
+        if not temp or temp <= 0:
+            return
+        with self._lock:
+            last = self._last
+            self._last = (timestamp, temp, load, gpu_power_w)
+            if last is None:
+                return
+            dt = timestamp - last[0]
+            if dt <= 0 or dt > 30:
+                return  # Gap (sleep/hibernate): start over from this sample
+            
+            phi = [1.0, last[2], last[3], -last[1]]
+            y = (temp - last[1]) / dt
+            self._rls_update(phi, y)
+            self.samples += 1
+    
+    def _rls_update(self, phi, y):
+        lam = self.forgetting
+        P = self._P
+        Pphi = [sum(P[i][j] * phi[j] for j in range(4)) for i in range(4)]
+        denom = lam + sum(phi[i] * Pphi[i] for i in range(4))
+        gain = [v / denom for v in Pphi]
+        error = y - sum(self.theta[i] * phi[i] for i in range(4))
+        self.theta = [self.theta[i] + gain[i] * error for i in range(4)]
+        self._P = [[(P[i][j] - gain[i] * Pphi[j]) / lam for j in range(4)] for i in range(4)]
+    
+    @property
+    def ready(self):
+        """Enough samples and a physically plausible fit (decaying, tau 1s..30min)"""
+        p3 = self.theta[3]
+        return self.samples >= self.MIN_SAMPLES and 1 / 1800 < p3 < 1.0
+    
+    @property
+    def tau(self):
+        return 1.0 / self.theta[3] if self.ready else None
+    
+    def steady_state(self, load, gpu_power_w=0.0):
+        """Temperature the CPU settles at if load/GPU power stay constant"""
+        p0, p1, p2, p3 = self.theta
+        return (p0 + p1 * load + p2 * gpu_power_w) / p3
+    
+    def forecast(self, horizon_s, load=None, gpu_power_w=None):
+        """
+        Temperature in horizon_s seconds (holding load/GPU power, or the given ones).
+        Returns the last temperature while the model isn't ready.
+        """
+        with self._lock:
+            if self._last is None:
+                return 0.0
+            _, temp, last_load, last_gpu = self._last
+            if not self.ready:
+                return temp
+            load = last_load if load is None else load
+            gpu_power_w = last_gpu if gpu_power_w is None else gpu_power_w
+            horizon_s = max(0.0, min(self.MAX_HORIZON, horizon_s))
+            
+            target = self.steady_state(load, gpu_power_w)
+            predicted = target + (temp - target) * math.exp(-horizon_s * self.theta[3])
+            return max(0.0, min(130.0, predicted))
+    
+    def seconds_until(self, limit, load=None, gpu_power_w=None):
+        """Seconds until the temperature reaches `limit` (None = never / unknown)"""
+        with self._lock:
+            if self._last is None or not self.ready:
+                return None
+            _, temp, last_load, last_gpu = self._last
+            if temp >= limit:
+                return 0.0
+            load = last_load if load is None else load
+            gpu_power_w = last_gpu if gpu_power_w is None else gpu_power_w
+            target = self.steady_state(load, gpu_power_w)
+            if target <= limit:
+                return None
+            return math.log((target - temp) / (target - limit)) / self.theta[3]
+
+
+class SensorReading(NamedTuple):
+    """One cached sensor value"""
+    value: float
+    timestamp: float    # When it was read (0 = never)
+    source: str         # 'lhm', 'ohm', 'acpi', 'gpu_offset', 'nvml', 'none'
+    confidence: str = sensor_registry.LOW
+    
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp if self.timestamp else float('inf')
+
+
+EMPTY_READING = SensorReading(0.0, 0.0, 'none')
+
 
 class TemperatureService:
-    """Thread-safe temperature service with caching"""
+    """
+    Refresh-ahead sensor cache: a background thread keeps every key warm
+    (per-key TTL); reads return the cached value immediately, stale or not
+    (stale-while-revalidate), and never touch WMI/NVML themselves. A value
+    older than MAX_STALE TTLs reads as EMPTY_READING (dead sensor).
+    """
+    
+    DEFAULT_TTLS = {'cpu_temp': 2.0, 'gpu_temp': 1.0, 'gpu_hotspot': 2.0, 'nvme_temp': 10.0}
+    MAX_BACKOFF = 32    # Failing sensor: ttl * 2^failures, capped at ttl * 32
+    MAX_STALE = 4       # Last good value is served for at most ttl * 4
     
-    def __init__(self, cache_ttl=2.0):
-        self.cache_ttl = cache_ttl  # Seconds
-        self._cache = {}
+    def __init__(self, cache_ttl=2.0, ttls=None):
+        self.cache_ttl = cache_ttl  # Seconds (CPU key)
+        self.ttls = dict(self.DEFAULT_TTLS, cpu_temp=cache_ttl)
+        self.ttls.update(ttls or {})
         self._lock = threading.Lock()
+        self._readings = {}         # key -> SensorReading
+        self._attempts = {}         # key/source -> (failures, last_attempt)
+        # GPU first: the CPU chain may fall back to the fresh GPU value
+        self._readers = {
+            'gpu_temp': self._read_gpu_temp,
+            'cpu_temp': self._read_cpu_temp,
+            'gpu_hotspot': lambda: self._read_kind(sensor_registry.GPU_HOTSPOT),
+            'nvme_temp': lambda: self._read_kind(sensor_registry.NVME_COMPOSITE),
+        }
+        self._core_temps = ()
         
-        # Try to initialize WMI connection once
-        self._wmi_thermal = None
-        self._wmi_ohw = None
-        self._init_wmi()
+        # Refresher thread (WMI goes through the broker's COM thread)
+        self.running = False
+        self._thread = None
+        self._wake = threading.Event()
+        self._first_pass = threading.Event()
+        self._broker = wmi_broker.get_broker()
+        self.registry = None
+        
+        # NVIDIA: shared NVML session (one init, one batched pass per tick)
+        self._nvml = nvml_session.get_session()
         
-        # NVIDIA handle
-        self._nvidia_handle = None
-        self._init_nvidia()
+        # Online thermal model (fed by the telemetry sampler)
+        self.model = ThermalModel()
     
     def _init_wmi(self):
-        """Initialize WMI connections (once)"""
+        """Sensor registry over the WMI broker (discovery cached on disk)"""
+        self.registry = sensor_registry.SensorRegistry(self._wmi_query)
         try:
-            import wmi
-            # Primary: ACPI Thermal Zone
-            self._wmi_thermal = wmi.WMI(namespace="root\\wmi")
-        except:
+            self.registry.discover()
+        except Exception:
             pass
+    
+    def _wmi_query(self, namespace, wql):
+        """WQL through the broker (pooled connection, always fresh for sensors)"""
+        return self._broker.query_sync(namespace, wql, ttl=0, timeout=5)
+    
+    # === Refresher ===
+    
+    def start(self):
+        """Start the background refresher (idempotent; reads start it too)"""
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+        self._thread = threading.Thread(target=self._refresh_loop, name="temperature-refresh", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+    
+    def wait_ready(self, timeout=2.0):
+        """Wait (once, at startup) for the first refresh pass"""
+        self.start()
+        return self._first_pass.wait(timeout)
+    
+    def _refresh_loop(self):
+        self._init_wmi()
+        
+        while self.running:
+            now = time.time()
+            next_due = now + max(self.ttls.values())
+            for key in self._readers:
+                due = self._due_at(key, self.ttls[key])
+                if due <= now:
+                    self._refresh(key)
+                    due = self._due_at(key, self.ttls[key])
+                next_due = min(next_due, due)
+            self._first_pass.set()
             
+            self._wake.wait(max(0.05, next_due - time.time()))
+            self._wake.clear()
+    
+    def _due_at(self, name, ttl):
+        """Next attempt time: ttl after the last one, backed off while failing"""
+        failures, last_attempt = self._attempts.get(name, (0, 0.0))
+        return last_attempt + ttl * min(2 ** failures, self.MAX_BACKOFF)
+    
+    def _record_attempt(self, name, ok):
+        failures, _ = self._attempts.get(name, (0, 0.0))
+        self._attempts[name] = (0 if ok else failures + 1, time.time())
+    
+    def _refresh(self, key):
         try:
-            import wmi
-            # Fallback: OpenHardwareMonitor/LibreHardwareMonitor
-            self._wmi_ohw = wmi.WMI(namespace="root\\OpenHardwareMonitor")
-        except:
-            pass
+            value, source, confidence = self._readers[key]()
+        except Exception:
+            value, source, confidence = 0.0, 'none', sensor_registry.LOW
+        ok = value > 0
+        self._record_attempt(key, ok)
+        if ok:
+            with self._lock:
+                self._readings[key] = SensorReading(value, time.time(), source, confidence)
     
-    def _init_nvidia(self):
-        """Initialize NVIDIA handle (once)"""
+    def _try_source(self, name, read):
+        """Run one source of a fallback chain, skipping it while in backoff"""
+        if time.time() < self._due_at(name, self.ttls['cpu_temp']):
+            return 0.0
         try:
-            import pynvml
-            pynvml.nvmlInit()
-            if pynvml.nvmlDeviceGetCount() > 0:
-                self._nvidia_handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-        except:
-            pass
+            value = read()
+        except Exception:
+            value = 0.0
+        self._record_attempt(name, value > 0)
+        return value
     
-    def _get_cached(self, key):
-        """Get cached value if still valid"""
-        with self._lock:
-            if key in self._cache:
-                value, timestamp = self._cache[key]
-                if time.time() - timestamp < self.cache_ttl:
-                    return value
-        return None
-    
-    def _set_cached(self, key, value):
-        """Set cached value"""
+    def _ensure_discovered(self):
+        """(Re)discover sensors if the index is empty - backed off while nothing is found"""
+        if self.registry is None:
+            return False
+        if not self.registry.sensors:
+            self._try_source('discovery', lambda: len(self.registry.discover(force=True)))
+        return bool(self.registry.sensors)
+    
+    def _read_cpu_temp(self):
+        # Package > hottest core > ACPI zone, package + cores in one targeted query
+        if self._ensure_discovered():
+            temp, source, confidence, cores = self.registry.cpu_reading()
+            if temp > 0:
+                self._core_temps = cores
+                return temp, source, confidence
+        
+        # Last resort: GPU temp as approximation
+        gpu = self._readings.get('gpu_temp', EMPTY_READING)
+        if gpu.value > 0 and gpu.age < self.ttls['gpu_temp'] * self.MAX_STALE:
+            return gpu.value + 7, 'gpu_offset', sensor_registry.LOW  # CPU usually ~7°C hotter
+        return 0.0, 'none', sensor_registry.LOW
+    
+    def _read_kind(self, kind):
+        """Hottest sensor of a kind (GPU hotspot, NVMe composite)"""
+        if not self._ensure_discovered() or not self.registry.by_kind(kind):
+            return 0.0, 'none', sensor_registry.LOW
+        values = self.registry.read_kind(kind)
+        if not values:
+            return 0.0, 'none', sensor_registry.LOW
+        hottest = max(values.values(), key=lambda v: v.value)
+        return hottest.value, hottest.source, hottest.confidence
+    
+    def _read_gpu_temp(self):
+        # Reuses the sampler's pass when fresh; hottest GPU on multi-GPU systems
+        gpus = self._nvml.sample(max_age=self.ttls['gpu_temp'])
+        temps = [g.temperature for g in gpus if g.temperature > 0]
+        if not temps:
+            return 0.0, 'none', sensor_registry.LOW
+        return max(temps), 'nvml', sensor_registry.HIGH
+    
+    # === Reads (never block) ===
+    
+    def get_reading(self, key) -> SensorReading:
+        """Cached reading with age/source; a stale one wakes the refresher"""
+        if not self.running:
+            self.start()
         with self._lock:
-            self._cache[key] = (value, time.time())
+            reading = self._readings.get(key, EMPTY_READING)
+        ttl = self.ttls.get(key, self.cache_ttl)
+        if reading.age > ttl:
+            self._wake.set()
+        if reading.age > ttl * self.MAX_STALE:
+            # Refreshes keep failing: no value beats a frozen one
+            return EMPTY_READING
+        return reading
     
     def get_cpu_temp(self) -> float:
-        """Get CPU temperature (cached)"""
-        cached = self._get_cached('cpu_temp')
-        if cached is not None:
-            return cached
-        
-        temp = 0.0
-        
-        # Method 1: WMI ACPI Thermal Zone
-        if self._wmi_thermal:
-            try:
-                t_info = self._wmi_thermal.MSAcpi_ThermalZoneTemperature()[0]
-                temp = (t_info.CurrentTemperature / 10.0) - 273.15
-            except:
-                pass
-        
-        # Method 2: OpenHardwareMonitor
-        if temp == 0 and self._wmi_ohw:
-            try:
-                for sensor in self._wmi_ohw.Sensor():
-                    if sensor.SensorType == 'Temperature' and 'CPU' in sensor.Name:
-                        temp = float(sensor.Value)
-                        break
-            except:
-                pass
-        
-        # Method 3: Use GPU Temp as approximation
-        if temp == 0:
-            gpu_temp = self.get_gpu_temp()
-            if gpu_temp > 0:
-                temp = gpu_temp + 7  # CPU usually ~7°C hotter
-        
-        self._set_cached('cpu_temp', temp)
-        return temp
+        """Get CPU temperature (cached, non-blocking)"""
+        return self.get_reading('cpu_temp').value
     
     def get_gpu_temp(self) -> float:
-        """Get NVIDIA GPU temperature (cached)"""
-        cached = self._get_cached('gpu_temp')
-        if cached is not None:
-            return cached
-        
-        temp = 0.0
-        
-        if self._nvidia_handle:
-            try:
-                import pynvml
-                temp = float(pynvml.nvmlDeviceGetTemperature(self._nvidia_handle, 0))
-            except:
-                pass
-        
-        self._set_cached('gpu_temp', temp)
-        return temp
+        """Get NVIDIA GPU temperature (cached, non-blocking)"""
+        return self.get_reading('gpu_temp').value
+    
+    def get_core_temps(self) -> tuple:
+        """Per-core CPU temperatures from the last refresh (empty if no LHM/OHM or stale)"""
+        if not self.get_reading('cpu_temp').value:
+            return ()
+        return self._core_temps
+    
+    def observe_snapshot(self, snapshot):
+        """Telemetry subscriber: feeds the thermal model"""
+        self.model.update(snapshot.timestamp, snapshot.cpu_temp,
+                          snapshot.cpu_percent, snapshot.gpu_power_w)
+    
+    def forecast_cpu_temp(self, horizon_s, load=None) -> float:
+        """
+        Predicted CPU temperature in horizon_s seconds (current load, or `load` %).
+        Falls back to the current reading until the model has converged.
+        """
+        current = self.get_cpu_temp()
+        if not self.model.ready or not current:
+            return current  # Dead sensor: no forecast from frozen data
+        return self.model.forecast(horizon_s, load=load)
 
 
 # Global singleton instance
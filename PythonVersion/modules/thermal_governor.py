@@ -0,0 +1,254 @@
+"""
+Thermal Governor - Controle em malha fechada do limite de frequência da CPU
+Controlador PI com:
+- Setpoint derivado do thermal_limit do perfil ativo
+- Banda de histerese (erro pequeno = segura o cap)
+- Tempo mínimo entre mudanças (dwell) e passo máximo por ajuste
+- Anti-windup (integral presa aos limites do cap)
+Inclui uma planta térmica simulada para testes offline
+"""
+import time
+
+from modules import scheduler
+
+
+class ThermalGovernor:
+    """Ajusta o cap (%) para manter a temperatura logo abaixo do thermal_limit"""
+
+    JOB_NAME = 'thermal_governor'
+
+    def __init__(self, apply_cap, read_temp, thermal_limit=80, max_cap=100, min_cap=50,
+                 margin=3.0, hysteresis=1.5, kp=2.0, ki=0.2, max_step=5, min_dwell=10.0,
+                 interval=2.0, forecast_temp=None, lookahead=10.0, guard_s=3.0):
+        self.apply_cap = apply_cap      # callback(cap_percent)
+        self.read_temp = read_temp      # callback() -> °C (0 = indisponível)
+        self.forecast_temp = forecast_temp  # callback(horizonte_s) -> °C previsto (opcional)
+        self.lookahead = lookahead      # Controla sobre a temperatura daqui a N segundos
+        self.guard_s = guard_s          # Emergência antecipa a subida atual por N segundos
+        self.thermal_limit = thermal_limit
+        self.max_cap = max_cap
+        self.min_cap = min_cap
+        self.margin = margin            # Setpoint = thermal_limit - margin
+        self.hysteresis = hysteresis    # |erro| < hysteresis -> sem ação
+        self.kp = kp                    # % de cap por °C
+        self.ki = ki                    # % de cap por °C·s
+        self.max_step = max_step        # Máx. variação do cap por ajuste (%)
+        self.min_dwell = min_dwell      # Segundos mínimos entre ajustes
+        self.interval = interval
+        self.running = False
+
+        self.cap = max_cap
+        self.last_temp = 0.0
+        self.last_forecast = 0.0
+        self._integral = 0.0
+        self._last_step = None
+        self._last_change = 0.0
+        self.changes = 0
+
+    @property
+    def setpoint(self):
+        return self.thermal_limit - self.margin
+
+    def configure(self, thermal_limit=None, max_cap=None, min_cap=None, jump=True):
+        """
+        Atualiza limites (troca de perfil / game boost); aplica o novo teto na hora.
+        jump=False: teto maior sobe gradualmente pelo controlador (sem degrau)
+        """
+        if thermal_limit is not None:
+            self.thermal_limit = thermal_limit
+        if min_cap is not None:
+            self.min_cap = min_cap
+        if max_cap is not None:
+            self.max_cap = max_cap
+            # Teto menor: corta já. Teto maior com folga térmica: sobe já (game boost)
+            headroom = self._control_temp(self.last_temp) < self.setpoint - self.hysteresis
+            if self.cap > max_cap or not self.running or (jump and headroom):
+                self._set_cap(max_cap, time.time(), reason='limite do perfil')
+        self._clamp_integral()
+
+    def _clamp_integral(self):
+        # Anti-windup: cap = max_cap + integral, logo integral ∈ [min-max, 0]
+        self._integral = max(self.min_cap - self.max_cap, min(0.0, self._integral))
+
+    def _control_temp(self, temp):
+        """Temperatura prevista no horizonte (ou a atual, sem modelo)"""
+        if self.forecast_temp is None:
+            return temp
+        try:
+            predicted = self.forecast_temp(self.lookahead)
+        except Exception:
+            return temp
+        self.last_forecast = predicted
+        return predicted if predicted and predicted > 0 else temp
+
+    def step(self, now=None, temp=None):
+        """Uma iteração do controlador; retorna o cap vigente"""
+        now = time.time() if now is None else now
+        temp = self.read_temp() if temp is None else temp
+        if not temp or temp <= 0:
+            return self.cap
+        dt = self.interval if self._last_step is None else max(0.0, now - self._last_step)
+        self._last_step = now
+        rising = (temp - self.last_temp) / dt if self.last_temp and dt > 0 else 0.0
+        self.last_temp = temp
+
+        # Erro positivo = folga térmica (pode subir o cap). Com modelo, age sobre
+        # onde a temperatura VAI estar: corta antes e menos, sem bater no PROCHOT
+        error = self.setpoint - self._control_temp(temp)
+        if abs(error) < self.hysteresis:
+            error = 0.0
+
+        self._integral += self.ki * error * dt
+        self._clamp_integral()
+        desired = self.max_cap + self._integral + self.kp * error
+        desired = max(self.min_cap, min(self.max_cap, desired))
+
+        # Limites de taxa: passo máximo e dwell
+        delta = max(-self.max_step, min(self.max_step, desired - self.cap))
+        target = int(round(self.cap + delta))
+
+        # No limite (ou chegando nele em guard_s, pela subida atual): corta já, sem
+        # dwell, pelo menos max_step ou o termo P do excesso. A integral acompanha
+        # o corte (senão o PI devolve o cap no tick seguinte)
+        ahead = temp + max(0.0, rising) * self.guard_s
+        emergency = ahead >= self.thermal_limit and self.cap > self.min_cap
+        if emergency:
+            cut = max(self.max_step, int(round(self.kp * (ahead - self.setpoint))))
+            target = max(self.min_cap, min(target, self.cap - cut))
+            self._integral = target - self.max_cap - self.kp * error
+            self._clamp_integral()
+        if target == self.cap:
+            return self.cap
+        if not emergency and now - self._last_change < self.min_dwell:
+            return self.cap
+
+        self._set_cap(target, now, reason=f"{temp:.1f}°C (alvo {self.setpoint:.0f}°C)")
+        return self.cap
+
+    def _set_cap(self, cap, now, reason=''):
+        cap = int(max(self.min_cap, min(self.max_cap, cap)))
+        if cap == self.cap and self.changes:
+            return
+        print(f"[CPU] Thermal Governor: {reason} -> limite {cap}%")
+        self.cap = cap
+        self._last_change = now
+        self.changes += 1
+        self.apply_cap(cap)
+
+    def start(self):
+        """Registra o job no scheduler central"""
+        if self.running:
+            return
+        self.running = True
+        self._last_step = None
+        scheduler.get_scheduler().add_job(self.JOB_NAME, self.step, self.interval)
+
+    def stop(self, restore=True):
+        """Para o controle; por padrão devolve o cap ao teto do perfil"""
+        if not self.running:
+            return
+        self.running = False
+        scheduler.get_scheduler().cancel(self.JOB_NAME)
+        if restore and self.cap != self.max_cap:
+            self._set_cap(self.max_cap, time.time(), reason='governor parado')
+
+    def get_status(self):
+        return {
+            'running': self.running,
+            'cap': self.cap,
+            'temp': self.last_temp,
+            'forecast': self.last_forecast,
+            'setpoint': self.setpoint,
+            'thermal_limit': self.thermal_limit,
+            'changes': self.changes,
+        }
+
+
+class SimulatedThermalPlant:
+    """
+    CPU simulada (modelo RC de primeira ordem):
+      dT/dt = (ambiente + R·P - T) / tau,  P = idle + (max - idle)·carga·(cap/100)³
+    Acima de prochot_temp o "firmware" corta o clock pela metade.
+    """
+
+    def __init__(self, ambient=35.0, idle_w=8.0, max_w=65.0, r_c_per_w=1.0, tau=25.0,
+                 prochot_temp=100.0, load=1.0):
+        self.ambient = ambient
+        self.idle_w = idle_w
+        self.max_w = max_w
+        self.r = r_c_per_w
+        self.tau = tau
+        self.prochot_temp = prochot_temp
+        self.load = load
+        self.temp = ambient
+        self.prochot_seconds = 0.0
+
+    def power(self, cap):
+        return self.idle_w + (self.max_w - self.idle_w) * self.load * (cap / 100.0) ** 3
+
+    def step(self, cap, dt):
+        """Avança dt segundos com o cap dado; retorna (temp, desempenho efetivo %)"""
+        effective = cap
+        if self.temp >= self.prochot_temp:
+            effective = cap * 0.5
+            self.prochot_seconds += dt
+        steady = self.ambient + self.r * self.power(effective)
+        self.temp += (steady - self.temp) * min(1.0, dt / self.tau)
+        return self.temp, effective * self.load
+
+
+def simulate(controller_step, plant, seconds=600, dt=1.0):
+    """Roda um controlador (callable(now, temp) -> cap) contra a planta"""
+    now = 0.0
+    cap = 100
+    perf_total = 0.0
+    max_temp = 0.0
+    while now < seconds:
+        temp, perf = plant.step(cap, dt)
+        perf_total += perf * dt
+        max_temp = max(max_temp, temp)
+        now += dt
+        cap = controller_step(now, temp)
+    return {'avg_perf': perf_total / seconds, 'max_temp': max_temp,
+            'prochot_s': plant.prochot_seconds, 'final_cap': cap}
+
+
+if __name__ == "__main__":
+    # Compara a escada antiga (100/90/85) com o PI na mesma planta simulada
+    def ladder():
+        state = {'cap': 100, 'last': -5}
+
+        def step(now, temp):
+            if now - state['last'] < 5:
+                return state['cap']
+            state['last'] = now
+            if temp < 70:
+                state['cap'] = 100
+            elif temp > 90:
+                state['cap'] = 85
+            elif temp > 80 and state['cap'] > 90:
+                state['cap'] = 90
+            return state['cap']
+        return step
+
+    # Mesmo thermal_limit (perfil Gaming: 90°C), dois coolers diferentes
+    limit = 90
+    for resistance in (1.05, 1.4):
+        plant = SimulatedThermalPlant(r_c_per_w=resistance)
+        baseline = simulate(ladder(), plant)
+        print(f"Escada (R={resistance}): desempenho {baseline['avg_perf']:.1f}% | "
+              f"máx {baseline['max_temp']:.1f}°C | PROCHOT {baseline['prochot_s']:.0f}s")
+
+        plant = SimulatedThermalPlant(r_c_per_w=resistance)
+        governor = ThermalGovernor(lambda cap: None, lambda: 0, thermal_limit=limit, interval=1.0)
+        result = simulate(lambda now, temp: governor.step(now, temp), plant)
+        print(f"PI     (R={resistance}): desempenho {result['avg_perf']:.1f}% | "
+              f"máx {result['max_temp']:.1f}°C | PROCHOT {result['prochot_s']:.0f}s | "
+              f"{governor.changes} ajustes")
+
+        assert result['max_temp'] <= limit, f"PI passou do limite: {result['max_temp']:.1f}°C"
+        if baseline['max_temp'] <= limit:
+            # Mesma temperatura máxima: o PI tem que sustentar mais clock que a escada
+            assert result['avg_perf'] >= baseline['avg_perf'], "PI abaixo da escada"
+        else:
+            print(f"       (escada +{baseline['max_temp'] - limit:.1f}°C acima do limite: desempenho não comparável)")
@@ -3,8 +3,7 @@ Timer Resolution Optimizer
 Força resolução de timer para 0.5ms (melhor input lag)
 """
 import ctypes
-import threading
-import time
+from modules import scheduler
 
 class TimerResolutionOptimizer:
     """Otimiza resolução do timer do Windows para baixa latência"""
@@ -12,7 +11,6 @@ class TimerResolutionOptimizer:
     def __init__(self):
         self.ntdll = ctypes.WinDLL('ntdll')
         self.running = False
-        self.thread = None
         self.original_resolution = None
         
         # Target: 0.5ms (5000 * 100ns = 0.5ms)
@@ -77,17 +75,17 @@ class TimerResolutionOptimizer:
         """Mantém resolução baixa persistentemente (alguns apps resetam)"""
         self.running = True
         
-        def maintain_loop():
-            while self.running:
-                self.set_resolution(self.target_resolution)
-                time.sleep(60)  # Re-aplica a cada 60 segundos
-        
-        self.thread = threading.Thread(target=maintain_loop, daemon=True)
-        self.thread.start()
+        # Re-aplica a cada 60 segundos (job do scheduler central)
+        scheduler.get_scheduler().add_job(
+            'timer_resolution',
+            lambda: self.set_resolution(self.target_resolution),
+            60
+        )
     
     def restore(self):
         """Restaura resolução padrão"""
         self.running = False
+        scheduler.get_scheduler().cancel('timer_resolution')
         if self.original_resolution:
             # 156250 = 15.625ms (padrão Windows)
             self.set_resolution(156250)
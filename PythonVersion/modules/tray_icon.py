@@ -122,7 +122,7 @@ class SystemTrayIcon:
     def _force_clean(self):
         """Força limpeza de RAM"""
         if 'cleaner' in self.services:
-            freed = self.services['cleaner'].clean_standby_memory()
+            freed = self.services['cleaner'].clean_standby_memory(trigger='manual', full=True)
             print(f"[TRAY] Limpeza manual: {freed}MB liberados")
     
     def _quit(self):
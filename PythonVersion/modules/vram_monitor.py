@@ -0,0 +1,210 @@
+"""
+VRAM Monitor - Memória de vídeo por processo e alívio de pressão durante jogos
+- Atribui VRAM a processos (listas de processos gráfico/compute do NVML)
+- Top consumidores para o Dashboard
+- Com jogo ativo e VRAM perto do total por alguns segundos, rebaixa
+  CPU/I/O/memória dos outros consumidores de GPU via SmartProcessManager
+  (navegadores, Discord com aceleração de hardware) e restaura depois
+"""
+import os
+import time
+from typing import NamedTuple
+
+from modules import nvml_session
+from modules import process_table
+from modules import scheduler
+
+
+class VramConsumer(NamedTuple):
+    """Processo com memória de vídeo alocada"""
+    pid: int
+    name: str
+    gpu_index: int
+    used_bytes: int          # 0 = desconhecido (WDDM nem sempre informa)
+    is_game: bool
+
+
+class VramMonitor:
+    """Job do scheduler: amostra consumidores de VRAM e controla o modo de pressão"""
+
+    JOB_NAME = 'vram_monitor'
+
+    # Nunca rebaixados (compositor, shell, o próprio otimizador)
+    PROTECTED = {'dwm.exe', 'csrss.exe', 'explorer.exe', 'System', 'Idle'}
+
+    def __init__(self, session=None, table=None, manager=None, is_game_active=None,
+                 game_pid=None, demote_background=True, pressure_ratio=0.90,
+                 release_ratio=0.80, sustain=6.0, min_bytes=64 * 1024 * 1024,
+                 top_n=5, interval=2.0):
+        self.session = session or nvml_session.get_session()
+        self.table = table or process_table.get_table()
+        self.manager = manager              # SmartProcessManager (demote/restore_demoted)
+        self.is_game_active = is_game_active or (lambda: False)
+        self.game_pid = game_pid or (lambda: None)
+        self.demote_background = demote_background
+        self.pressure_ratio = pressure_ratio    # Entra em pressão acima disto (VRAM usada / total)
+        self.release_ratio = release_ratio      # Sai abaixo disto
+        self.sustain = sustain                  # Segundos de pressão contínua antes de agir
+        self.min_bytes = min_bytes              # Consumidores menores não são rebaixados
+        self.top_n = top_n
+        self.interval = interval
+        self.running = False
+
+        self.consumers = ()
+        self.ratio = 0.0
+        self.pressure = False
+        self.pressure_events = 0
+        self._high_since = None
+        self._demoted_keys = set()
+
+    @property
+    def top(self):
+        """Maiores consumidores (VRAM conhecida primeiro)"""
+        return self.consumers[:self.top_n]
+
+    def _build_consumers(self):
+        game_pid = self.game_pid()
+        consumers = []
+        for proc in self.session.processes():
+            entry = self.table.get(proc.pid)
+            name = entry.name if entry else f"pid {proc.pid}"
+            consumers.append(VramConsumer(proc.pid, name, proc.gpu_index, proc.used_bytes,
+                                          proc.pid == game_pid))
+        consumers.sort(key=lambda c: c.used_bytes, reverse=True)
+        return tuple(consumers)
+
+    def step(self, now=None):
+        """Uma amostragem; retorna se está em modo de pressão"""
+        now = time.time() if now is None else now
+        gpus = self.session.sample()
+        if not gpus:
+            return False
+        self.ratio = max((g.mem_used / g.mem_total for g in gpus if g.mem_total), default=0.0)
+        self.consumers = self._build_consumers()
+
+        try:
+            game = bool(self.is_game_active())
+        except Exception:
+            game = False
+        threshold = self.release_ratio if self.pressure else self.pressure_ratio
+        high = game and self.ratio >= threshold
+
+        if high:
+            if self._high_since is None:
+                self._high_since = now
+            if not self.pressure and now - self._high_since >= self.sustain:
+                self.pressure = True
+                self.pressure_events += 1
+                print(f"[VRAM] Pressão: {self.ratio * 100:.0f}% da VRAM em uso com jogo ativo")
+            if self.pressure:
+                self._demote_background()  # Inclui consumidores que surgirem durante a pressão
+        else:
+            self._high_since = None
+            if self.pressure:
+                self.pressure = False
+                print(f"[VRAM] Pressão aliviada ({self.ratio * 100:.0f}%)")
+                self._restore()
+        return self.pressure
+
+    def _background_entries(self):
+        """
+        Consumidores de GPU que não são o jogo, nem do sistema, nem protegidos.
+        Uso conhecido: só a partir de min_bytes. Uso desconhecido (0): só apps
+        que o SmartProcessManager já classifica como prioridade baixa (não
+        rebaixa gravadores/overlays que só aparecem na lista da GPU)
+        """
+        own_pid = os.getpid()
+        for consumer in self.consumers:
+            if consumer.is_game or consumer.pid == own_pid or consumer.name in self.PROTECTED:
+                continue
+            entry = self.table.get(consumer.pid)
+            if entry is None or entry.key in self._demoted_keys:
+                continue
+            if consumer.used_bytes < self.min_bytes and not (
+                    consumer.used_bytes == 0 and self.manager.is_low_priority(entry)):
+                continue
+            username = entry.username
+            if not username or 'SYSTEM' in username.upper():
+                continue
+            yield entry, consumer
+
+    def _demote_background(self):
+        if not (self.demote_background and self.manager):
+            return
+        for entry, consumer in list(self._background_entries()):
+            reason = f"VRAM {consumer.used_bytes / 1024 / 1024:.0f}MB" if consumer.used_bytes else "usa GPU"
+            if self.manager.demote(entry, reason):
+                self._demoted_keys.add(entry.key)
+
+    def _restore(self):
+        if self.manager and self._demoted_keys:
+            self.manager.restore_demoted(self._demoted_keys)
+        self._demoted_keys.clear()
+
+    def start(self):
+        """Registra o job no scheduler central"""
+        if self.running or not self.session.available:
+            return False
+        self.running = True
+        scheduler.get_scheduler().add_job(self.JOB_NAME, self.step, self.interval)
+        return True
+
+    def stop(self):
+        """Para o monitor e devolve as prioridades rebaixadas"""
+        if not self.running:
+            return
+        self.running = False
+        scheduler.get_scheduler().cancel(self.JOB_NAME)
+        self.pressure = False
+        self._restore()
+
+    def get_status(self):
+        return {
+            'running': self.running,
+            'ratio': self.ratio,
+            'pressure': self.pressure,
+            'pressure_events': self.pressure_events,
+            'demoted': len(self._demoted_keys),
+            'top': self.top,
+        }
+
+
+if __name__ == "__main__":
+    # Teste com GPU falsa: jogo + navegador + Discord enchendo a VRAM
+    from modules.process_table import ProcessEntry
+
+    class _Table:
+        def __init__(self, entries):
+            self.entries = {e.pid: e for e in entries}
+
+        def get(self, pid):
+            return self.entries.get(pid)
+
+    class _Manager:
+        def is_low_priority(self, entry):
+            return entry.name.lower() in ('chrome.exe', 'discord.exe')
+
+        def demote(self, entry, reason=''):
+            print(f"  rebaixa {entry.name} ({reason})")
+            return True
+
+        def restore_demoted(self, keys=None):
+            print(f"  restaura {len(keys)} processo(s)")
+
+    entries = [ProcessEntry(100, 1.0, 'game.exe', 32), ProcessEntry(200, 1.0, 'chrome.exe', 32),
+               ProcessEntry(300, 1.0, 'Discord.exe', 32), ProcessEntry(400, 1.0, 'dwm.exe', 32)]
+    for entry in entries:
+        entry._username = 'PC\\user'
+
+    fake = nvml_session.FakeNVML()
+    gpu = fake.gpus[0]
+    gpu['processes'] = [(100, 2900 << 20), (200, 600 << 20), (300, 250 << 20), (400, 150 << 20)]
+    monitor = VramMonitor(session=nvml_session.NvmlSession(nvml=fake, max_age=0), table=_Table(entries),
+                          manager=_Manager(), is_game_active=lambda: True, game_pid=lambda: 100)
+
+    for now, used_mb in ((0, 3000), (2, 3800), (4, 3850), (8, 3900), (12, 3500), (16, 3100)):
+        gpu['mem_used'] = used_mb << 20
+        pressure = monitor.step(now=now)
+        print(f"t={now:2d}s VRAM {monitor.ratio * 100:3.0f}% pressão={pressure}")
+
+    print("Top:", [(c.name, c.used_bytes >> 20) for c in monitor.top])
@@ -4,13 +4,16 @@ Alternativa ao dashboard de console que pisca
 """
 import tkinter as tk
 from tkinter import ttk
-import psutil
-import time
-import threading
+from modules import telemetry
+from modules import scheduler
+from modules import metrics_store
+from modules import wmi_broker
 
 class OptimizerWidget:
     def __init__(self, services):
         self.services = services
+        self.sampler = telemetry.get_sampler()
+        self.metrics = metrics_store.get_store()
         self.root = tk.Tk()
         self.root.title("Windows Optimizer")
         
@@ -29,9 +32,8 @@ class OptimizerWidget:
         self.create_widgets()
         self.running = True
         
-        # Thread para atualizar dados
-        self.update_thread = threading.Thread(target=self.update_loop, daemon=True)
-        self.update_thread.start()
+        # Atualiza a cada 2 segundos (job do scheduler central)
+        scheduler.get_scheduler().add_job('widget', self.update_data, 2)
     
     def create_widgets(self):
         """Cria os widgets da interface"""
@@ -76,63 +78,48 @@ class OptimizerWidget:
         self.cpu_limit_label = ttk.Label(main_frame, text="● CPU Limit: 85%", foreground='#ffff00')
         self.cpu_limit_label.pack(anchor='w', pady=2)
     
-    def update_loop(self):
-        """Loop de atualização dos dados"""
-        while self.running:
-            try:
-                self.update_data()
-                time.sleep(2)  # Atualiza a cada 2 segundos
-            except:
-                pass
-    
     def update_data(self):
         """Atualiza os dados exibidos"""
         try:
+            # Snapshot compartilhado (sem polling próprio de psutil/NVML)
+            snap = self.sampler.get_snapshot()
+            
             # CPU
-            cpu_pct = psutil.cpu_percent(interval=0.1)
-            cpu_freq = psutil.cpu_freq()
-            freq_ghz = cpu_freq.current / 1000 if cpu_freq else 0
-            self.cpu_label.config(text=f"CPU: {cpu_pct:.1f}% @ {freq_ghz:.2f} GHz")
+            freq_ghz = snap.cpu_freq_mhz / 1000
+            cpu_text = f"CPU: {snap.cpu_percent:.1f}% @ {freq_ghz:.2f} GHz"
+            load_1m = self.metrics.summary('cpu_percent', 60)
+            if load_1m:
+                cpu_text += f" (1min avg {load_1m['avg']:.0f}%)"
+            self.cpu_label.config(text=cpu_text)
             
             # GPU NVIDIA + Temperatura
-            try:
-                import pynvml
-                pynvml.nvmlInit()
+            if snap.gpu_name:
+                if snap.cpu_temp > 0:
+                    self.cpu_temp_label.config(text=f"Temp CPU: {snap.cpu_temp:.0f}°C")
+                else:
+                    cpu_temp = snap.gpu_temp + 7  # Estimativa CPU
+                    self.cpu_temp_label.config(text=f"Temp CPU: ~{cpu_temp:.0f}°C (est.)")
                 
-                # Procura NVIDIA
-                device_count = pynvml.nvmlDeviceGetCount()
-                nvidia_found = False
-                for i in range(device_count):
-                    handle = pynvml.nvmlDeviceGetHandleByIndex(i)
-                    name = pynvml.nvmlDeviceGetName(handle).decode('utf-8')
-                    if 'nvidia' in name.lower():
-                        gpu_temp = pynvml.nvmlDeviceGetTemperature(handle, 0)
-                        gpu_util = pynvml.nvmlDeviceGetUtilizationRates(handle)
-                        mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
-                        
-                        cpu_temp = gpu_temp + 7  # Estimativa CPU
-                        self.cpu_temp_label.config(text=f"Temp CPU: ~{cpu_temp:.0f}°C (est.)")
-                        
-                        vram_gb = mem_info.total / (1024**3)
-                        self.gpu_nvidia_label.config(
-                            text=f"GPU NVIDIA: {gpu_util.gpu}% @ {gpu_temp}°C ({vram_gb:.0f}GB)",
-                            foreground='#00ff00'
-                        )
-                        nvidia_found = True
-                        break
-                
-                if not nvidia_found:
-                    self.gpu_nvidia_label.config(text="GPU NVIDIA: Não detectada", foreground='#888888')
-            except:
-                self.cpu_temp_label.config(text="Temp CPU: N/A")
-                self.gpu_nvidia_label.config(text="GPU NVIDIA: Erro", foreground='#ff0000')
+                vram_gb = snap.gpu_mem_total / (1024**3)
+                extra = f" +{len(snap.gpus) - 1} GPU" if len(snap.gpus) > 1 else ""
+                self.gpu_nvidia_label.config(
+                    text=f"GPU NVIDIA: {snap.gpu_percent:.0f}% @ {snap.gpu_temp:.0f}°C ({vram_gb:.0f}GB){extra}",
+                    foreground='#00ff00'
+                )
+            else:
+                if snap.cpu_temp > 0:
+                    self.cpu_temp_label.config(text=f"Temp CPU: {snap.cpu_temp:.0f}°C")
+                else:
+                    self.cpu_temp_label.config(text="Temp CPU: N/A")
+                self.gpu_nvidia_label.config(text="GPU NVIDIA: Não detectada", foreground='#888888')
             
             # GPU Intel (integrada)
             try:
-                import wmi
-                c = wmi.WMI()
+                # Broker: conexão reutilizada + cache de 1h para Win32_VideoController
+                rows = wmi_broker.get_broker().query_sync(
+                    wmi_broker.CIMV2, "SELECT Name FROM Win32_VideoController")
                 intel_found = False
-                for gpu in c.Win32_VideoController():
+                for gpu in rows:
                     if 'intel' in gpu.Name.lower():
                         self.gpu_intel_label.config(
                             text=f"GPU Intel: {gpu.Name[:25]}... (Integrada)",
@@ -147,10 +134,9 @@ class OptimizerWidget:
                 self.gpu_intel_label.config(text="GPU Intel: Erro", foreground='#ff0000')
             
             # RAM
-            mem = psutil.virtual_memory()
-            ram_free_gb = (mem.total - mem.used) / (1024**3)
-            ram_total_gb = mem.total / (1024**3)
-            self.ram_label.config(text=f"RAM: {mem.percent:.1f}% usado ({ram_free_gb:.1f}GB livre / {ram_total_gb:.1f}GB)")
+            ram_free_gb = (snap.ram_total - snap.ram_used) / (1024**3)
+            ram_total_gb = snap.ram_total / (1024**3)
+            self.ram_label.config(text=f"RAM: {snap.ram_percent:.1f}% usado ({ram_free_gb:.1f}GB livre / {ram_total_gb:.1f}GB)")
             
             # Limpezas
             if 'cleaner' in self.services:
@@ -169,6 +155,7 @@ class OptimizerWidget:
     def on_closing(self):
         """Chamado ao fechar a janela"""
         self.running = False
+        scheduler.get_scheduler().cancel('widget')
         self.root.destroy()
 
 
@@ -0,0 +1,260 @@
+"""
+WMI Broker - Uma thread COM dona de todas as conexões WMI
+- Conexões reutilizadas por namespace (sem wmi.WMI() por chamada)
+- Consultas de qualquer thread entram numa fila e voltam como Future
+- Resultados convertidos em objetos Python simples (sem COM cruzando threads)
+- Cache com TTL por classe WMI
+- Assinaturas de eventos (watch_for) atendidas pela mesma thread
+"""
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+CIMV2 = 'root\\cimv2'
+
+# TTL padrão por classe (segundos); 0 = sempre consulta
+DEFAULT_CLASS_TTLS = {
+    'Win32_VideoController': 3600,
+    'Win32_Processor': 3600,
+    'Win32_ComputerSystem': 3600,
+    'DellThermalSetting': 60,
+}
+
+_FROM_RE = re.compile(r'\bFROM\s+(\w+)', re.IGNORECASE)
+
+
+class WmiRow:
+    """Linha de resultado desacoplada do COM (atributos = propriedades WMI)"""
+
+    def __init__(self, properties):
+        self.__dict__.update(properties)
+
+    def __repr__(self):
+        return f"WmiRow({self.__dict__!r})"
+
+
+def _to_row(obj):
+    """Copia as propriedades de um objeto WMI (dentro da thread COM)"""
+    names = getattr(obj, 'properties', None)
+    if names is None:
+        return obj  # Já é um objeto simples (fontes falsas)
+    return WmiRow({name: getattr(obj, name, None) for name in names})
+
+
+def _connect_wmi(namespace):
+    import wmi
+    return wmi.WMI(namespace=namespace)
+
+
+class WmiSubscription:
+    """Assinatura de eventos registrada no broker"""
+
+    def __init__(self, namespace, make_watcher, parse, callback):
+        self.namespace = namespace
+        self.make_watcher = make_watcher    # conn -> watcher (na thread COM)
+        self.parse = parse                  # evento COM -> valor Python (na thread COM)
+        self.callback = callback            # valor -> None (na thread de despacho)
+        self.watcher = None
+        self.active = True
+        self.error = None
+
+
+class WmiBroker:
+    """Fila de trabalho atendida por uma única thread com COM inicializado"""
+
+    def __init__(self, connect=None, class_ttls=None, event_poll_interval=0.05):
+        self.connect = connect or _connect_wmi
+        self.class_ttls = dict(DEFAULT_CLASS_TTLS)
+        self.class_ttls.update(class_ttls or {})
+        self.event_poll_interval = event_poll_interval
+        self.running = False
+        self.thread = None
+        self.queries = 0            # Consultas que chegaram ao WMI (sem cache)
+        self._tasks = queue.Queue()
+        self._events = queue.Queue()
+        self._connections = {}
+        self._cache = {}            # (namespace, wql) -> (expira_em, rows)
+        self._subscriptions = []
+        self._lock = threading.Lock()
+
+    # === API (qualquer thread) ===
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run_loop, name="wmi-broker", daemon=True)
+        self.thread.start()
+        threading.Thread(target=self._dispatch_loop, name="wmi-events", daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        self._tasks.put(None)
+        self._events.put(None)
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def submit(self, func) -> Future:
+        """Executa func(broker_conn) na thread COM; func recebe get_connection(namespace)"""
+        if not self.running:
+            self.start()
+        future = Future()
+        self._tasks.put((func, future))
+        return future
+
+    def query(self, namespace, wql, ttl=None) -> Future:
+        """WQL -> Future[list[WmiRow]] (cache por classe, ou ttl explícito)"""
+        if ttl is None:
+            match = _FROM_RE.search(wql)
+            ttl = self.class_ttls.get(match.group(1), 0) if match else 0
+
+        key = (namespace, wql)
+        cached = self._cache.get(key)
+        if ttl and cached and cached[0] > time.time():
+            future = Future()
+            future.set_result(cached[1])
+            return future
+
+        def run(get_connection):
+            rows = [_to_row(obj) for obj in get_connection(namespace).query(wql)]
+            self.queries += 1
+            if ttl:
+                self._cache[key] = (time.time() + ttl, rows)
+            return rows
+
+        return self.submit(run)
+
+    def query_sync(self, namespace, wql, ttl=None, timeout=10):
+        """Versão bloqueante de query()"""
+        return self.query(namespace, wql, ttl).result(timeout=timeout)
+
+    def call(self, namespace, func, timeout=10):
+        """Executa func(conexão) na thread COM (chamadas de método WMI) e aguarda"""
+        return self.submit(lambda get_connection: func(get_connection(namespace))).result(timeout=timeout)
+
+    def subscribe(self, namespace, make_watcher, parse, callback) -> WmiSubscription:
+        """
+        Assina eventos: make_watcher(conn) cria o watcher na thread COM,
+        parse(evento) converte cada evento lá mesmo e callback(valor) roda
+        numa thread de despacho (não trava o broker).
+        """
+        subscription = WmiSubscription(namespace, make_watcher, parse, callback)
+
+        def register(get_connection):
+            subscription.watcher = make_watcher(get_connection(namespace))
+            self._subscriptions.append(subscription)
+            return subscription
+
+        return self.submit(register).result(timeout=15)
+
+    def unsubscribe(self, subscription):
+        subscription.active = False
+
+    def invalidate(self, wmi_class=None):
+        """Limpa cache (tudo ou de uma classe)"""
+        if wmi_class is None:
+            self._cache.clear()
+            return
+        for key in list(self._cache):
+            match = _FROM_RE.search(key[1])
+            if match and match.group(1).lower() == wmi_class.lower():
+                self._cache.pop(key, None)
+
+    # === Thread COM ===
+
+    def _get_connection(self, namespace):
+        conn = self._connections.get(namespace)
+        if conn is None:
+            conn = self.connect(namespace)
+            self._connections[namespace] = conn
+        return conn
+
+    def _run_loop(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except Exception:
+            pythoncom = None
+
+        try:
+            while self.running:
+                timeout = self.event_poll_interval if self._subscriptions else None
+                try:
+                    task = self._tasks.get(timeout=timeout)
+                except queue.Empty:
+                    task = None
+                else:
+                    if task is None:
+                        continue
+                    func, future = task
+                    if future.set_running_or_notify_cancel():
+                        try:
+                            future.set_result(func(self._get_connection))
+                        except Exception as e:
+                            future.set_exception(e)
+
+                if self._subscriptions:
+                    self._poll_events()
+        finally:
+            self._connections.clear()
+            if pythoncom is not None:
+                pythoncom.CoUninitialize()
+
+    def _poll_events(self):
+        """Drena eventos pendentes de todas as assinaturas (sem bloquear)"""
+        for subscription in list(self._subscriptions):
+            if not subscription.active:
+                self._subscriptions.remove(subscription)
+                continue
+            while True:
+                try:
+                    event = subscription.watcher(timeout_ms=0)
+                except Exception as e:
+                    if type(e).__name__ == 'x_wmi_timed_out':
+                        break
+                    subscription.error = e
+                    subscription.active = False
+                    print(f"[WMI] Assinatura encerrada: {e}")
+                    break
+                try:
+                    self._events.put((subscription, subscription.parse(event)))
+                except Exception as e:
+                    print(f"[WMI] Erro ao converter evento: {e}")
+
+    def _dispatch_loop(self):
+        while True:
+            item = self._events.get()
+            if item is None:
+                return
+            subscription, value = item
+            if not subscription.active:
+                continue
+            try:
+                subscription.callback(value)
+            except Exception as e:
+                print(f"[WMI] Erro no callback: {e}")
+
+
+# Singleton global
+_instance = None
+
+def get_broker() -> WmiBroker:
+    """Retorna instância singleton do WmiBroker"""
+    global _instance
+    if _instance is None:
+        _instance = WmiBroker()
+    return _instance
+
+
+if __name__ == "__main__":
+    # Teste (requer Windows + pacote wmi)
+    broker = get_broker()
+    for _ in range(3):
+        start = time.perf_counter()
+        rows = broker.query_sync(CIMV2, "SELECT Name FROM Win32_VideoController")
+        print(f"{[r.Name for r in rows]} em {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(f"Consultas reais: {broker.queries}")
+    broker.stop()
@@ -0,0 +1,293 @@
+"""
+Working Set Trimmer - Trim direcionado de processos em segundo plano
+Alternativa ao MemoryEmptyWorkingSets global (que trava os apps ativos):
+com jogo ativo, só os processos que o SmartProcessManager classificou como
+prioridade BAIXA (navegadores, Discord, sync) têm o working set esvaziado
+(EmptyWorkingSet) e, opcionalmente, um teto suave via
+SetProcessWorkingSetSizeEx. As páginas vão para as listas standby/modified:
+se o processo voltar a usá-las, é soft fault, sem ler do disco.
+Tetos são desfeitos quando o jogo fecha; bytes recuperados por processo.
+"""
+import ctypes
+import threading
+from ctypes import wintypes
+from typing import NamedTuple
+
+import psutil
+
+from modules import scheduler
+
+MB = 1024 * 1024
+
+PROCESS_SET_QUOTA = 0x0100
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+QUOTA_LIMITS_HARDWS_MIN_DISABLE = 0x2
+QUOTA_LIMITS_HARDWS_MAX_DISABLE = 0x8
+SOFT_LIMITS = QUOTA_LIMITS_HARDWS_MIN_DISABLE | QUOTA_LIMITS_HARDWS_MAX_DISABLE
+
+
+class TrimResult(NamedTuple):
+    """Efeito do trim em um processo"""
+    pid: int
+    name: str
+    before_bytes: int
+    after_bytes: int
+    capped: bool
+
+    @property
+    def reclaimed_bytes(self):
+        return max(0, self.before_bytes - self.after_bytes)
+
+
+class Win32WorkingSetBackend:
+    """EmptyWorkingSet / SetProcessWorkingSetSizeEx via ctypes"""
+
+    name = 'win32'
+
+    def __init__(self):
+        self.kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self.kernel32.OpenProcess.restype = wintypes.HANDLE
+        self.kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        self.kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self.kernel32.K32EmptyWorkingSet.argtypes = [wintypes.HANDLE]
+        self.kernel32.SetProcessWorkingSetSizeEx.argtypes = [
+            wintypes.HANDLE, ctypes.c_size_t, ctypes.c_size_t, wintypes.DWORD]
+        self.kernel32.GetProcessWorkingSetSizeEx.argtypes = [
+            wintypes.HANDLE, ctypes.POINTER(ctypes.c_size_t), ctypes.POINTER(ctypes.c_size_t),
+            ctypes.POINTER(wintypes.DWORD)]
+
+    def _open(self, pid):
+        handle = self.kernel32.OpenProcess(PROCESS_SET_QUOTA | PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        return handle
+
+    def working_set(self, pid):
+        """Working set atual (psutil rss = WorkingSetSize no Windows)"""
+        return psutil.Process(pid).memory_info().rss
+
+    def trim(self, pid):
+        handle = self._open(pid)
+        try:
+            return bool(self.kernel32.K32EmptyWorkingSet(handle))
+        finally:
+            self.kernel32.CloseHandle(handle)
+
+    def get_limits(self, pid):
+        """(mínimo, máximo, flags) atuais - para restaurar depois do teto"""
+        handle = self._open(pid)
+        try:
+            minimum, maximum, flags = ctypes.c_size_t(), ctypes.c_size_t(), wintypes.DWORD()
+            if not self.kernel32.GetProcessWorkingSetSizeEx(handle, ctypes.byref(minimum),
+                                                            ctypes.byref(maximum), ctypes.byref(flags)):
+                raise ctypes.WinError(ctypes.get_last_error())
+            return minimum.value, maximum.value, flags.value
+        finally:
+            self.kernel32.CloseHandle(handle)
+
+    def set_limits(self, pid, minimum, maximum, flags):
+        handle = self._open(pid)
+        try:
+            return bool(self.kernel32.SetProcessWorkingSetSizeEx(handle, minimum, maximum, flags))
+        finally:
+            self.kernel32.CloseHandle(handle)
+
+
+class FakeWorkingSetBackend:
+    """Processos simulados: working set em MB, trim devolve a parte residente mínima"""
+
+    name = 'fake'
+
+    def __init__(self, working_sets_mb=None, resident_mb=40):
+        self.working_sets = {pid: mb * MB for pid, mb in (working_sets_mb or {}).items()}
+        self.resident = resident_mb * MB
+        self.limits = {}
+        self.trims = 0
+
+    def working_set(self, pid):
+        if pid not in self.working_sets:
+            raise psutil.NoSuchProcess(pid)
+        return self.working_sets[pid]
+
+    def trim(self, pid):
+        self.trims += 1
+        self.working_sets[pid] = min(self.working_sets[pid], self.resident)
+        return True
+
+    def grow(self, pid, mb):
+        self.working_sets[pid] += mb * MB
+
+    def get_limits(self, pid):
+        return self.limits.get(pid, (200 * 1024, 1380 * 1024, SOFT_LIMITS))
+
+    def set_limits(self, pid, minimum, maximum, flags):
+        self.limits[pid] = (minimum, maximum, flags)
+        return True
+
+
+def get_backend():
+    """Backend nativo, ou None fora do Windows"""
+    try:
+        return Win32WorkingSetBackend()
+    except (OSError, AttributeError):
+        return None
+
+
+class WorkingSetTrimmer:
+    """Job do scheduler: trim + teto suave dos processos de prioridade baixa durante jogos"""
+
+    JOB_NAME = 'working_set_trimmer'
+
+    def __init__(self, manager, is_game_active=None, backend=None, cap_mb=0,
+                 min_mb=32, interval=30.0, log=None):
+        self.manager = manager                  # SmartProcessManager (low_priority_entries)
+        self.is_game_active = is_game_active or (lambda: False)
+        self.backend = backend or get_backend() # None fora do Windows
+        self.cap_bytes = cap_mb * MB            # 0 = sem teto, só trim
+        self.min_bytes = min_mb * MB            # Working sets menores (ou que não cresceram isso) ficam
+        self.interval = interval
+        self.log = log                          # callback(evento, detalhes) - ex.: HistoryLogger.log_event
+        self.running = False
+
+        self.last_results = ()
+        self.reclaimed_by_process = {}          # nome -> bytes recuperados na sessão
+        self.total_reclaimed = 0
+        self._after = {}                        # chave -> working set após o último trim
+        self._caps = {}                         # chave -> (entry, limites originais)
+        self._lock = threading.RLock()          # step (scheduler) x stop/release (outras threads)
+
+    def step(self):
+        """Um ciclo: trim com jogo ativo, desfaz tetos quando não há jogo"""
+        with self._lock:
+            return self._step()
+
+    def _step(self):
+        try:
+            game = bool(self.is_game_active())
+        except Exception:
+            game = False
+        if not game:
+            if self._after or self._caps:
+                self.release()
+            return ()
+
+        results = []
+        for entry in self.manager.low_priority_entries():
+            result = self._trim_entry(entry)
+            if result is not None:
+                results.append(result)
+        self.last_results = tuple(results)
+        if results:
+            self._report(results)
+        return self.last_results
+
+    def _trim_entry(self, entry):
+        try:
+            before = self.backend.working_set(entry.pid)
+            # Só re-trim se cresceu desde o último (evita martelar o mesmo processo)
+            if before - self._after.get(entry.key, 0) < self.min_bytes:
+                return None
+            if not self.backend.trim(entry.pid):
+                return None
+            capped = self._cap(entry) if self.cap_bytes else False
+            after = self.backend.working_set(entry.pid)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, OSError):
+            self._after.pop(entry.key, None)
+            return None
+        self._after[entry.key] = after
+        return TrimResult(entry.pid, entry.name, before, after, capped)
+
+    def _cap(self, entry):
+        """Teto suave: o gerenciador de memória apara acima disto quando precisar"""
+        if entry.key in self._caps:
+            return True
+        original = self.backend.get_limits(entry.pid)
+        minimum = min(original[0], self.cap_bytes // 2)
+        if not self.backend.set_limits(entry.pid, minimum, self.cap_bytes, SOFT_LIMITS):
+            return False
+        self._caps[entry.key] = (entry, original)
+        return True
+
+    def _report(self, results):
+        reclaimed = 0
+        for result in results:
+            reclaimed += result.reclaimed_bytes
+            self.reclaimed_by_process[result.name] = (self.reclaimed_by_process.get(result.name, 0)
+                                                      + result.reclaimed_bytes)
+        self.total_reclaimed += reclaimed
+        details = ", ".join(f"{r.name} {r.reclaimed_bytes / MB:.0f}MB"
+                            for r in sorted(results, key=lambda r: r.reclaimed_bytes, reverse=True))
+        print(f"[TRIM] {reclaimed / MB:.0f}MB recuperados de {len(results)} processo(s): {details}")
+        if self.log:
+            self.log("working_set_trim", details)
+
+    def release(self):
+        """Devolve os limites originais (jogo fechou / parada)"""
+        with self._lock:
+            restored = 0
+            for entry, (minimum, maximum, flags) in self._caps.values():
+                try:
+                    if self.backend.set_limits(entry.pid, minimum, maximum, flags):
+                        restored += 1
+                except (psutil.NoSuchProcess, psutil.AccessDenied, OSError):
+                    continue
+            if restored:
+                print(f"[TRIM] Teto de working set removido de {restored} processo(s)")
+            self._caps.clear()
+            self._after.clear()
+
+    def trigger(self):
+        """Roda um ciclo já, na thread do scheduler (sem bloquear quem chamou)"""
+        if self.running:
+            scheduler.get_scheduler().run_now(self.JOB_NAME)
+
+    def start(self):
+        """Registra o job no scheduler central"""
+        if self.running or self.backend is None:
+            return False
+        self.running = True
+        scheduler.get_scheduler().add_job(self.JOB_NAME, self.step, self.interval)
+        return True
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        scheduler.get_scheduler().cancel(self.JOB_NAME)
+        self.release()
+
+    def get_status(self):
+        top = sorted(self.reclaimed_by_process.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'running': self.running,
+            'total_reclaimed': self.total_reclaimed,
+            'capped': len(self._caps),
+            'top': top[:3],
+        }
+
+
+if __name__ == "__main__":
+    # Teste com processos falsos: navegador e Discord durante um jogo
+    from modules.process_table import ProcessEntry
+
+    class _Manager:
+        def __init__(self, entries):
+            self.entries = entries
+
+        def low_priority_entries(self):
+            return self.entries
+
+    entries = [ProcessEntry(200, 1.0, 'chrome.exe', 32), ProcessEntry(300, 1.0, 'Discord.exe', 32),
+               ProcessEntry(400, 1.0, 'OneDrive.exe', 32)]
+    backend = FakeWorkingSetBackend({200: 900, 300: 350, 400: 60})
+    game = {'active': True}
+    trimmer = WorkingSetTrimmer(_Manager(entries), is_game_active=lambda: game['active'],
+                                backend=backend, cap_mb=256)
+    trimmer.step()
+    backend.grow(200, 120)
+    backend.grow(300, 10)
+    trimmer.step()
+    game['active'] = False
+    trimmer.step()
+    print(f"Total: {trimmer.total_reclaimed / MB:.0f}MB | trims: {backend.trims} | "
+          f"por processo: {[(n, b // MB) for n, b in trimmer.get_status()['top']]}")
@@ -11,12 +11,18 @@ from colorama import init, Fore, Style
 
 # Core Modules
 from modules.standby_cleaner import StandbyMemoryCleaner
+from modules.purge_policy import create_policy as create_purge_policy
+from modules.refault_tracker import RefaultTracker
+from modules.file_cache import FileCacheLimiter
 from modules.cpu_power import CPUPowerManager
 from modules.stress_test import CPUStressTest
 from modules.smart_process_manager import SmartProcessManager
 from modules.fan_controller import FanController
 from modules.dashboard import Dashboard
 from modules.gpu_controller import GPUController
+from modules.gpu_governor import GpuPowerGovernor
+from modules.vram_monitor import VramMonitor
+from modules.working_set_trimmer import WorkingSetTrimmer
 from modules.nvme_manager import NVMeManager
 
 # V3.0 Modules
@@ -30,6 +36,15 @@ from modules.tray_icon import SystemTrayIcon
 from modules.timer_resolution import TimerResolutionOptimizer
 from modules.services_optimizer import WindowsServicesOptimizer
 from modules.gamebar_optimizer import GameBarOptimizer
+from modules.telemetry import get_sampler
+from modules.metrics_store import get_store as get_metrics_store
+from modules.process_table import get_table as get_process_table
+from modules.scheduler import get_scheduler
+from modules.powershell_host import get_pool as get_powershell_pool
+from modules.command_executor import get_executor as get_command_executor
+from modules.wmi_broker import get_broker as get_wmi_broker
+from modules.nvml_session import get_session as get_nvml_session
+from modules.pdh_counters import get_engine as get_pdh_engine
 
 # Inicializa colorama para cores no terminal
 init()
@@ -56,7 +71,8 @@ def get_default_config():
         'standby_cleaner': {
             'enabled': True,
             'threshold_mb': 1024,
-            'check_interval_seconds': 5
+            'check_interval_seconds': 5,
+            'policy': 'threshold'
         },
         'cpu_control': {
             'max_frequency_percent': 100,
@@ -107,12 +123,66 @@ def main():
     # Inicializa serviços
     services = {}
     
+    # === SCHEDULER CENTRAL (uma thread para todos os jobs periódicos) ===
+    services['scheduler'] = get_scheduler()
+    services['scheduler'].start()
+    
+    # === TELEMETRY SAMPLER (snapshot único compartilhado) ===
+    services['telemetry'] = get_sampler()
+    services['metrics'] = get_metrics_store()
+    services['telemetry'].subscribe(services['metrics'].record_snapshot)
+    services['telemetry'].start()
+    
+    # === PROCESS TABLE (scan único compartilhado, eventos por delta) ===
+    services['process_table'] = get_process_table()
+    services['process_table'].start()
+    
     # === STANDBY MEMORY CLEANER ===
     if config.get('standby_cleaner', {}).get('enabled', True):
         cleaner_config = config['standby_cleaner']
+        threshold_mb = cleaner_config.get('threshold_mb', 1024)
+        min_standby_mb = cleaner_config.get('min_standby_mb', 1024)
+        policy_name = cleaner_config.get('policy', 'threshold')
+        tuner = None
+        if policy_name == 'aggressive':
+            policy = create_purge_policy(policy_name)
+        elif policy_name == 'predictive':
+            predictive_config = cleaner_config.get('predictive', {})
+            policy = create_purge_policy(
+                policy_name, threshold_mb, min_standby_mb=min_standby_mb,
+                horizon_s=predictive_config.get('horizon_seconds', 30),
+                alpha=predictive_config.get('alpha', 0.3),
+                cooldown_s=predictive_config.get('cooldown_seconds', 60),
+                hysteresis_mb=predictive_config.get('hysteresis_mb', 512)
+            )
+        else:
+            policy = create_purge_policy(policy_name, threshold_mb, min_standby_mb=min_standby_mb)
+        # Modo cache_limit: teto do cache de arquivos com jogo ativo em vez de purges
+        cache_limiter = None
+        if cleaner_config.get('mode', 'purge') == 'cache_limit':
+            cache_config = cleaner_config.get('cache_limit', {})
+            cache_limiter = FileCacheLimiter(
+                percent=cache_config.get('percent', 20),
+                min_mb=cache_config.get('min_mb', 256),
+                hard=cache_config.get('hard', False),
+                is_game_active=lambda: 'game_detector' in services and services['game_detector'].is_game_active()
+            )
+            if not cache_limiter.available:
+                print(f"{Fore.YELLOW}[WARN] SetSystemFileCacheSize indisponível, usando purges{Style.RESET_ALL}")
+                cache_limiter = None
+        # Custo de refault medido após cada purge ajusta limite e standby mínima
+        if policy_name != 'aggressive' and cleaner_config.get('auto_tune', True):
+            tuner = RefaultTracker(base_min_standby_mb=min_standby_mb,
+                                   log=get_history_logger().log_event)
         services['cleaner'] = StandbyMemoryCleaner(
-            threshold_mb=cleaner_config.get('threshold_mb', 1024),
-            check_interval=cleaner_config.get('check_interval_seconds', 5)
+            threshold_mb=threshold_mb,
+            check_interval=cleaner_config.get('check_interval_seconds', 5),
+            policy=policy,
+            history=get_history_logger(),
+            tiered=cleaner_config.get('tiered', True),
+            tuner=tuner,
+            cache_limiter=cache_limiter,
+            mode=cleaner_config.get('mode', 'purge')
         )
         services['cleaner'].start()
     
@@ -130,16 +200,19 @@ def main():
     max_freq = cpu_config.get('max_frequency_percent', 100)
     min_freq = cpu_config.get('min_frequency_percent', 5)
     
-    if max_freq != 100:
-        services['cpu_power'].set_max_cpu_frequency(max_freq)
+    if max_freq != 100 or min_freq != 5:
+        services['cpu_power'].set_cpu_limits(
+            max_freq if max_freq != 100 else None,
+            min_freq if min_freq != 5 else None
+        )
     
     # [V2.0] Adaptive Thermal Governor
     # Auto-enabled unless user specifically forced a low fixed manual limit (< 80)
     if max_freq >= 80:
-        services['cpu_power'].start_adaptive_governor()
-    
-    if min_freq != 5:
-        services['cpu_power'].set_min_cpu_frequency(min_freq)
+        services['cpu_power'].start_adaptive_governor(
+            thermal_limit=cpu_config.get('thermal_limit', 80),
+            max_percent=max_freq
+        )
     
     # === STRESS TEST ===
     stress_config = config.get('stress_test', {})
@@ -147,7 +220,8 @@ def main():
         services['stress'] = CPUStressTest()
         services['stress'].start(
             target_load_percent=stress_config.get('target_load_percent', 70),
-            thread_count=stress_config.get('thread_count', 0)
+            thread_count=stress_config.get('thread_count', 0),
+            thermal_limit=stress_config.get('thermal_limit', 90)
         )
     
     # === FAN CONTROL ===
@@ -162,7 +236,23 @@ def main():
     
     # === GPU CONTROL (POWER LIMIT) ===
     gpu_config = config.get('gpu_control', {})
-    if gpu_config.get('enabled', False):
+    if gpu_config.get('enabled', False) and gpu_config.get('dynamic', True):
+        # Limite dinâmico: padrão no jogo, reduzido ocioso/quente, original restaurado ao sair
+        gpu_governor = GpuPowerGovernor(
+            is_game_active=lambda: 'game_detector' in services and services['game_detector'].is_game_active(),
+            log=get_history_logger().log_event,
+            active_percent=gpu_config.get('power_limit_percent', 90),
+            idle_percent=gpu_config.get('idle_percent', 60),
+            hot_percent=gpu_config.get('hot_percent', 75),
+            hot_temp=gpu_config.get('hot_temp', 83),
+            min_hold=gpu_config.get('min_hold_seconds', 15)
+        )
+        if gpu_governor.start():
+            services['gpu_governor'] = gpu_governor
+            print(f"{Fore.GREEN}✓ GPU Governor ativado (power limit dinâmico){Style.RESET_ALL}")
+        else:
+            print(f"{Fore.YELLOW}⚠ GPU Governor indisponível (power limit não suportado){Style.RESET_ALL}")
+    elif gpu_config.get('enabled', False):
         gpu_ctrl = GPUController()
         if gpu_ctrl.initialized:
             power_limit = gpu_config.get('power_limit_percent', 90)
@@ -207,9 +297,43 @@ def main():
         services['game_detector'] = game_detector
         print(f"{Fore.GREEN}✓ Game Mode Detector ativado (Auto-Boost){Style.RESET_ALL}")
     
+    # === VRAM MONITOR (PRESSÃO DE MEMÓRIA DE VÍDEO) ===
+    vram_config = config.get('vram_monitor', {'enabled': True})
+    if vram_config.get('enabled', True):
+        game = lambda: services.get('game_detector')
+        vram_monitor = VramMonitor(
+            manager=services['smart_priority'],
+            is_game_active=lambda: game() is not None and game().is_game_active(),
+            game_pid=lambda: game().current_game_pid if game() else None,
+            demote_background=vram_config.get('demote_background', True),
+            pressure_ratio=vram_config.get('pressure_percent', 90) / 100,
+            release_ratio=vram_config.get('release_percent', 80) / 100,
+            sustain=vram_config.get('sustain_seconds', 6)
+        )
+        if vram_monitor.start():
+            services['vram_monitor'] = vram_monitor
+            print(f"{Fore.GREEN}✓ VRAM Monitor ativado (consumidores por processo){Style.RESET_ALL}")
+    
+    # === WORKING SET TRIMMER (só processos de prioridade baixa, só com jogo) ===
+    trim_config = config.get('working_set_trimmer', {'enabled': True})
+    if trim_config.get('enabled', True):
+        game = lambda: services.get('game_detector')
+        trimmer = WorkingSetTrimmer(
+            services['smart_priority'],
+            is_game_active=lambda: game() is not None and game().is_game_active(),
+            cap_mb=trim_config.get('cap_mb', 0),
+            min_mb=trim_config.get('min_mb', 32),
+            interval=trim_config.get('interval_seconds', 30),
+            log=get_history_logger().log_event
+        )
+        if trimmer.start():
+            services['ws_trimmer'] = trimmer
+            print(f"{Fore.GREEN}✓ Working Set Trimmer ativado (segundo plano durante jogos){Style.RESET_ALL}")
+    
     # === V3.0: HISTORY LOGGER ===
     history = get_history_logger()
     history.log_event("optimizer_start", "V4.0 Initialized")
+    history.attach_metrics(services['telemetry'], services['metrics'])
     services['history'] = history
     print(f"{Fore.GREEN}✓ History Logger ativado (CSV){Style.RESET_ALL}")
     
@@ -262,10 +386,29 @@ def main():
         # Para todos os serviços
         if 'cleaner' in services:
             services['cleaner'].stop()
+        if 'vram_monitor' in services:
+            services['vram_monitor'].stop()
+        if 'ws_trimmer' in services:
+            services['ws_trimmer'].stop()
         if 'smart_priority' in services:
             services['smart_priority'].stop()
         if 'stress' in services:
             services['stress'].stop()
+        if 'cpu_power' in services:
+            services['cpu_power'].stop_adaptive_governor()
+        if 'gpu_governor' in services:
+            services['gpu_governor'].stop()
+        if 'telemetry' in services:
+            services['telemetry'].stop()
+        if 'process_table' in services:
+            services['process_table'].stop()
+        if 'scheduler' in services:
+            services['scheduler'].stop()
+        get_powershell_pool().close()
+        get_command_executor().close()
+        get_wmi_broker().stop()
+        get_nvml_session().shutdown()
+        get_pdh_engine().stop()
         
         print(f"{Fore.GREEN}✓ Finalizado{Style.RESET_ALL}\n")
 